@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+DOCX Template Compiler
+======================
+
+Compile templates into static-chunk artifacts once, then render letters by
+joining chunks with XML-escaped values instead of re-parsing the template
+XML for every record (see template_tools/compiler.py).
+
+Usage:
+    python compile_templates.py public/template
+    python compile_templates.py public/template/F-106.docx --output-dir .cache/compiled
+    python compile_templates.py public/template/F-106.docx --render data.json --out F106.docx
+
+Features:
+- One JSON artifact per template (<output-dir>/<TEMPLATE>.json)
+- Tags split across runs are resolved at compile time
+- Sections ({#list}..{/list}) repeat table rows or paragraphs like
+  docxtemplater with paragraphLoop
+- Compiled tag names are checked against PlaceholderExtractor, so a template
+  the extractor documents differently is reported
+- --render fills one record (a JSON object) and writes the finished .docx
+
+Same as `python -m template_tools compile ...`.
+"""
+
+import sys
+
+from template_tools.cli import main
+
+if __name__ == '__main__':
+    main(['compile'] + sys.argv[1:], prog='compile_templates.py')
@@ -1,23 +1,12 @@
-import zipfile
-import re
 from pathlib import Path
 
+from template_tools import TextIndex
+
 def extract_placeholders_from_docx(docx_path):
     """Extract all placeholders from DOCX template"""
-    placeholders = set()
-    
-    with zipfile.ZipFile(docx_path, 'r') as zip_ref:
-        # Read document.xml which contains the main content
-        xml_content = zip_ref.read('word/document.xml').decode('utf-8')
-        
-        # Find all placeholders in format {placeholder_name}
-        pattern = r'\{([^}]+)\}'
-        matches = re.findall(pattern, xml_content)
-        
-        for match in matches:
-            placeholders.add(match)
-    
-    return sorted(placeholders)
+    # Scan run-merged text of word/document.xml so tags split across
+    # <w:r> runs are found and XML attribute values are ignored
+    return TextIndex.from_docx(docx_path).placeholder_names()
 
 # Path to template
 template_path = Path('public/template/KETERANGANBELUMMENIKAH.docx')
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark: one-shot ``soffice --convert-to`` vs. the warm conversion pool
+
+Renders N letters from a template with the compiled template engine, then
+converts them to PDF:
+
+- one-shot: ``soffice --convert-to pdf`` per letter with a fresh profile,
+  one after the other (what a route shelling out to LibreOffice would do)
+- pool: every letter submitted to a ``ConversionPool`` at once, so the
+  workers convert in parallel (what ``convert-server`` does)
+
+Startup of the pool is timed separately; it is paid once per server, not
+per letter. Both paths must produce a PDF for every letter.
+
+Usage:
+    python scripts/benchmark_conversion.py
+    python scripts/benchmark_conversion.py public/template/F-106.docx -n 40 --workers 4
+    python scripts/benchmark_conversion.py --mode cli --soffice /opt/libreoffice/program/soffice
+"""
+
+import sys
+import argparse
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from template_tools import compile_template
+from template_tools.convert import ConversionError, ConversionPool, convert_once, find_soffice
+
+DEFAULT_TEMPLATE = 'SKU.docx'
+
+
+def letters(template_path, count):
+    compiled = compile_template(template_path)
+    names = compiled.placeholder_names()
+    for number in range(1, count + 1):
+        record = {name: f'NILAI {name.upper()} {number}' for name in names}
+        yield f"letter_{number}.docx", compiled.render_bytes(record)
+
+
+def check(pdf, name):
+    if not pdf.startswith(b'%PDF'):
+        raise AssertionError(f'{name}: not a PDF')
+
+
+def main():
+    root = Path(__file__).resolve().parent.parent
+    parser = argparse.ArgumentParser(description="Local DOCX→PDF conversion benchmark")
+    parser.add_argument('template', nargs='?',
+                        default=str(root / 'public' / 'template' / DEFAULT_TEMPLATE))
+    parser.add_argument('-n', '--count', type=int, default=20, help="letters converted per path")
+    parser.add_argument('--workers', type=int, default=2, help="pool workers (default: 2)")
+    parser.add_argument('--mode', choices=('uno', 'cli'), default=None,
+                        help="pool mode (default: uno when available)")
+    parser.add_argument('--soffice', default=None, help="LibreOffice binary")
+    args = parser.parse_args()
+
+    try:
+        find_soffice(args.soffice)
+    except ConversionError as e:
+        print(f"❌ {e}")
+        sys.exit(2)
+
+    docs = list(letters(args.template, args.count))
+    print(f"{len(docs)} letters from {Path(args.template).name}\n")
+
+    start = time.perf_counter()
+    for name, data in docs:
+        check(convert_once(data, name, args.soffice), name)
+    once = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pool = ConversionPool(args.workers, max_jobs=0, mode=args.mode, soffice=args.soffice).start()
+    startup = time.perf_counter() - start
+    try:
+        start = time.perf_counter()
+        futures = [(name, pool.submit(data, name)) for name, data in docs]
+        for name, future in futures:
+            check(future.result(), name)
+        pooled = time.perf_counter() - start
+        stats = pool.stats()
+    finally:
+        pool.close()
+
+    print(f"{'Path':<34} {'Total':>9} {'Per letter':>11} {'Letters/s':>10}")
+    print("-" * 68)
+    print(f"{'one-shot soffice --convert-to':<34} {once:>8.2f}s {once / len(docs) * 1000:>9.0f}ms "
+          f"{len(docs) / once:>10.2f}")
+    label = f"pool ({stats['mode']}, {args.workers} workers)"
+    print(f"{label:<34} {pooled:>8.2f}s {pooled / len(docs) * 1000:>9.0f}ms "
+          f"{len(docs) / pooled:>10.2f}")
+    print(f"\nPool startup {startup:.2f}s (once per server); job latency "
+          f"p50 {stats['latency']['p50_ms']} ms, p95 {stats['latency']['p95_ms']} ms; "
+          f"speedup {once / pooled:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the placeholder extraction engines
+======================================================
+
+Runs every extraction path on every .docx in public/template and
+public/storage/surat, records per template:
+
+- wall time (best of --repeat runs, after one warm-up run)
+- CPU time (best of --repeat runs)
+- tracemalloc peak (one extra run, traced separately so tracing overhead
+  does not leak into the timings)
+
+plus the cold-start cost of the command line (``python -X importtime -m
+template_tools ...``: total import time and process wall time),
+and cross-checks the placeholder sets each engine reports for a file. Engines
+see one of two scopes: ``body`` (paragraphs and tables, as python-docx does)
+or ``xml`` (every ``<w:t>`` of word/document.xml, so text boxes too). Engines
+of the same scope must agree exactly and every ``body`` name must also be
+found by the ``xml`` engines. Names with a docxtemplater prefix such as
+``{/list}`` are left out because the engines disagree on purpose there.
+
+Results can be saved as a JSON baseline; later runs are compared against it
+and exit with status 1 when a metric regresses by more than --threshold
+percent, or when the engines disagree.
+
+Engines:
+- stream          body  PlaceholderExtractor, iterparse (extract_template_placeholders.py)
+- docx            body  PlaceholderExtractor, python-docx object model
+- read_template   xml   read_template.py (zipfile + byte scanner)
+- text_index      xml   TextIndex, as used by extract_placeholders_belum_menikah.py
+                        and scripts/extract_placeholders_n1.py
+- compiler        xml   template_tools.compiler slot names
+
+The engine that needs python-docx is skipped when it is not installed.
+
+Usage:
+    python scripts/benchmark_extraction.py --save-baseline
+    python scripts/benchmark_extraction.py
+    python scripts/benchmark_extraction.py --engine stream --engine text_index --threshold 50
+"""
+
+import sys
+import os
+import json
+import argparse
+import contextlib
+import importlib.util
+import io
+import platform
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from template_tools import TAG_PREFIXES, TextIndex, compile_template
+from template_tools.extractor import ExtractionError, PlaceholderExtractor
+from template_tools.paths import collect_templates
+
+DEFAULT_DIRS = [ROOT / 'public' / 'template', ROOT / 'public' / 'storage' / 'surat']
+DEFAULT_BASELINE = ROOT / '.cache' / 'benchmarks' / 'extraction_baseline.json'
+SCOPES = {
+    'stream': 'body',
+    'docx': 'body',
+    'read_template': 'xml',
+    'text_index': 'xml',
+    'compiler': 'xml',
+}
+BASELINE_VERSION = 1
+
+
+def _extractor(engine):
+    def run(path):
+        extractor = PlaceholderExtractor(path, engine=engine, cache=None, all_parts=False)
+        try:
+            extractor.extract()
+        except ExtractionError as e:
+            raise RuntimeError(f"{engine} engine could not read {path}: {e}") from e
+        return extractor.get_sorted_placeholders()
+    return run
+
+
+def _read_template():
+    import read_template
+
+    def run(path):
+        matches, _ = read_template.extract_placeholders(path)
+        return [value for kind, value in matches if kind == 'brace']
+    return run
+
+
+def _text_index(path):
+    return TextIndex.from_docx(path).placeholder_names()
+
+
+def _compiler(path):
+    return compile_template(path).slot_names()
+
+
+def available_engines():
+    """Engine name -> callable(path) returning placeholder names"""
+    has_docx = importlib.util.find_spec('docx') is not None
+    engines = {'stream': _extractor('stream')}
+    if has_docx:
+        engines['docx'] = _extractor('docx')
+    engines['read_template'] = _read_template()
+    engines['text_index'] = _text_index
+    engines['compiler'] = _compiler
+    return engines
+
+
+def normalise(names):
+    """Placeholder set comparable across engines"""
+    return sorted({name for name in names if name[:1] not in TAG_PREFIXES})
+
+
+def measure(fn, path, repeat):
+    """Run ``fn(path)``: result plus best wall/CPU ms and tracemalloc peak KB.
+
+    The minimum is the least noisy estimate of the cost itself; the median
+    still moves with whatever else the machine is doing.
+    """
+    walls, cpus = [], []
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = fn(path)   # warm-up: imports, page cache
+        for _ in range(repeat):
+            wall, cpu = time.perf_counter(), time.process_time()
+            result = fn(path)
+            walls.append((time.perf_counter() - wall) * 1000)
+            cpus.append((time.process_time() - cpu) * 1000)
+        tracemalloc.start()
+        try:
+            fn(path)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    metrics = {
+        'wall_ms': round(min(walls), 3),
+        'cpu_ms': round(min(cpus), 3),
+        'peak_kb': round(peak / 1024, 1),
+    }
+    return result, metrics
+
+
+def run_suite(files, engines, repeat):
+    """Benchmark every engine on every file; returns (results, mismatches)"""
+    results = {name: {} for name in engines}
+    mismatches = []
+    for path in files:
+        key = os.path.relpath(path, ROOT).replace(os.sep, '/')
+        found = {}
+        for name, fn in engines.items():
+            try:
+                names, metrics = measure(fn, path, repeat)
+            except Exception as e:
+                print(f"❌ {name:<14} {key}: {e}")
+                mismatches.append({'file': key, 'engine': name, 'error': str(e)})
+                continue
+            results[name][key] = metrics
+            found[name] = normalise(names)
+            print(f"   {name:<14} {key:<60} {metrics['wall_ms']:>9.2f} ms "
+                  f"{metrics['cpu_ms']:>9.2f} ms {metrics['peak_kb']:>9.1f} KB")
+
+        mismatches.extend(cross_check(key, found))
+    return results, mismatches
+
+
+def cross_check(key, found):
+    """Disagreements between engines on one file"""
+    mismatches = []
+    references = {}
+    for name, names in found.items():
+        scope = SCOPES[name]
+        reference_engine, reference = references.setdefault(scope, (name, names))
+        if names != reference:
+            mismatches.append({
+                'file': key,
+                'engine': name,
+                'reference': reference_engine,
+                'missing': sorted(set(reference) - set(names)),
+                'extra': sorted(set(names) - set(reference)),
+            })
+    if 'body' in references and 'xml' in references:
+        (body_engine, body), (xml_engine, xml) = references['body'], references['xml']
+        outside = sorted(set(body) - set(xml))
+        if outside:
+            mismatches.append({
+                'file': key,
+                'engine': xml_engine,
+                'reference': body_engine,
+                'missing': outside,
+                'extra': [],
+            })
+    return mismatches
+
+
+def parse_importtime(stderr):
+    """Total and heaviest top-level imports from ``-X importtime`` output (µs)"""
+    top_level = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue  # header line
+        name = fields[2]
+        # Nested imports are indented under the module that triggered them
+        if name[1:2] != ' ':
+            top_level.append((int(fields[1]), name.strip()))
+    return sum(us for us, _ in top_level), sorted(top_level, reverse=True)
+
+
+def startup_times(repeat):
+    """Cold-start cost of the CLI: ``-X importtime`` total and process wall time"""
+    import subprocess
+
+    sample = str(ROOT / 'public' / 'template' / 'SKU.docx')
+    commands = {
+        'cli --help': ['-m', 'template_tools', '--help'],
+        'cli list': ['-m', 'template_tools', 'list', sample],
+        'cli dump': ['-m', 'template_tools', 'dump', sample],
+        'cli extract --help': ['-m', 'template_tools', 'extract', '--help'],
+        'extract_template_placeholders.py --help': [str(ROOT / 'extract_template_placeholders.py'), '--help'],
+    }
+    results = {}
+    print(f"\n🚀 Cold start (-X importtime, best of {repeat})")
+    print(f"   {'Command':<42} {'Imports':>12} {'Process':>12}  Heaviest imports")
+    for label, argv in commands.items():
+        imports, walls, heaviest = [], [], []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            proc = subprocess.run([sys.executable, '-X', 'importtime'] + argv, cwd=ROOT,
+                                  capture_output=True, text=True)
+            walls.append((time.perf_counter() - start) * 1000)
+            total, heaviest = parse_importtime(proc.stderr)
+            imports.append(total / 1000)
+        results[label] = {'import_ms': round(min(imports), 3), 'wall_ms': round(min(walls), 3)}
+        top = ', '.join(f"{name} {us / 1000:.1f}" for us, name in heaviest[:3])
+        print(f"   {label:<42} {min(imports):>9.1f} ms {min(walls):>9.1f} ms  {top}")
+    return results
+
+
+def compare(results, baseline, threshold, noise_ms):
+    """Metrics worse than the baseline by more than ``threshold`` percent"""
+    regressions = []
+    for engine, files in results.items():
+        for key, metrics in files.items():
+            before = baseline.get('results', {}).get(engine, {}).get(key)
+            if not before:
+                continue
+            for metric, new in metrics.items():
+                old = before.get(metric)
+                if not old:
+                    continue
+                # Sub-millisecond timings are mostly scheduler noise
+                if metric != 'peak_kb' and new - old < noise_ms:
+                    continue
+                change = (new - old) / old * 100
+                if change > threshold:
+                    regressions.append((engine, key, metric, old, new, change))
+    return regressions
+
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(
+        description="Placeholder extraction benchmark suite",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        'paths', nargs='*', default=[str(d) for d in DEFAULT_DIRS],
+        help="templates, directories or globs (default: public/template and public/storage/surat)",
+    )
+    parser.add_argument(
+        '--engine', action='append', default=None,
+        help="engine to run (repeatable; default: all available)",
+    )
+    parser.add_argument(
+        '--repeat', type=int, default=5,
+        help="timed runs per engine and file; the best is kept (default: 5)",
+    )
+    parser.add_argument(
+        '--baseline', default=str(DEFAULT_BASELINE),
+        help="baseline JSON to compare against / save to",
+    )
+    parser.add_argument(
+        '--save-baseline', action='store_true',
+        help="write this run's results as the new baseline",
+    )
+    parser.add_argument(
+        '--threshold', type=float, default=25.0,
+        help="allowed regression in percent before the run fails (default: 25)",
+    )
+    parser.add_argument(
+        '--noise-ms', type=float, default=1.0,
+        help="ignore timing regressions smaller than this many ms (default: 1.0)",
+    )
+    parser.add_argument(
+        '--no-startup', action='store_true',
+        help="skip the cold-start (-X importtime) measurements",
+    )
+    parser.add_argument(
+        '--output', default=None,
+        help="also write this run's results to a JSON file",
+    )
+    args = parser.parse_args(argv)
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+    return args
+
+
+def main():
+    """Main function"""
+    args = parse_args()
+    engines = available_engines()
+    if args.engine:
+        unknown = [name for name in args.engine if name not in engines]
+        if unknown:
+            print(f"❌ Error: Unknown or unavailable engine(s): {', '.join(unknown)} "
+                  f"(available: {', '.join(engines)})")
+            sys.exit(1)
+        engines = {name: engines[name] for name in args.engine}
+
+    files = collect_templates(args.paths)
+    if not files:
+        print(f"❌ Error: No .docx files found in: {', '.join(args.paths)}")
+        sys.exit(1)
+
+    print(f"📊 {len(engines)} engines x {len(files)} files, {args.repeat} runs each")
+    print(f"   {'Engine':<14} {'File':<60} {'Wall':>12} {'CPU':>12} {'Peak':>12}")
+    results, mismatches = run_suite(files, engines, args.repeat)
+    if not args.no_startup:
+        results['startup'] = startup_times(args.repeat)
+
+    report = {
+        'version': BASELINE_VERSION,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'repeat': args.repeat,
+        'results': results,
+        'mismatches': mismatches,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    failed = False
+    if mismatches:
+        failed = True
+        print(f"\n❌ {len(mismatches)} cross-check failure(s):")
+        for item in mismatches:
+            if 'error' in item:
+                print(f"   {item['engine']} on {item['file']}: {item['error']}")
+            else:
+                print(f"   {item['engine']} vs {item['reference']} on {item['file']}: "
+                      f"missing {item['missing']}, extra {item['extra']}")
+    else:
+        print("\n✅ All engines agree on every file")
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or '.', exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Baseline saved to: {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold, args.noise_ms)
+        if regressions:
+            failed = True
+            print(f"\n❌ {len(regressions)} regression(s) over {args.threshold:g}% "
+                  f"(baseline {baseline.get('created', '?')}):")
+            for engine, key, metric, old, new, change in regressions:
+                print(f"   {engine:<14} {key:<60} {metric:<8} {old:>10} -> {new:>10} (+{change:.0f}%)")
+        else:
+            print(f"✅ No regressions over {args.threshold:g}% against {args.baseline}")
+    else:
+        print(f"ℹ️  No baseline at {args.baseline} (run with --save-baseline)")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark: pass-through ZIP writer vs. full rewrite of the template package
+
+For each template, render one record with the compiled template and write the
+letter N times:
+
+- full rewrite: zipfile, every member inflated and deflated again (what
+  PizZip.generate({compression: 'DEFLATE'}) does)
+- pass-through: ZipTemplate, only the rendered parts are deflated
+
+Both outputs are checked to hold the same member bytes before timing.
+
+Usage:
+    python scripts/benchmark_zip_writer.py
+    python scripts/benchmark_zip_writer.py public/template/SKU.docx -n 500
+"""
+
+import sys
+import argparse
+import io
+import time
+import zipfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from template_tools import compile_template
+
+DEFAULT_TEMPLATES = ['SKTM.docx', 'SKU.docx', 'UMUM.docx', 'BELUMRUMAH.docx']
+
+
+def full_rewrite(source, rendered, output):
+    """Reference writer: inflate and deflate every member"""
+    with zipfile.ZipFile(source) as src, zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as dst:
+        for info in src.infolist():
+            data = rendered.get(info.filename)
+            if data is None:
+                data = src.read(info)
+            dst.writestr(info, data, compress_type=zipfile.ZIP_DEFLATED)
+
+
+def members(data):
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        if zf.testzip() is not None:
+            raise AssertionError('CRC mismatch in output')
+        return {info.filename: zf.read(info) for info in zf.infolist()}
+
+
+def time_it(fn, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        fn()
+    return (time.perf_counter() - start) / count
+
+
+def bench(template_path, count):
+    compiled = compile_template(template_path)
+    record = {name: f'NILAI {name.upper()}' for name in compiled.placeholder_names()}
+    rendered = compiled.render(record)
+
+    def rewrite():
+        buffer = io.BytesIO()
+        full_rewrite(template_path, rendered, buffer)
+        return buffer.getvalue()
+
+    def passthrough():
+        return compiled.package.to_bytes(rendered)
+
+    if members(rewrite()) != members(passthrough()):
+        raise AssertionError(f'{template_path}: writers disagree')
+
+    slow = time_it(rewrite, count)
+    fast = time_it(passthrough, count)
+    size = Path(template_path).stat().st_size // 1024
+    print(f"{Path(template_path).name:<28} {size:>5} KB "
+          f"{slow * 1000:>9.2f} ms {fast * 1000:>9.2f} ms {slow / fast:>7.1f}x "
+          f"{1 / fast:>9.0f}/s")
+
+
+def main():
+    root = Path(__file__).resolve().parent.parent
+    parser = argparse.ArgumentParser(description="Pass-through ZIP writer benchmark")
+    parser.add_argument('templates', nargs='*',
+                        default=[str(root / 'public' / 'template' / name) for name in DEFAULT_TEMPLATES])
+    parser.add_argument('-n', '--count', type=int, default=200, help="letters written per writer")
+    args = parser.parse_args()
+
+    print(f"{'Template':<28} {'Size':>8} {'Rewrite':>12} {'Pass-through':>12} {'Speedup':>8} {'Letters':>10}")
+    print("-" * 84)
+    for template_path in args.templates:
+        bench(template_path, args.count)
+
+
+if __name__ == '__main__':
+    main()
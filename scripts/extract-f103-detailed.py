@@ -1,39 +1,14 @@
 #!/usr/bin/env python3
-"""Extract detailed content from F-103.docx"""
+"""Extract detailed content from F-103.docx
 
-import re
-from docx import Document
+Same as: python -m template_tools dump public/template/F-103.docx --structure
+"""
 
-doc = Document('public/template/F-103.docx')
+import sys
+from pathlib import Path
 
-print("=" * 80)
-print("PARAGRAPHS:")
-print("=" * 80)
-for i, para in enumerate(doc.paragraphs):
-    if para.text.strip():
-        print(f"{i}: {para.text}")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-print("\n" + "=" * 80)
-print("TABLES:")
-print("=" * 80)
-for table_idx, table in enumerate(doc.tables):
-    print(f"\n--- Table {table_idx + 1} ---")
-    for row_idx, row in enumerate(table.rows):
-        cells_text = [cell.text.strip() for cell in row.cells]
-        print(f"Row {row_idx}: {cells_text}")
+from template_tools.cli import main
 
-print("\n" + "=" * 80)
-print("PLACEHOLDERS:")
-print("=" * 80)
-placeholders = set()
-for para in doc.paragraphs:
-    matches = re.findall(r'\{([^}]+)\}', para.text)
-    placeholders.update(matches)
-for table in doc.tables:
-    for row in table.rows:
-        for cell in row.cells:
-            matches = re.findall(r'\{([^}]+)\}', cell.text)
-            placeholders.update(matches)
-
-for p in sorted(placeholders):
-    print(f"  {{{p}}}")
+main(['dump', 'public/template/F-103.docx', '--structure'], prog='extract-f103-detailed.py')
@@ -2,46 +2,30 @@
 """
 Script to extract placeholders from DOCX template
 Usage: python scripts/extract-placeholders.py public/template/SURATKELUAR.docx
+
+Same as: python -m template_tools list public/template/SURATKELUAR.docx
 """
 
 import sys
-import re
-from docx import Document
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 def extract_placeholders(docx_path):
     """Extract all {placeholder} patterns from a DOCX file"""
+    from template_tools import TextIndex
+
     try:
-        doc = Document(docx_path)
-        placeholders = set()
-        
-        # Extract from paragraphs
-        for paragraph in doc.paragraphs:
-            matches = re.findall(r'\{([^}]+)\}', paragraph.text)
-            placeholders.update(matches)
-        
-        # Extract from tables
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    matches = re.findall(r'\{([^}]+)\}', cell.text)
-                    placeholders.update(matches)
-        
-        return sorted(list(placeholders))
-    
+        return TextIndex.from_docx(docx_path).placeholder_names()
     except Exception as e:
         print(f"Error: {e}")
         return []
 
 if __name__ == "__main__":
+    from template_tools.cli import main
+
     if len(sys.argv) < 2:
         print("Usage: python extract-placeholders.py <path-to-docx>")
         sys.exit(1)
     
-    docx_path = sys.argv[1]
-    placeholders = extract_placeholders(docx_path)
-    
-    print(f"\n📄 Found {len(placeholders)} placeholders in {docx_path}:\n")
-    for i, placeholder in enumerate(placeholders, 1):
-        print(f"{i}. {{{placeholder}}}")
-    
-    print("\n✅ Done!")
+    main(['list', sys.argv[1]], prog='extract-placeholders.py')
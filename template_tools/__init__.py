@@ -0,0 +1,68 @@
+"""
+Shared helpers for the DOCX template tooling
+============================================
+
+Building blocks used by extract_template_placeholders.py and the smaller
+per-template scripts, so every tool scans templates the same way. The
+command line lives in ``template_tools.cli`` (``python -m template_tools``).
+
+Names below are imported on first access, so importing the package (or
+running ``python -m template_tools --help``) stays cheap.
+"""
+
+import importlib
+
+_EXPORTS = {
+    'CompiledTemplate': 'compiler',
+    'TemplateSyntaxError': 'compiler',
+    'compile_template': 'compiler',
+    'ConversionPool': 'convert',
+    'ExtractionError': 'extractor',
+    'PlaceholderExtractor': 'extractor',
+    'StreamingDocumentReader': 'extractor',
+    'PlaceholderIndex': 'inverted',
+    'LocationIndex': 'locations',
+    'Occurrence': 'locations',
+    'format_location': 'locations',
+    'NormalisedTemplate': 'normalise',
+    'normalise_template': 'normalise',
+    'collect_templates': 'paths',
+    'HtmlPreview': 'preview',
+    'compile_preview': 'preview',
+    'load_preview': 'preview',
+    'BRACE_PATTERNS': 'scanner',
+    'DOCXTEMPLATER_PATTERNS': 'scanner',
+    'Match': 'scanner',
+    'MultiPatternScanner': 'scanner',
+    'Pattern': 'scanner',
+    'merged_text_bytes': 'scanner',
+    'index_letters': 'search',
+    'TemplateSchema': 'schema',
+    'parse_schema': 'schema',
+    'TemplateSkeleton': 'recover',
+    'SlimmedTemplate': 'slim',
+    'slim_template': 'slim',
+    'NAME_CHARS': 'text_index',
+    'TAG_PREFIXES': 'text_index',
+    'Placeholder': 'text_index',
+    'TextIndex': 'text_index',
+    'find_placeholders': 'text_index',
+    'iter_placeholders': 'text_index',
+    'layout_text': 'text_index',
+    'ZipTemplate': 'zipwriter',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'{__name__}.{module}'), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,5 @@
+"""``python -m template_tools``"""
+
+from template_tools.cli import main
+
+main()
@@ -0,0 +1,302 @@
+"""
+Audit generated letters for rendering defects
+=============================================
+
+A broken template does not fail the route that renders it: the letter is
+written and handed to the citizen with ``{nama_pemohon}`` still in it (the
+split tags scripts/patch-template-f106-final.js had to repair), a required
+field left blank, or XML Word refuses to open. ``audit_letters`` looks at
+every letter in the archive and reports:
+
+* ``leftover_tag``  ``{name}``, ``{{name}}``, ``{#loop}``, ``{/loop}``,
+  ``{^x}`` or ``{@raw}`` in the text, found with the shared byte scanner
+  over the run-merged ``<w:t>`` content of each part
+* ``empty_field``   a top-level slot of the letter's template that came
+  out empty (values are read back with ``template_tools.recover``)
+* ``unrecognised``  the text does not follow the template at all
+* ``malformed``     unreadable zip, bad CRC, XML that does not parse
+
+Letters are opened through ``mmap``: the zip reader seeks around the
+central directory and the few parts it needs without copying the file.
+``AuditState`` remembers the size and mtime of every letter already looked
+at, so a nightly run over a growing archive only opens the new ones.
+"""
+
+import json
+import mmap
+import os
+import zipfile
+import zlib
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+from xml.parsers import expat
+
+from template_tools.parts import discover_parts
+from template_tools.recover import (
+    iter_letters,
+    letter_prefix,
+    load_templates,
+    register_templates,
+    skeleton_for,
+)
+from template_tools.scanner import (
+    BRACE_PATTERNS,
+    DOCXTEMPLATER_PATTERNS,
+    MultiPatternScanner,
+    merged_text_bytes,
+)
+from template_tools.text_index import NAME_CHARS
+
+ISSUE_KINDS = ('leftover_tag', 'empty_field', 'unrecognised', 'malformed')
+
+# Bumped when the state layout or the checks change: older states are ignored
+STATE_VERSION = 1
+
+SCANNER = MultiPatternScanner(
+    tuple(p for p in BRACE_PATTERNS if p.kind in ('double_brace', 'brace')) + DOCXTEMPLATER_PATTERNS
+)
+
+Issue = namedtuple('Issue', 'kind part detail')
+AuditResult = namedtuple('AuditResult', 'path size mtime_ns issues')
+
+
+# Prefix each scanner kind strips from its value
+_TAG_FORMATS = {
+    'double_brace': '{{{{{}}}}}',
+    'brace': '{{{}}}',
+    'loop_open': '{{#{}}}',
+    'loop_close': '{{/{}}}',
+    'inverted': '{{^{}}}',
+    'raw': '{{@{}}}',
+}
+
+
+def leftover_tags(xml):
+    """Tags (``{name}``, ``{#list}``, ...) still present in part XML bytes"""
+    return [
+        _TAG_FORMATS[match.kind].format(match.value)
+        for match in SCANNER.scan(merged_text_bytes(xml))
+        if match.value and all(c in NAME_CHARS for c in match.value)
+    ]
+
+
+def xml_error(xml):
+    """Parser message for malformed XML bytes, None when well-formed"""
+    parser = expat.ParserCreate()
+    try:
+        parser.Parse(xml, True)
+    except expat.ExpatError as e:
+        return f"line {e.lineno}, column {e.offset}: {expat.ErrorString(e.code)}"
+    return None
+
+
+class _MappedFile(mmap.mmap):
+    """Read-only mapping ``zipfile`` accepts as a file (``seekable`` is
+    only on ``mmap`` itself from Python 3.13)"""
+
+    def seekable(self):
+        return True
+
+
+def audit_letter(path, skeleton=None, optional=()):
+    """``Issue`` list of one letter.
+
+    Args:
+        path: the letter .docx
+        skeleton: ``TemplateSkeleton`` of its template (None: no field check)
+        optional: slot names allowed to be empty
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return [Issue('malformed', '', "empty file")]
+        with _MappedFile(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            try:
+                return _audit_zip(data, skeleton, optional)
+            except (zipfile.BadZipFile, zipfile.LargeZipFile, EOFError) as e:
+                return [Issue('malformed', '', f"bad zip: {e}")]
+            except ET.ParseError as e:
+                return [Issue('malformed', '', f"bad package relationships: {e}")]
+            except zlib.error as e:
+                return [Issue('malformed', '', f"corrupt compressed data: {e}")]
+            except (KeyError, ValueError) as e:
+                # KeyError: a part the package needs (word/document.xml) is missing
+                return [Issue('malformed', '', f"bad package: {e}")]
+
+
+def _audit_zip(data, skeleton, optional):
+    issues = []
+    parts = {}
+    with zipfile.ZipFile(data) as zf:
+        for part in discover_parts(zf):
+            xml = zf.read(part.name)
+            error = xml_error(xml)
+            if error:
+                issues.append(Issue('malformed', part.name, error))
+                continue
+            parts[part.name] = xml
+            issues.extend(Issue('leftover_tag', part.name, tag) for tag in leftover_tags(xml))
+    if skeleton is None:
+        return issues
+    values = {}
+    for part in skeleton.patterns:
+        if part not in parts:
+            if not any(issue.part == part for issue in issues):
+                issues.append(Issue('unrecognised', part, "part missing"))
+        elif skeleton.recover_part(part, parts[part], values) is None:
+            issues.append(Issue('unrecognised', part,
+                                f"text does not follow {os.path.basename(skeleton.source)}"))
+    issues.extend(Issue('empty_field', '', name) for name in skeleton.slot_names
+                  if values.get(name) == '' and name not in optional)
+    return issues
+
+
+# ---------------------------------------------------------------- state
+
+class AuditState:
+    """Letters already audited: path -> ``[size, mtime_ns, issues]``.
+
+    A letter whose size and mtime are unchanged is not opened again; its
+    stored issues still count in the report.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.files = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') == STATE_VERSION:
+                    self.files = data['files']
+            except (OSError, ValueError, KeyError):
+                self.files = {}  # unreadable state: audit everything again
+
+    def is_current(self, path, stat):
+        entry = self.files.get(path)
+        return entry is not None and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns
+
+    def issues(self, path):
+        return [Issue(*issue) for issue in self.files[path][2]]
+
+    def record(self, result):
+        self.files[result.path] = [result.size, result.mtime_ns, [list(i) for i in result.issues]]
+
+    def forget_missing(self, roots, seen):
+        """Drop letters under the ``roots`` directories that were not found
+        in this run (deleted or moved); returns how many"""
+        roots = tuple(os.path.join(root, '') for root in roots if os.path.isdir(root))
+        gone = [path for path in self.files if path.startswith(roots) and path not in seen]
+        for path in gone:
+            del self.files[path]
+        return len(gone)
+
+    def save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': STATE_VERSION, 'files': self.files}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
+# ---------------------------------------------------------------- driver
+
+_optional = frozenset()
+
+
+def _init_worker(artifacts, optional):
+    global _optional
+    load_templates(artifacts)
+    _optional = frozenset(optional)
+
+
+def _audit_chunk(chunk):
+    results = []
+    for prefix, path, size, mtime_ns in chunk:
+        try:
+            issues = audit_letter(path, skeleton_for(prefix), _optional)
+        except OSError as e:
+            issues = [Issue('malformed', '', str(e))]
+        results.append(AuditResult(path, size, mtime_ns, issues))
+    return results
+
+
+class AuditStats:
+    """Counters of an audit run"""
+
+    def __init__(self):
+        self.audited = 0
+        self.unchanged = 0
+        self.removed = 0
+        self.by_kind = dict.fromkeys(ISSUE_KINDS, 0)
+
+
+def _chunks(paths, state, stats, on_known, chunk_size):
+    chunk = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        if state.is_current(path, stat):
+            stats.unchanged += 1
+            on_known(AuditResult(path, stat.st_size, stat.st_mtime_ns, state.issues(path)))
+            continue
+        chunk.append((letter_prefix(path), path, stat.st_size, stat.st_mtime_ns))
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def audit_letters(paths, templates, state, workers=1, optional=(), on_result=None,
+                  on_known=None, chunk_size=64, window=None):
+    """Audit every letter under ``paths`` not already current in ``state``.
+
+    Args:
+        paths: letter files or directories (walked lazily)
+        templates: letter name prefix -> CompiledTemplate, for the field
+            checks (see ``recover_letters``); may be empty
+        state: ``AuditState``; updated, not saved
+        workers: processes (1 works in this process)
+        optional: slot names allowed to be empty
+        on_result: ``callback(AuditResult)`` for each letter audited now
+        on_known: ``callback(AuditResult)`` for each letter skipped as
+            unchanged, with the issues stored in the state
+    Returns:
+        ``AuditStats``; issue counts cover audited and unchanged letters
+    """
+    stats = AuditStats()
+    seen = set()
+
+    def letters():
+        for path in iter_letters(paths):
+            seen.add(path)
+            yield path
+
+    def count(result, callback):
+        for issue in result.issues:
+            stats.by_kind[issue.kind] += 1
+        if callback is not None:
+            callback(result)
+
+    chunks = _chunks(letters(), state, stats, lambda result: count(result, on_known), chunk_size)
+    if workers <= 1:
+        _init_worker({}, optional)
+        register_templates(templates)
+        results = (result for chunk in chunks for result in _audit_chunk(chunk))
+    else:
+        from template_tools.pool import bounded_map
+
+        artifacts = {prefix: compiled.to_json() for prefix, compiled in templates.items()}
+        results = (result for results in bounded_map(_audit_chunk, chunks, workers, window,
+                                                     _init_worker, (artifacts, tuple(optional)))
+                   for result in results)
+    for result in results:
+        stats.audited += 1
+        state.record(result)
+        count(result, on_result)
+    stats.removed = state.forget_missing(paths, seen)
+    return stats
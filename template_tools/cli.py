@@ -0,0 +1,521 @@
+"""
+Command line interface: ``python -m template_tools <command>``
+==============================================================
+
+One entry point for the template tooling that used to be spread over nine
+scripts (they are now thin shims over these commands):
+
+    extract   placeholders, locations and docs of one template; several
+              paths or a directory/glob switch to batch mode; --watch keeps
+              re-extracting templates as they are saved; --profile times
+              each phase (tracemalloc, optional cProfile dump)
+    batch     extract many templates over a process pool + JSON summary
+    docs      (re)write the *_PLACEHOLDERS.md files only
+    list      placeholder names, optionally as TypeScript interface fields
+    dump      delimiter styles, plain text or paragraph/table layout
+    schema    nested fields/loops/conditions of a template, as a tree or a
+              JSON Schema; checks section balance and validates records
+    compile   precompile templates and render letters from the artifacts
+    preview   HTML previews from a cached skeleton per template; filling
+              one is a string join, no docx parsing
+    normalise strip rsid/proofErr noise, merge runs and join split tags in
+              templates; verified against the extractor and a render
+    slim      list package members; drop unreferenced parts, deduplicate
+              and recompress media, deflate everything
+    merge     render one letter per JSONL/CSV record over a process pool
+    routes    check the templateData keys of the API routes against the
+              placeholders of the templates they render
+    recover   read the placeholder values back out of generated letters
+    audit     find leftover tags, empty fields and broken XML in generated
+              letters; only new letters are opened on later runs
+    index     update the inverted placeholder index (changed templates only)
+    find      which templates use a placeholder: exact, prefix, glob
+              (``*_pejabat``) or fuzzy, answered from the index alone
+    search-index
+              load the text of generated letters into a SQLite FTS5 index;
+              only new or changed letters are opened on later runs
+    search    ranked full-text search over the indexed letters, with snippets
+    convert-server
+              local DOCX→PDF server over warm LibreOffice workers, speaking
+              the ConvertAPI endpoints the process-* routes use
+
+Only argparse is imported up front. The commands live in the ``cli_*``
+modules next to this one (``cli_extract``, ``cli_templates``, ...), and
+``main`` imports the one that runs; they import what they need in turn, so
+``--help`` and the zip-only commands never load python-docx,
+multiprocessing or the compiler. The helpers shared by the commands stay
+here.
+"""
+
+import argparse
+import importlib
+import sys
+
+from template_tools.defaults import (
+    DEFAULT_ARCHIVE_DIR,
+    DEFAULT_AUDIT_STATE,
+    DEFAULT_CACHE_DIR,
+    DEFAULT_CACHE_MB,
+    DEFAULT_COMPILED_DIR,
+    DEFAULT_CONVERT_HOST,
+    DEFAULT_CONVERT_MAX_JOBS,
+    DEFAULT_CONVERT_PORT,
+    DEFAULT_CONVERT_TIMEOUT,
+    DEFAULT_CONVERT_WORKERS,
+    DEFAULT_INDEX_PATH,
+    DEFAULT_OUTPUT_DIR,
+    DEFAULT_PREVIEW_DIR,
+    DEFAULT_ROUTES_DIR,
+    DEFAULT_SEARCH_DB,
+    DEFAULT_TEMPLATE_DIR,
+    DEFAULT_WATCH_DEBOUNCE,
+    DEFAULT_WATCH_INTERVAL,
+    DOC_FORMATS,
+    ENGINES,
+    SUMMARY_FILENAME,
+)
+
+EXTRACT_EXAMPLES = (
+    "Examples:\n"
+    "  python -m template_tools extract public/template/SKTM.docx\n"
+    "  python -m template_tools extract --engine docx public/template/SKU.docx\n"
+    "  python -m template_tools extract public/template --workers 4\n"
+    "  python -m template_tools extract \"public/template/KETERANGAN*.docx\"\n"
+    "  python -m template_tools docs public/template --watch\n"
+    "  python -m template_tools extract public/template --profile --cprofile .cache/extract.prof\n"
+)
+
+
+def _fail(message):
+    print(f"❌ Error: {message}")
+    sys.exit(1)
+
+
+def _templates(paths):
+    from template_tools.paths import collect_templates
+
+    templates = collect_templates(paths)
+    if not templates:
+        _fail(f"No .docx templates found in: {', '.join(paths)}")
+    return templates
+
+
+def _add_paths(parser, help_text="template .docx, a directory of templates, or a glob"):
+    parser.add_argument('paths', nargs='+', metavar='docx_path', help=help_text)
+
+
+def _add_extract_arguments(parser):
+    _add_paths(parser)
+    parser.add_argument(
+        '--engine', choices=ENGINES, default='stream',
+        help="stream: iterparse every part (default); docx: python-docx object model, body only",
+    )
+    parser.add_argument(
+        '--body-only', action='store_true',
+        help="only scan the document body (skip headers, footers, notes and text boxes)",
+    )
+    parser.add_argument(
+        '--workers', type=int, default=None,
+        help="worker processes for batch mode (default: CPU count)",
+    )
+    parser.add_argument(
+        '--output-dir', default=DEFAULT_OUTPUT_DIR,
+        help=f"where *_PLACEHOLDERS.md files are written (default: {DEFAULT_OUTPUT_DIR})",
+    )
+    parser.add_argument(
+        '--format', dest='doc_format', choices=DOC_FORMATS, default='markdown',
+        help="documentation written per template: markdown (*_PLACEHOLDERS.md, default), "
+             "json or ndjson (placeholders, locations and TypeScript mapping, for tools)",
+    )
+    parser.add_argument(
+        '--summary', default=None,
+        help=f"combined JSON summary for batch mode (default: <output-dir>/{SUMMARY_FILENAME})",
+    )
+    _add_cache_arguments(parser)
+    _add_index_arguments(parser)
+    parser.add_argument(
+        '--watch', action='store_true',
+        help="keep running and re-extract templates whenever they are saved",
+    )
+    parser.add_argument(
+        '--interval', type=float, default=DEFAULT_WATCH_INTERVAL, metavar='SECONDS',
+        help=f"how often --watch checks the templates (default: {DEFAULT_WATCH_INTERVAL:g})",
+    )
+    parser.add_argument(
+        '--debounce', type=float, default=DEFAULT_WATCH_DEBOUNCE, metavar='SECONDS',
+        help=f"quiet period after a save before --watch re-extracts (default: {DEFAULT_WATCH_DEBOUNCE:g})",
+    )
+    _add_profile_arguments(parser)
+
+
+def _add_profile_arguments(parser):
+    parser.add_argument(
+        '--profile', action='store_true',
+        help="time each extraction phase and measure it with tracemalloc; batch runs add up "
+             "all templates",
+    )
+    parser.add_argument(
+        '--profile-json', metavar='PATH', default=None,
+        help="also write the profile, per template and in total, as JSON (implies --profile)",
+    )
+    parser.add_argument(
+        '--cprofile', metavar='PATH', default=None,
+        help="run cProfile too, dump the combined stats to PATH and print the hottest "
+             "functions (implies --profile)",
+    )
+    parser.add_argument(
+        '--profile-top', type=int, default=20, metavar='N',
+        help="hottest functions printed with --cprofile (default: 20)",
+    )
+    parser.add_argument(
+        '--no-tracemalloc', action='store_true',
+        help="profile timings only (tracemalloc slows allocation-heavy phases down)",
+    )
+
+
+def _add_cache_arguments(parser):
+    parser.add_argument(
+        '--no-cache', action='store_true',
+        help="do not read or write the extraction cache",
+    )
+    parser.add_argument(
+        '--rebuild-cache', action='store_true',
+        help="ignore cached results and re-extract (the cache is refreshed)",
+    )
+    parser.add_argument(
+        '--cache-dir', default=DEFAULT_CACHE_DIR,
+        help=f"extraction cache directory (default: {DEFAULT_CACHE_DIR})",
+    )
+    parser.add_argument(
+        '--cache-size', type=int, default=DEFAULT_CACHE_MB, metavar='MB',
+        help=f"evict least recently used cache entries beyond this size (default: {DEFAULT_CACHE_MB})",
+    )
+
+
+def _add_index_arguments(parser):
+    parser.add_argument(
+        '--index', default=DEFAULT_INDEX_PATH, metavar='PATH',
+        help=f"inverted placeholder index updated with the results (default: {DEFAULT_INDEX_PATH})",
+    )
+    parser.add_argument('--no-index', action='store_true', help="do not update the index")
+
+
+def _open_index(args):
+    """``PlaceholderIndex`` the extract commands record into. None with
+    --no-index, and for body-only scans, which would leave out header fields"""
+    if args.no_index or args.body_only or args.engine != 'stream':
+        return None
+    from template_tools.inverted import PlaceholderIndex
+
+    return PlaceholderIndex(args.index)
+
+
+def _save_index(index):
+    if index is None:
+        return
+    try:
+        index.save()
+    except OSError as e:
+        print(f"⚠️  Could not write placeholder index: {e}")
+
+
+def cache_options_from_args(args):
+    """Picklable ExtractionCache options from CLI arguments"""
+    if args.no_cache:
+        return None
+    return {
+        'cache_dir': args.cache_dir,
+        'max_bytes': args.cache_size * 1024 * 1024,
+        'rebuild': args.rebuild_cache,
+    }
+
+
+def _check_extract_args(parser, args):
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.no_cache and args.rebuild_cache:
+        parser.error("--no-cache and --rebuild-cache are mutually exclusive")
+    if args.interval <= 0 or args.debounce < 0:
+        parser.error("--interval must be positive and --debounce not negative")
+
+
+# ---------------------------------------------------------------- parser
+
+def build_parser(prog=None):
+    """Argument parser with one subparser per command"""
+    parser = argparse.ArgumentParser(
+        prog=prog or 'python -m template_tools',
+        description="DOCX template tooling: placeholder extraction, docs and rendering",
+    )
+    commands = parser.add_subparsers(dest='command', metavar='command')
+    commands.required = True
+
+    extract = commands.add_parser(
+        'extract', help="placeholders, locations and docs of templates",
+        formatter_class=argparse.RawDescriptionHelpFormatter, epilog=EXTRACT_EXAMPLES,
+    )
+    _add_extract_arguments(extract)
+    extract.set_defaults(handler='cli_extract:cmd_extract')
+
+    batch = commands.add_parser('batch', help="extract many templates over a process pool")
+    _add_extract_arguments(batch)
+    batch.set_defaults(handler='cli_extract:cmd_batch')
+
+    docs = commands.add_parser('docs', help="write *_PLACEHOLDERS.md files only")
+    _add_extract_arguments(docs)
+    docs.set_defaults(handler='cli_extract:cmd_batch')
+
+    listing = commands.add_parser('list', help="placeholder names of templates")
+    _add_paths(listing)
+    listing.add_argument('--plain', action='store_true', help="one {name} per line, no numbers")
+    listing.add_argument('--typescript', action='store_true',
+                         help="also print TypeScript interface fields")
+    listing.set_defaults(handler='cli_templates:cmd_list')
+
+    dump = commands.add_parser('dump', help="delimiter styles, text or layout of a template")
+    dump.add_argument('path', metavar='docx_path', help="template .docx")
+    dump.add_argument('--text', type=int, default=0, metavar='N',
+                      help="print the first N characters of the document text")
+    dump.add_argument('--structure', action='store_true',
+                      help="print every non-empty paragraph, table cell and text box")
+    dump.set_defaults(handler='cli_templates:cmd_dump')
+
+    schema = commands.add_parser('schema', help="nested fields, loops and conditions of templates")
+    _add_paths(schema)
+    schema.add_argument('--json-schema', action='store_true',
+                        help="print a JSON Schema (draft 2020-12) instead of the tree")
+    schema.add_argument('--output-dir', default=None,
+                        help="write <template>.schema.json files into this directory")
+    schema.add_argument('--validate', metavar='RECORDS', default=None,
+                        help="check the records of a .jsonl/.csv file against one template")
+    schema.set_defaults(handler='cli_templates:cmd_schema')
+
+    compile_ = commands.add_parser('compile', help="precompile templates / render a record")
+    _add_paths(compile_)
+    compile_.add_argument('--output-dir', default=DEFAULT_COMPILED_DIR,
+                          help=f"where compiled artifacts are written (default: {DEFAULT_COMPILED_DIR})")
+    compile_.add_argument('--render', metavar='DATA_JSON', default=None,
+                          help="render one record (JSON object) with a single template")
+    compile_.add_argument('--out', default=None, help="output .docx for --render")
+    compile_.set_defaults(handler='cli_compile:cmd_compile')
+
+    preview = commands.add_parser('preview', help="HTML previews from cached template skeletons")
+    _add_paths(preview)
+    preview.add_argument('--record', metavar='DATA_JSON', default=None,
+                         help="record (JSON object) to fill in (default: every slot shows its tag)")
+    preview.add_argument('--output-dir', default=DEFAULT_PREVIEW_DIR,
+                         help=f"where <template>.html pages are written (default: {DEFAULT_PREVIEW_DIR})")
+    preview.add_argument('--cache-dir', default=DEFAULT_PREVIEW_DIR,
+                         help=f"skeleton cache (default: {DEFAULT_PREVIEW_DIR})")
+    preview.add_argument('--no-cache', action='store_true', help="rebuild the skeletons, keep none")
+    preview.add_argument('--repeat', type=int, default=1000, metavar='N',
+                         help="renders timed per template (default: 1000)")
+    preview.set_defaults(handler='cli_templates:cmd_preview')
+
+    normalise = commands.add_parser(
+        'normalise', help="strip rsid/proofErr noise, merge runs, join split tags",
+    )
+    _add_paths(normalise)
+    written = normalise.add_mutually_exclusive_group()
+    written.add_argument('--output-dir', default=None,
+                         help="write the normalised templates into this directory")
+    written.add_argument('--in-place', action='store_true',
+                         help="replace the templates themselves (once verified)")
+    normalise.add_argument('-v', '--verbose', action='store_true', help="sizes of every changed part")
+    normalise.add_argument('--max-errors', type=int, default=10, metavar='N',
+                           help="verification problems printed per template (default: 10)")
+    normalise.set_defaults(handler='cli_templates:cmd_normalise')
+
+    slim = commands.add_parser(
+        'slim', help="drop unreferenced parts, deduplicate and recompress media",
+    )
+    _add_paths(slim)
+    written = slim.add_mutually_exclusive_group()
+    written.add_argument('--output-dir', default=None,
+                         help="write the slimmed templates into this directory")
+    written.add_argument('--in-place', action='store_true',
+                         help="replace the templates themselves (once verified)")
+    slim.add_argument('--list', action='store_true',
+                      help="list every zip member with its sizes and whether it is referenced")
+    slim.add_argument('--max-errors', type=int, default=10, metavar='N',
+                      help="verification problems printed per template (default: 10)")
+    slim.set_defaults(handler='cli_templates:cmd_slim')
+
+    merge_ = commands.add_parser('merge', help="render a letter per JSONL/CSV record")
+    merge_.add_argument('template', help="template .docx")
+    merge_.add_argument('records', help="records, one JSON object per line (.jsonl) or a .csv")
+    output = merge_.add_mutually_exclusive_group(required=True)
+    output.add_argument('--out-dir', help="write the letters into this directory")
+    output.add_argument('--zip', help="write the letters into one .zip")
+    merge_.add_argument('--format', choices=('jsonl', 'csv'), default=None,
+                        help="record format (default: from the file extension)")
+    merge_.add_argument('--workers', type=int, default=None,
+                        help="render processes (default: CPU count)")
+    merge_.add_argument('--prefix', default=None,
+                        help="letter name prefix (default: template name, e.g. F106 for F-106.docx)")
+    merge_.add_argument('--id-field', default=None,
+                        help="record field used in letter names (default: nik, then nik_pemohon)")
+    merge_.add_argument('--allow-missing', action='store_true',
+                        help="render records lacking placeholders (as '') instead of skipping them")
+    merge_.add_argument('--max-errors', type=int, default=20, metavar='N',
+                        help="invalid records reported one by one (default: 20)")
+    merge_.add_argument('--compiled-dir', default=DEFAULT_COMPILED_DIR,
+                        help=f"compiled template artifacts (default: {DEFAULT_COMPILED_DIR})")
+    merge_.set_defaults(handler='cli_compile:cmd_merge')
+
+    routes = commands.add_parser('routes', help="check route templateData keys against templates")
+    routes.add_argument('paths', nargs='*', default=[DEFAULT_ROUTES_DIR], metavar='route',
+                        help=f"route files or directories (default: {DEFAULT_ROUTES_DIR})")
+    routes.add_argument('--template-dir', default=DEFAULT_TEMPLATE_DIR,
+                        help=f"where the routes' templates live (default: {DEFAULT_TEMPLATE_DIR})")
+    routes.add_argument('--json', action='store_true', help="print the reports as JSON")
+    _add_cache_arguments(routes)
+    routes.set_defaults(handler='cli_routes:cmd_routes')
+
+    recover = commands.add_parser('recover', help="placeholder values of generated letters as JSONL")
+    recover.add_argument('paths', nargs='+', metavar='letter',
+                         help="generated .docx letters or directories of them")
+    recover.add_argument('--template', default=None,
+                         help="template of every letter (default: matched by name prefix, "
+                              "F106_... -> F-106.docx in --template-dir)")
+    recover.add_argument('--template-dir', default=DEFAULT_TEMPLATE_DIR,
+                         help=f"templates to match letters against (default: {DEFAULT_TEMPLATE_DIR})")
+    recover.add_argument('-o', '--output', default=None,
+                         help="write the JSON lines to this file (default: stdout)")
+    recover.add_argument('--workers', type=int, default=None,
+                         help="processes (default: CPU count)")
+    recover.add_argument('--max-errors', type=int, default=20, metavar='N',
+                         help="unrecovered letters reported one by one (default: 20)")
+    recover.add_argument('--compiled-dir', default=DEFAULT_COMPILED_DIR,
+                         help=f"compiled template artifacts (default: {DEFAULT_COMPILED_DIR})")
+    recover.set_defaults(handler='cli_letters:cmd_recover')
+
+    audit = commands.add_parser('audit', help="leftover tags, empty fields and broken XML in letters")
+    audit.add_argument('paths', nargs='*', default=[DEFAULT_ARCHIVE_DIR], metavar='letter',
+                       help=f"letters or directories of them (default: {DEFAULT_ARCHIVE_DIR})")
+    audit.add_argument('--template', default=None,
+                       help="template of every letter (default: matched by name prefix)")
+    audit.add_argument('--template-dir', default=DEFAULT_TEMPLATE_DIR,
+                       help=f"templates for the empty-field check (default: {DEFAULT_TEMPLATE_DIR})")
+    audit.add_argument('--optional', default='', metavar='NAMES',
+                       help="comma-separated placeholders allowed to be empty")
+    audit.add_argument('--no-fields', action='store_true',
+                       help="skip the empty-field check (no templates needed)")
+    audit.add_argument('--state', default=DEFAULT_AUDIT_STATE,
+                       help=f"incremental state file (default: {DEFAULT_AUDIT_STATE})")
+    audit.add_argument('--no-state', action='store_true', help="audit every letter, keep no state")
+    audit.add_argument('--rebuild-state', action='store_true',
+                       help="forget the state (e.g. after fixing a template) and audit everything")
+    audit.add_argument('--all', action='store_true',
+                       help="also report issues of letters audited in earlier runs")
+    audit.add_argument('--json', action='store_true', help="print the flagged letters as JSON")
+    audit.add_argument('--workers', type=int, default=None,
+                       help="processes (default: CPU count)")
+    audit.add_argument('--compiled-dir', default=DEFAULT_COMPILED_DIR,
+                       help=f"compiled template artifacts (default: {DEFAULT_COMPILED_DIR})")
+    audit.set_defaults(handler='cli_letters:cmd_audit')
+
+    index = commands.add_parser('index', help="update the inverted placeholder index")
+    _add_paths(index)
+    index.add_argument('--index', default=DEFAULT_INDEX_PATH, metavar='PATH',
+                       help=f"index file (default: {DEFAULT_INDEX_PATH})")
+    index.add_argument('--rebuild', action='store_true',
+                       help="re-extract every template, even unchanged ones")
+    _add_cache_arguments(index)
+    index.set_defaults(handler='cli_index:cmd_index')
+
+    find = commands.add_parser(
+        'find', help="templates using a placeholder (exact, prefix, glob or fuzzy)",
+    )
+    find.add_argument('queries', nargs='+', metavar='query',
+                      help="placeholder name; a query with *?[ is a glob, e.g. '*_pejabat'")
+    mode = find.add_mutually_exclusive_group()
+    mode.add_argument('--prefix', action='store_true', help="names starting with the query")
+    mode.add_argument('--fuzzy', action='store_true',
+                      help="closest names (typos, renamed fields)")
+    find.add_argument('--locations', action='store_true',
+                      help="list every location instead of a count")
+    find.add_argument('--json', action='store_true', help="print the hits as JSON")
+    find.add_argument('--index', default=DEFAULT_INDEX_PATH, metavar='PATH',
+                      help=f"index file (default: {DEFAULT_INDEX_PATH})")
+    find.set_defaults(handler='cli_index:cmd_find')
+
+    search_index = commands.add_parser('search-index',
+                                       help="index the text of generated letters for search")
+    search_index.add_argument('paths', nargs='*', default=[DEFAULT_ARCHIVE_DIR], metavar='letter',
+                              help=f"letters or directories of them, e.g. also a local copy of the "
+                                   f"Supabase bucket (default: {DEFAULT_ARCHIVE_DIR})")
+    search_index.add_argument('--db', default=DEFAULT_SEARCH_DB,
+                              help=f"SQLite database (default: {DEFAULT_SEARCH_DB})")
+    search_index.add_argument('--rebuild', action='store_true',
+                              help="drop the index and read every letter again")
+    search_index.add_argument('--workers', type=int, default=None,
+                              help="processes (default: CPU count)")
+    search_index.set_defaults(handler='cli_letters:cmd_search_index')
+
+    search = commands.add_parser('search', help="full-text search over the indexed letters")
+    search.add_argument('query', nargs='+',
+                        help="words that must all occur (name, NIK, ...); word* matches a prefix")
+    search.add_argument('--db', default=DEFAULT_SEARCH_DB,
+                        help=f"SQLite database (default: {DEFAULT_SEARCH_DB})")
+    search.add_argument('--limit', type=int, default=20, metavar='N',
+                        help="hits shown (default: 20)")
+    search.add_argument('--raw', action='store_true',
+                        help="pass the query to FTS5 as is (OR, NEAR, \"phrases\", name:...)")
+    search.add_argument('--json', action='store_true', help="print the hits as JSON")
+    search.set_defaults(handler='cli_letters:cmd_search')
+
+    convert = commands.add_parser(
+        'convert-server', help="local DOCX→PDF server (ConvertAPI stand-in) over LibreOffice",
+    )
+    convert.add_argument('--host', default=DEFAULT_CONVERT_HOST,
+                         help=f"address to listen on (default: {DEFAULT_CONVERT_HOST})")
+    convert.add_argument('--port', type=int, default=DEFAULT_CONVERT_PORT,
+                         help=f"port (default: {DEFAULT_CONVERT_PORT})")
+    convert.add_argument('--workers', type=int, default=DEFAULT_CONVERT_WORKERS,
+                         help=f"LibreOffice instances (default: {DEFAULT_CONVERT_WORKERS})")
+    convert.add_argument('--max-jobs', type=int, default=DEFAULT_CONVERT_MAX_JOBS, metavar='N',
+                         help=f"restart a worker after N jobs, 0: never (default: {DEFAULT_CONVERT_MAX_JOBS})")
+    convert.add_argument('--timeout', type=float, default=DEFAULT_CONVERT_TIMEOUT, metavar='SECONDS',
+                         help=f"kill and restart a worker stuck on one job (default: {DEFAULT_CONVERT_TIMEOUT:g})")
+    convert.add_argument('--mode', choices=('uno', 'cli'), default=None,
+                         help="uno: one running soffice per worker, kept warm (needs the uno "
+                              "module); cli: a fresh soffice --convert-to process per job, only "
+                              "the profile is reused (default: uno when available)")
+    convert.add_argument('--soffice', default=None,
+                         help="LibreOffice binary (default: $SOFFICE, soffice or libreoffice on PATH)")
+    convert.add_argument('--work-dir', default=None,
+                         help="worker profiles and scratch files; kept between runs so profiles "
+                              "stay initialised (default: a temporary directory)")
+    convert.add_argument('-v', '--verbose', action='store_true', help="log every request")
+    convert.set_defaults(handler='cli_convert:cmd_convert_server')
+
+    return parser, {
+        'extract': extract, 'batch': batch, 'docs': docs, 'compile': compile_,
+        'merge': merge_, 'routes': routes, 'recover': recover, 'audit': audit, 'schema': schema,
+        'normalise': normalise, 'slim': slim, 'preview': preview, 'index': index, 'convert-server': convert,
+        'search-index': search_index,
+    }
+
+
+def main(argv=None, prog=None):
+    """Main function"""
+    parser, subparsers = build_parser(prog)
+    args = parser.parse_args(argv)
+    if args.command in ('extract', 'batch', 'docs'):
+        _check_extract_args(subparsers[args.command], args)
+    if args.command in ('merge', 'recover', 'audit', 'convert-server', 'search-index') \
+            and args.workers is not None and args.workers < 1:
+        subparsers[args.command].error("--workers must be at least 1")
+    if args.command in ('routes', 'index') and args.no_cache and args.rebuild_cache:
+        subparsers[args.command].error("--no-cache and --rebuild-cache are mutually exclusive")
+    if args.command == 'audit' and args.no_state and args.rebuild_state:
+        subparsers['audit'].error("--no-state and --rebuild-state are mutually exclusive")
+    if args.command == 'preview' and args.repeat < 1:
+        subparsers['preview'].error("--repeat must be at least 1")
+    if args.command == 'convert-server' and (args.timeout <= 0 or args.max_jobs < 0):
+        subparsers[args.command].error("--timeout must be positive and --max-jobs not negative")
+    if args.command == 'compile' and args.render and not args.out:
+        subparsers['compile'].error("--render needs --out")
+    module, _, handler = args.handler.partition(':')
+    getattr(importlib.import_module(f'template_tools.{module}'), handler)(args)
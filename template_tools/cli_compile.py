@@ -0,0 +1,150 @@
+"""
+Command line: compile and merge
+===============================
+
+Compiled artifacts are JSON files named after the template in
+``--output-dir``. ``load_or_compile`` reuses one while it is newer than
+its .docx; ``merge``, ``recover`` and ``audit`` all load templates that way.
+"""
+
+import os
+import sys
+
+from template_tools.cli import _fail, _templates
+from template_tools.defaults import DEFAULT_COMPILED_DIR
+
+
+# ---------------------------------------------------------------- compile
+
+def _artifact_path(docx_path, output_dir):
+    from pathlib import Path
+
+    return os.path.join(output_dir, Path(docx_path).stem + '.json')
+
+
+def _check_against_extractor(compiled, docx_path):
+    """Names found by PlaceholderExtractor but not compiled, and the reverse"""
+    from template_tools.extractor import ExtractionError, PlaceholderExtractor
+    from template_tools.text_index import TAG_PREFIXES
+
+    extractor = PlaceholderExtractor(docx_path, cache=None)
+    try:
+        extractor.extract()
+    except ExtractionError:
+        return None
+    # '/' is a name character for the extractor, so {/list} shows up as a name
+    extracted = {name for name in extractor.index.names if name[:1] not in TAG_PREFIXES}
+    compiled_names = set(compiled.slot_names())
+    return sorted(extracted - compiled_names), sorted(compiled_names - extracted)
+
+
+def _compile_one(docx_path, output_dir):
+    """Compile a template, save its artifact and report; True on success"""
+    import zipfile
+
+    from template_tools.compiler import TemplateSyntaxError, compile_template
+
+    try:
+        compiled = compile_template(docx_path)
+    except (TemplateSyntaxError, OSError, zipfile.BadZipFile, KeyError) as e:
+        print(f"❌ {docx_path}: {e}")
+        return False
+
+    path = _artifact_path(docx_path, output_dir)
+    compiled.save(path)
+    print(f"✅ {docx_path} -> {path} ({len(compiled.placeholder_names())} tags)")
+
+    check = _check_against_extractor(compiled, docx_path)
+    if check is None:
+        print(f"   ⚠️  PlaceholderExtractor could not read {docx_path}")
+        return True
+    missing, extra = check
+    if missing:
+        print(f"   ⚠️  Not compiled as slots: {', '.join(missing)}")
+    if extra:
+        print(f"   ⚠️  Not reported by the extractor: {', '.join(extra)}")
+    return True
+
+
+def load_or_compile(docx_path, output_dir=DEFAULT_COMPILED_DIR):
+    """Compiled template from its artifact when it is newer than the .docx"""
+    from template_tools.compiler import CompiledTemplate, compile_template
+
+    path = _artifact_path(docx_path, output_dir)
+    if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(docx_path):
+        try:
+            return CompiledTemplate.load(path)
+        except (ValueError, KeyError):
+            pass  # stale layout: recompile
+    compiled = compile_template(docx_path)
+    os.makedirs(output_dir, exist_ok=True)
+    compiled.save(path)
+    return compiled
+
+
+def cmd_compile(args):
+    """Compile templates, or render one record with --render"""
+    templates = _templates(args.paths)
+
+    if args.render:
+        import json
+        import time
+
+        if len(templates) != 1:
+            _fail("--render takes exactly one template")
+        with open(args.render, 'r', encoding='utf-8') as f:
+            record = json.load(f)
+        compiled = load_or_compile(templates[0], args.output_dir)
+        start = time.perf_counter()
+        compiled.render_docx(record, args.out)
+        print(f"✅ {args.out} written in {(time.perf_counter() - start) * 1000:.1f} ms")
+        return
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    failed = [path for path in templates if not _compile_one(path, args.output_dir)]
+    print(f"\n📦 {len(templates) - len(failed)}/{len(templates)} templates compiled")
+    if failed:
+        sys.exit(1)
+
+
+# ---------------------------------------------------------------- merge
+
+def cmd_merge(args):
+    """Mail merge: a letter per record, into a directory or one zip"""
+    import time
+
+    from template_tools.merge import format_rate, merge, read_records
+
+    if not os.path.exists(args.records):
+        _fail(f"File not found: {args.records}")
+    compiled = load_or_compile(args.template, args.compiled_dir)
+    target = args.zip or args.out_dir
+    print(f"📨 Merging {args.records} into {os.path.basename(args.template)} → {target}")
+
+    shown = []
+
+    def on_invalid(number, message):
+        if len(shown) < args.max_errors:
+            print(f"⚠️  record {number}: {message}", file=sys.stderr)
+        shown.append(number)
+
+    last = [time.perf_counter()]
+
+    def on_progress(stats):
+        now = time.perf_counter()
+        if now - last[0] >= 1.0:
+            last[0] = now
+            print(f"   … {format_rate(stats)}", file=sys.stderr)
+
+    stats = merge(
+        compiled, read_records(args.records, args.format),
+        out_dir=args.out_dir, zip_path=args.zip, workers=args.workers or os.cpu_count() or 1,
+        prefix=args.prefix, id_field=args.id_field, allow_missing=args.allow_missing,
+        on_invalid=on_invalid, on_progress=on_progress,
+    )
+    if len(shown) > args.max_errors:
+        print(f"⚠️  … {len(shown) - args.max_errors} more invalid records", file=sys.stderr)
+    print(f"✅ {format_rate(stats)}")
+    if stats.skipped:
+        print(f"❌ {stats.skipped} records skipped")
+        sys.exit(1)
@@ -0,0 +1,40 @@
+"""
+Command line: convert-server
+============================
+
+Starts the ConvertAPI stand-in over a pool of LibreOffice workers and
+serves until Ctrl-C.
+"""
+
+from template_tools.cli import _fail
+
+
+def cmd_convert_server(args):
+    """Serve DOCX→PDF conversion from a pool of warm LibreOffice workers"""
+    from template_tools.convert import ConversionError, ConversionPool, serve
+
+    try:
+        pool = ConversionPool(args.workers, args.max_jobs, args.timeout, args.mode, args.soffice,
+                              args.work_dir)
+        print(f"🖨️  Starting {args.workers} LibreOffice worker(s) ({pool.mode} mode)...")
+        if pool.mode == 'cli':
+            print("⚠️  cli mode starts a fresh soffice per job; install LibreOffice's Python "
+                  "uno bridge for warm workers")
+        pool.start()
+    except ConversionError as e:
+        _fail(str(e))
+
+    def on_ready(server):
+        host, port = server.server_address[:2]
+        print(f"✅ Listening on http://{host}:{port}/ (stats: /stats, Ctrl-C to stop)")
+        print(f"   new ConvertAPI(secret, {{ baseUri: 'http://{host}:{port}/' }})")
+
+    try:
+        serve(pool, args.host, args.port, args.verbose, on_ready)
+    finally:
+        stats = pool.stats()
+        pool.close()
+        latency = stats['latency']
+        print(f"\nStopped: {stats['done']} converted, {stats['failed']} failed "
+              f"({stats['timeouts']} timed out), {stats['recycled']} worker restarts"
+              + (f", p50 {latency['p50_ms']} ms" if latency['count'] else ''))
@@ -0,0 +1,242 @@
+"""
+Command line: extract, batch and docs
+=====================================
+
+``extract`` reports on one template and writes its documentation; several
+paths, a directory or a glob hand over to ``cmd_batch``, which spreads the
+templates over a process pool and writes the JSON summary. ``--watch``
+keeps re-extracting saved templates and ``--profile`` prints the phase
+table of either mode.
+"""
+
+import os
+import sys
+
+from template_tools.cli import _fail, _templates, _open_index, _save_index, cache_options_from_args
+from template_tools.defaults import SUMMARY_FILENAME
+
+
+def _profile_options(args):
+    """``Profiler`` keyword arguments, None when not profiling"""
+    if not (args.profile or args.profile_json or args.cprofile):
+        return None
+    return {'memory': not args.no_tracemalloc, 'cprofile': bool(args.cprofile)}
+
+
+def _report_profile(args, profiles, function_stats, elapsed):
+    """Print the phase table (and hotspots); write the JSON / cProfile dump
+
+    Args:
+        profiles: template name -> ``Profiler.to_dict()``
+        function_stats: cProfile stats of every run (may be empty)
+        elapsed: wall-clock seconds of the whole run
+    """
+    import json
+    from datetime import datetime
+
+    from template_tools.profiling import combined_stats, format_profile, hotspots, merge_profiles
+
+    total = merge_profiles(profiles.values())
+    title = "Profile" if len(profiles) == 1 else f"Profile of {len(profiles)} templates"
+    print("\n" + format_profile(total, title))
+    if total['wall_seconds'] > elapsed * 1.05:
+        print(f"  (times add up over the workers; the run took {elapsed:.3f} s)")
+
+    if args.profile_json:
+        os.makedirs(os.path.dirname(args.profile_json) or '.', exist_ok=True)
+        with open(args.profile_json, 'w', encoding='utf-8') as f:
+            json.dump({
+                'generated': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                'engine': args.engine,
+                'elapsed_seconds': elapsed,
+                'total': total,
+                'templates': profiles,
+            }, f, indent=2, ensure_ascii=False)
+            f.write('\n')
+        print(f"📄 Profile saved to: {args.profile_json}")
+
+    if args.cprofile and function_stats:
+        stats = combined_stats(function_stats)
+        os.makedirs(os.path.dirname(args.cprofile) or '.', exist_ok=True)
+        stats.dump_stats(args.cprofile)
+        print(f"\n🔥 Hottest functions (cProfile dump: {args.cprofile})")
+        print(hotspots(stats, args.profile_top))
+
+
+def cmd_extract(args):
+    """Single template: console report + documentation; otherwise batch"""
+    from template_tools.paths import is_pattern
+
+    if len(args.paths) > 1 or is_pattern(args.paths[0]):
+        return cmd_batch(args)
+
+    from template_tools.extractor import (
+        ExtractionError,
+        PlaceholderExtractor,
+        format_cache_stats,
+        make_cache,
+    )
+
+    docx_path = args.paths[0]
+
+    # Validate file exists
+    if not os.path.exists(docx_path):
+        _fail(f"File not found: {docx_path}")
+
+    # Validate file extension
+    if not docx_path.lower().endswith('.docx'):
+        _fail(f"File must be a .docx file: {docx_path}")
+
+    profile_options = _profile_options(args)
+    profiler = None
+    if profile_options is not None:
+        from template_tools.profiling import Profiler
+        profiler = Profiler(**profile_options).start()
+
+    # Extract placeholders
+    cache = make_cache(cache_options_from_args(args))
+    extractor = PlaceholderExtractor(
+        docx_path, engine=args.engine, cache=cache, all_parts=not args.body_only,
+        profiler=profiler,
+    )
+
+    try:
+        extractor.extract()
+    except ExtractionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(extractor.report())
+
+    index = _open_index(args)
+    if index is not None:
+        from template_tools.inverted import content_hash
+
+        labels = extractor.index.labels()
+        index.record(docx_path, content_hash(docx_path),
+                     {name: labels[name] for name in extractor.get_sorted_placeholders()})
+        _save_index(index)
+
+    # Print to console
+    print()
+    sys.stdout.writelines(extractor.iter_console_output())
+    print()
+
+    # Save documentation
+    try:
+        filepath = extractor.save_documentation(args.output_dir, args.doc_format)
+        if extractor.documentation_changed:
+            print(f"✅ Documentation saved to: {filepath}")
+        else:
+            print(f"✅ Documentation unchanged: {filepath}")
+        print("📄 Open the file to see detailed mapping and usage examples")
+    except Exception as e:
+        _fail(f"saving documentation: {e}")
+
+    if cache is not None:
+        print(format_cache_stats(cache.hits, cache.misses))
+    if profiler is not None:
+        profiler.stop()
+        stats = profiler.function_stats()
+        _report_profile(args, {extractor.template_name: profiler.to_dict()},
+                        [stats] if stats else [], profiler.wall_seconds)
+    if args.watch:
+        watch_templates(args)
+
+
+def _print_results(results):
+    for result in results:
+        if result['ok']:
+            unchanged = '' if result['documentation_changed'] else ' (unchanged)'
+            print(f"✅ {result['template']}: {result['total']} placeholders → "
+                  f"{result['documentation']}{unchanged}")
+        else:
+            print(f"❌ {result['template']}: {result['error']}")
+
+
+def cmd_batch(args):
+    """Batch mode: extract every template matched by the given paths"""
+    import time
+
+    from template_tools.extractor import format_cache_stats, run_batch, save_summary
+
+    docx_paths = _templates(args.paths)
+
+    print(f"🔍 Extracting {len(docx_paths)} templates ({args.engine} engine)...\n")
+    cache_options = cache_options_from_args(args)
+    profile_options = _profile_options(args)
+    started = time.perf_counter()
+    results = run_batch(
+        docx_paths, args.engine, args.output_dir, args.workers, cache_options, not args.body_only,
+        profile_options, args.doc_format,
+    )
+    elapsed = time.perf_counter() - started
+    # Kept out of the summary: raw cProfile stats are not JSON
+    profiles = {r['template']: r.pop('profile') for r in results if 'profile' in r}
+    function_stats = [s for s in (r.pop('function_stats', None) for r in results) if s]
+
+    _print_results(results)
+    index = _open_index(args)
+    if index is not None:
+        index.record_results(results)
+        _save_index(index)
+
+    failed = sum(1 for r in results if not r['ok'])
+    # `docs` only writes markdown unless a summary is asked for
+    if args.command != 'docs' or args.summary:
+        summary_path = args.summary or os.path.join(args.output_dir, SUMMARY_FILENAME)
+        save_summary(results, summary_path, args.engine)
+        print(f"\n📄 Summary saved to: {summary_path}")
+    print(f"Done: {len(results) - failed} succeeded, {failed} failed")
+    if cache_options is not None:
+        print(format_cache_stats(
+            sum(1 for r in results if r['cache'] == 'hit'),
+            sum(1 for r in results if r['cache'] == 'miss'),
+        ))
+    if profile_options is not None:
+        _report_profile(args, profiles, function_stats, elapsed)
+    if args.watch:
+        watch_templates(args)
+    elif failed:
+        sys.exit(1)
+
+
+def watch_templates(args):
+    """Re-extract templates as they are saved, until Ctrl-C.
+
+    Only templates whose files changed are extracted again, and a markdown
+    file is only rewritten when its content (not just the timestamp)
+    differs. The batch summary is left as the initial run wrote it.
+    """
+    import time
+
+    from template_tools.extractor import run_batch
+    from template_tools.watch import watch
+
+    cache_options = cache_options_from_args(args)
+    if cache_options is not None:
+        # --rebuild-cache applies to the initial run; changed bytes miss anyway
+        cache_options['rebuild'] = False
+
+    def on_change(paths):
+        print(f"\n[{time.strftime('%H:%M:%S')}] {len(paths)} template(s) changed")
+        results = run_batch(
+            paths, args.engine, args.output_dir, args.workers, cache_options, not args.body_only,
+            doc_format=args.doc_format,
+        )
+        _print_results(results)
+        index = _open_index(args)
+        if index is not None:
+            index.record_results(results)
+            _save_index(index)
+
+    def on_remove(paths):
+        index = _open_index(args)
+        for path in paths:
+            print(f"\n[{time.strftime('%H:%M:%S')}] 🗑️  {path} removed (documentation kept)")
+            if index is not None:
+                index.forget(path)
+        _save_index(index)
+
+    print(f"\n👀 Watching {', '.join(args.paths)} every {args.interval:g}s (Ctrl-C to stop)")
+    watch(args.paths, on_change, args.interval, args.debounce, on_remove)
+    print("\nStopped watching")
@@ -0,0 +1,88 @@
+"""
+Command line: index and find
+============================
+
+``index`` re-extracts the templates whose content changed and records them
+in the inverted placeholder index; ``find`` answers from that file alone.
+"""
+
+import sys
+
+from template_tools.cli import _fail, _templates, _save_index, cache_options_from_args
+from template_tools.defaults import DEFAULT_TEMPLATE_DIR
+
+
+def cmd_index(args):
+    """Bring the inverted placeholder index up to date"""
+    import time
+
+    from template_tools.extractor import format_cache_stats, make_cache
+    from template_tools.inverted import PlaceholderIndex
+
+    templates = _templates(args.paths)
+    index = PlaceholderIndex(args.index, rebuild=args.rebuild)
+    cache = make_cache(cache_options_from_args(args))
+    started = time.perf_counter()
+    updated, unchanged, failed = index.update(templates, cache)
+    gone = index.forget_missing()
+    _save_index(index)
+    elapsed = time.perf_counter() - started
+
+    for path in updated:
+        print(f"🔄 {path}: {len(index.placeholders(path))} placeholders")
+    for path in gone:
+        print(f"🗑️  {path}: removed")
+    for path, message in failed:
+        print(f"❌ {path}: {message}")
+    print(f"\n📇 {len(index)} templates, {len(index.names)} placeholder names in {args.index}")
+    print(f"   {len(updated)} updated, {len(unchanged)} unchanged ({elapsed:.2f} s)")
+    if cache is not None and updated:
+        print(format_cache_stats(cache.hits, cache.misses))
+    if failed:
+        sys.exit(1)
+
+
+def cmd_find(args):
+    """Templates using placeholders, from the index only"""
+    import json
+    import time
+
+    from template_tools.inverted import PlaceholderIndex, query_mode
+
+    started = time.perf_counter()
+    index = PlaceholderIndex(args.index)
+    if not len(index):
+        _fail(f"No placeholder index at {args.index} "
+              f"(run: python -m template_tools index {DEFAULT_TEMPLATE_DIR})")
+    found = {query: index.lookup(query, query_mode(query, args.prefix, args.fuzzy))
+             for query in args.queries}
+    elapsed = time.perf_counter() - started
+
+    if args.json:
+        print(json.dumps({
+            query: [{'placeholder': hit.name, 'template': hit.template, 'locations': hit.locations}
+                    for hit in hits]
+            for query, hits in found.items()
+        }, indent=2, ensure_ascii=False))
+    else:
+        for query, hits in found.items():
+            if not hits:
+                print(f"❓ {query}: not used by any indexed template")
+                continue
+            names = list(dict.fromkeys(hit.name for hit in hits))
+            templates = {hit.template for hit in hits}
+            print(f"🔎 {query}: {len(names)} placeholder(s) in {len(templates)} template(s)")
+            for name in names:
+                print(f"   {{{name}}}")
+                for hit in hits:
+                    if hit.name != name:
+                        continue
+                    if args.locations:
+                        print(f"      {hit.template}")
+                        for label in hit.locations:
+                            print(f"         {label}")
+                    else:
+                        print(f"      {hit.template} ({len(hit.locations)}x)")
+        print(f"\n({elapsed * 1000:.1f} ms, {len(index)} templates indexed)")
+    if not all(found.values()):
+        sys.exit(1)
@@ -0,0 +1,222 @@
+"""
+Command line: recover, audit, search-index and search
+=====================================================
+
+Commands over generated letters rather than templates. Letters are matched
+to their template by name prefix (F106_... -> F-106.docx) unless
+``--template`` names one for all of them.
+"""
+
+import os
+import sys
+
+from template_tools.cli import _fail, _templates
+from template_tools.cli_compile import load_or_compile
+
+
+# ---------------------------------------------------------------- recover
+
+def _recover_templates(args):
+    """Letter name prefix -> CompiledTemplate (``None``: every letter)"""
+    from template_tools.merge import default_prefix
+
+    if args.template:
+        return {None: load_or_compile(args.template, args.compiled_dir)}
+    return {default_prefix(path): load_or_compile(path, args.compiled_dir)
+            for path in _templates([args.template_dir])}
+
+
+def cmd_recover(args):
+    """Placeholder values of generated letters, one JSON line per letter"""
+    import json
+    import time
+
+    from template_tools.recover import TemplateSkeleton, iter_letters, letter_fields, recover_letters
+
+    missing = [path for path in args.paths if not os.path.exists(path)]
+    if missing:
+        _fail(f"Not found: {', '.join(missing)}")
+    templates = _recover_templates(args)
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    start = last = time.perf_counter()
+    done = failed = 0
+    used = set()
+    try:
+        for result in recover_letters(templates, iter_letters(args.paths),
+                                      workers=args.workers or os.cpu_count() or 1):
+            ident, timestamp = letter_fields(result.path)
+            out.write(json.dumps({
+                'file': result.path,
+                'template': result.template,
+                'id': ident,
+                'timestamp': timestamp,
+                'values': result.values,
+                'conflicts': result.conflicts,
+                'error': result.error,
+            }, ensure_ascii=False) + '\n')
+            done += 1
+            if result.error:
+                failed += 1
+                if failed <= args.max_errors:
+                    print(f"⚠️  {result.path}: {result.error}", file=sys.stderr)
+            else:
+                used.add(result.template)
+            now = time.perf_counter()
+            if now - last >= 1.0:
+                last = now
+                print(f"   … {done:,} letters ({done / (now - start):,.0f}/s)", file=sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    for compiled in templates.values():
+        name = os.path.basename(compiled.source)
+        if name in used:
+            ambiguous = TemplateSkeleton(compiled).ambiguous
+            if ambiguous:
+                print(f"ℹ️  {name}: only blanks separate {', '.join(ambiguous)}; "
+                      f"values holding spaces may be split wrongly", file=sys.stderr)
+    elapsed = time.perf_counter() - start
+    if failed > args.max_errors:
+        print(f"⚠️  … {failed - args.max_errors} more letters not recovered", file=sys.stderr)
+    print(f"✅ {done - failed:,}/{done:,} letters recovered in {elapsed:.1f} s", file=sys.stderr)
+    if failed:
+        sys.exit(1)
+
+
+# ---------------------------------------------------------------- audit
+
+ISSUE_ICONS = {'leftover_tag': '🏷️ ', 'empty_field': '⬜', 'unrecognised': '❓', 'malformed': '💥'}
+
+
+def _print_audit(result, known=False):
+    print(f"⚠️  {result.path}{' (known)' if known else ''}")
+    empty = [issue.detail for issue in result.issues if issue.kind == 'empty_field']
+    for issue in result.issues:
+        if issue.kind != 'empty_field':
+            where = f" in {issue.part}" if issue.part else ''
+            print(f"     {ISSUE_ICONS[issue.kind]} {issue.kind}{where}: {issue.detail}")
+    if empty:
+        print(f"     {ISSUE_ICONS['empty_field']} empty ({len(empty)}): {', '.join(empty)}")
+
+
+def cmd_audit(args):
+    """Leftover tags, empty fields and malformed XML in generated letters"""
+    import json
+    import time
+
+    from template_tools.audit import ISSUE_KINDS, AuditState, audit_letters
+
+    missing = [path for path in args.paths if not os.path.exists(path)]
+    if missing:
+        _fail(f"Not found: {', '.join(missing)}")
+    templates = {} if args.no_fields else _recover_templates(args)
+    state = AuditState(None if args.no_state else args.state)
+    if args.rebuild_state:
+        state.files = {}
+    optional = [name.strip() for name in args.optional.split(',') if name.strip()]
+    flagged = []
+    known = []
+
+    def on_result(result):
+        if result.issues:
+            flagged.append(result.path)
+            if not args.json:
+                _print_audit(result)
+
+    def on_known(result):
+        if result.issues and args.all:
+            known.append(result.path)
+            if not args.json:
+                _print_audit(result, known=True)
+
+    start = time.perf_counter()
+    try:
+        stats = audit_letters(args.paths, templates, state,
+                              workers=args.workers or os.cpu_count() or 1,
+                              optional=optional, on_result=on_result, on_known=on_known)
+    finally:
+        # Letters audited before an interruption are not audited again
+        state.save()
+    elapsed = time.perf_counter() - start
+
+    if args.json:
+        print(json.dumps([
+            {'file': path, 'issues': [dict(zip(('kind', 'part', 'detail'), issue))
+                                      for issue in state.files[path][2]]}
+            for path in flagged + known
+        ], indent=2, ensure_ascii=False))
+    else:
+        counts = ', '.join(f"{stats.by_kind[kind]} {kind}" for kind in ISSUE_KINDS)
+        print(f"\n🔎 {stats.audited:,} letters audited, {stats.unchanged:,} unchanged since the "
+              f"last run, {stats.removed:,} gone ({elapsed:.1f} s)")
+        print(f"   issues in the archive: {counts}")
+        print(f"{'❌' if flagged else '✅'} {len(flagged):,} newly audited letters with issues")
+    if flagged or known:
+        sys.exit(1)
+
+
+# ---------------------------------------------------------------- search
+
+def cmd_search_index(args):
+    """Index the text of generated letters for ``search``"""
+    import time
+
+    from template_tools.search import connect, counts, index_letters
+
+    missing = [path for path in args.paths if not os.path.exists(path)]
+    if missing:
+        _fail(f"Not found: {', '.join(missing)}")
+    if args.rebuild and os.path.exists(args.db):
+        os.remove(args.db)
+    try:
+        db = connect(args.db)
+    except RuntimeError as e:
+        _fail(str(e))
+
+    def on_result(result):
+        if result.error:
+            print(f"❌ {result.path}: {result.error}")
+
+    start = time.perf_counter()
+    try:
+        stats = index_letters(db, args.paths, workers=args.workers or os.cpu_count() or 1,
+                              on_result=on_result)
+        indexed, unreadable = counts(db)
+    finally:
+        db.close()
+    elapsed = time.perf_counter() - start
+    print(f"🗂️  {stats.indexed:,} letters indexed, {stats.unchanged:,} unchanged since the last "
+          f"run, {stats.removed:,} gone ({elapsed:.1f} s)")
+    print(f"   {args.db}: {indexed:,} letters searchable, {unreadable:,} unreadable")
+
+
+def cmd_search(args):
+    """Ranked full-text search over the indexed letters"""
+    import json
+    import time
+
+    from template_tools.search import connect, search
+
+    if not os.path.exists(args.db):
+        _fail(f"No search index at {args.db} (run: python -m template_tools search-index)")
+    query = ' '.join(args.query)
+    start = time.perf_counter()
+    db = connect(args.db)
+    try:
+        hits = search(db, query, args.limit, args.raw)
+    except ValueError as e:
+        _fail(str(e))
+    finally:
+        db.close()
+    elapsed = time.perf_counter() - start
+
+    if args.json:
+        print(json.dumps([hit._asdict() for hit in hits], indent=2, ensure_ascii=False))
+    else:
+        for number, hit in enumerate(hits, 1):
+            print(f"{number:2d}. {hit.path}")
+            print(f"    {hit.snippet}")
+        print(f"\n🔎 {len(hits)} hit(s) for {query!r} ({elapsed * 1000:.1f} ms)")
+    if not hits:
+        sys.exit(1)
@@ -0,0 +1,89 @@
+"""
+Command line: routes
+====================
+
+Reads the ``templateData`` bindings of the API routes and checks their keys
+against the placeholders of the template each route renders.
+"""
+
+import os
+import sys
+
+from template_tools.cli import cache_options_from_args
+
+
+def _route_placeholders(templates, template_dir, cache_options):
+    """``{template: names}`` for the templates the routes render, None if unreadable"""
+    from template_tools.extractor import ExtractionError, PlaceholderExtractor, make_cache
+
+    cache = make_cache(cache_options)
+    placeholders = {}
+    for template in templates:
+        extractor = PlaceholderExtractor(os.path.join(template_dir, template), cache=cache)
+        try:
+            extractor.extract()
+        except ExtractionError:
+            placeholders[template] = None
+        else:
+            placeholders[template] = extractor.get_sorted_placeholders()
+    return placeholders
+
+
+def _print_report(report):
+    binding = report.binding
+    target = f"{binding.route}:{binding.line} {binding.variable} → {', '.join(binding.templates)}"
+    if not (report.missing or report.extra or report.misspelled):
+        print(f"✅ {target} ({len(report.expected)} placeholders)")
+        return
+    print(f"⚠️  {target}")
+    for key, name in report.misspelled:
+        print(f"     ✏️  misspelled: {key} → {{{name}}}")
+    if report.missing:
+        print(f"     ❌ missing ({len(report.missing)}): {', '.join(report.missing)}")
+    if report.extra:
+        print(f"     ➕ not in template ({len(report.extra)}): {', '.join(report.extra)}")
+    if binding.spread:
+        print("     ℹ️  object spread: keys it adds are not known")
+
+
+def cmd_routes(args):
+    """templateData keys of each route vs. the placeholders of its template"""
+    import json
+    import time
+
+    from template_tools.routes import check_binding, find_routes, scan_route
+
+    start = time.perf_counter()
+    routes = find_routes(args.paths)
+    bindings = [binding for route in routes for binding in scan_route(route, args.template_dir)]
+    templates = sorted({template for binding in bindings for template in binding.templates})
+    placeholders = _route_placeholders(templates, args.template_dir, cache_options_from_args(args))
+
+    unreadable = [template for template in templates if placeholders[template] is None]
+    reports = [
+        check_binding(binding, placeholders) for binding in bindings
+        if not any(template in unreadable for template in binding.templates)
+    ]
+    broken = [report for report in reports if report.missing or report.misspelled]
+    elapsed = (time.perf_counter() - start) * 1000
+
+    if args.json:
+        print(json.dumps([{
+            'route': report.binding.route,
+            'line': report.binding.line,
+            'variable': report.binding.variable,
+            'templates': report.binding.templates,
+            'missing': report.missing,
+            'extra': report.extra,
+            'misspelled': [{'key': key, 'placeholder': name} for key, name in report.misspelled],
+        } for report in reports], indent=2, ensure_ascii=False))
+    else:
+        print(f"🔗 {len(bindings)} template bindings in {len(routes)} route files\n")
+        for report in reports:
+            _print_report(report)
+        for template in unreadable:
+            print(f"❌ {template}: could not be read from {args.template_dir}")
+        print(f"\nDone: {len(reports) - len(broken)} consistent, {len(broken)} with missing "
+              f"or misspelled keys ({elapsed:.0f} ms)")
+    if broken or unreadable:
+        sys.exit(1)
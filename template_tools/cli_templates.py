@@ -0,0 +1,348 @@
+"""
+Command line: list, dump, schema, preview, normalise and slim
+=============================================================
+
+The commands that look into templates, or rewrite them.
+``normalise`` and ``slim`` write to a temporary file and only replace the
+target once the result has been verified.
+"""
+
+import os
+import sys
+
+from template_tools.cli import _fail, _templates
+
+
+# ---------------------------------------------------------------- list
+
+def cmd_list(args):
+    """Placeholder names of each template"""
+    from template_tools.text_index import TAG_PREFIXES, TextIndex
+
+    for docx_path in _templates(args.paths):
+        try:
+            placeholders = TextIndex.from_docx(docx_path).placeholder_names()
+        except Exception as e:
+            print(f"❌ {docx_path}: {e}", file=sys.stderr)
+            sys.exit(1)
+
+        print(f"📄 {len(placeholders)} placeholders in {docx_path}\n")
+        for i, placeholder in enumerate(placeholders, 1):
+            print(f"{{{placeholder}}}" if args.plain else f"{i:2d}. {{{placeholder}}}")
+
+        if args.typescript:
+            print("\nPlaceholder list for TypeScript interface:")
+            print("-" * 60)
+            for placeholder in placeholders:
+                if placeholder[:1] not in TAG_PREFIXES:
+                    print(f"  {placeholder.lower().replace(' ', '_')}: string;")
+        print()
+
+
+# ---------------------------------------------------------------- dump
+
+def cmd_dump(args):
+    """Delimiters, text or layout of one template"""
+    from template_tools.dump import document_structure, scan_delimiters
+
+    docx_path = args.path
+    if not os.path.exists(docx_path):
+        _fail(f"File not found: {docx_path}")
+
+    print("=" * 80)
+    print(f"CONTENT FROM {os.path.basename(docx_path)}")
+    print("=" * 80)
+
+    if args.structure:
+        for location, text in document_structure(docx_path):
+            print(f"{location}: {text}")
+        print()
+
+    matches, all_text = scan_delimiters(docx_path)
+    if args.text:
+        print(all_text[:args.text])
+        if len(all_text) > args.text:
+            print("\n...")
+        print()
+
+    if matches:
+        print(f"Found {len(matches)} placeholders:\n")
+        for i, (kind, placeholder) in enumerate(matches, 1):
+            print(f"{i:2d}. Pattern: {kind:<20} -> {placeholder}")
+        print("\n" + "=" * 80)
+        print("Unique placeholders:")
+        print("=" * 80)
+        for placeholder in sorted({value for _, value in matches}):
+            print(f"  {placeholder}")
+    else:
+        print("No placeholders found in the template.")
+        if not args.text:
+            print("\nShowing first 1000 characters of content:")
+            print("=" * 80)
+            print(all_text[:1000])
+            print("=" * 80)
+
+
+# ---------------------------------------------------------------- schema
+
+def _print_schema_tree(scope, indent='  '):
+    from template_tools.schema import Section
+
+    for name, node in scope.fields.items():
+        if not isinstance(node, Section):
+            print(f"{indent}{{{'@' if node.kind == 'raw' else ''}{name}}}")
+            continue
+        print(f"{indent}{'^' if node.kind == 'inverted' else '#'}{name}  [{node.kind}]")
+        for start, end, unit in node.extents:
+            print(f"{indent}  ↳ {unit}: {start} … {end}")
+        _print_schema_tree(node, indent + '    ')
+
+
+def cmd_schema(args):
+    """Nested schema of templates; JSON Schema output and record validation"""
+    import json
+
+    from template_tools.schema import parse_schema
+
+    templates = _templates(args.paths)
+    if args.validate and len(templates) != 1:
+        _fail("--validate takes exactly one template")
+    schemas = [parse_schema(path) for path in templates]
+    broken = [schema for schema in schemas if schema.errors]
+
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+        for schema in schemas:
+            stem = os.path.splitext(os.path.basename(schema.source))[0]
+            path = os.path.join(args.output_dir, f"{stem}.schema.json")
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(schema.json_schema(), f, indent=2, ensure_ascii=False)
+                f.write('\n')
+            print(f"✅ {path}")
+    elif args.json_schema:
+        output = [schema.json_schema() for schema in schemas]
+        print(json.dumps(output[0] if len(output) == 1 else output, indent=2, ensure_ascii=False))
+    elif not args.validate:
+        for schema in schemas:
+            print(f"📐 {schema.source}")
+            _print_schema_tree(schema.root)
+            print()
+
+    for schema in broken:
+        for error in schema.errors:
+            print(f"❌ {os.path.basename(schema.source)}: {error.location}: {error.message}",
+                  file=sys.stderr)
+
+    invalid = 0
+    if args.validate:
+        from template_tools.merge import read_records
+
+        if not os.path.exists(args.validate):
+            _fail(f"File not found: {args.validate}")
+        schema = schemas[0]
+        total = 0
+        for record in read_records(args.validate):
+            total += 1
+            problems = [record.error] if record.error else schema.validate(record.data)
+            if problems:
+                invalid += 1
+                print(f"⚠️  record {record.number}: {'; '.join(problems)}")
+        print(f"{'❌' if invalid else '✅'} {total - invalid}/{total} records match "
+              f"{os.path.basename(schema.source)}")
+    if broken or invalid:
+        sys.exit(1)
+
+
+# ---------------------------------------------------------------- preview
+
+def cmd_preview(args):
+    """HTML previews of templates from their cached skeletons"""
+    import json
+    import time
+
+    from template_tools.preview import load_preview
+
+    record = None
+    if args.record:
+        with open(args.record, 'r', encoding='utf-8') as f:
+            record = json.load(f)
+    cache_dir = None if args.no_cache else args.cache_dir
+    os.makedirs(args.output_dir, exist_ok=True)
+    failed = 0
+    for path in _templates(args.paths):
+        name = os.path.splitext(os.path.basename(path))[0]
+        started = time.perf_counter()
+        try:
+            preview = load_preview(path, cache_dir)
+        except Exception as e:
+            print(f"❌ {name}: {e}")
+            failed += 1
+            continue
+        loaded = time.perf_counter() - started
+        # Without a record every slot shows its own tag
+        data = record if record is not None else {n: f"{{{n}}}" for n in preview.slot_names()}
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            preview.render(data)
+        rendered = (time.perf_counter() - started) / args.repeat
+        target = os.path.join(args.output_dir, f"{name}.html")
+        with open(target, 'w', encoding='utf-8') as f:
+            f.write(preview.render_page(data, name))
+        print(f"🖼️  {name}: skeleton {loaded * 1000:.1f} ms, render {rendered * 1e6:.0f} µs → {target}")
+    if failed:
+        sys.exit(1)
+
+
+# ---------------------------------------------------------------- normalise
+
+def _size_change(before, after):
+    percent = f" ({(after - before) / before:+.0%})" if before else ""
+    return f"{before:,} → {after:,}{percent}"
+
+
+def cmd_normalise(args):
+    """Normalise templates; report only unless --output-dir / --in-place"""
+    import tempfile
+
+    from template_tools.normalise import normalise_template, verify_normalised
+
+    templates = _templates(args.paths)
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+    failed = 0
+    for path in templates:
+        name = os.path.basename(path)
+        try:
+            normalised = normalise_template(path)
+        except Exception as e:
+            print(f"❌ {name}: {e}")
+            failed += 1
+            continue
+        if not normalised.changes:
+            print(f"✅ {name}: already normal")
+            continue
+
+        if args.in_place:
+            target = path
+        elif args.output_dir:
+            target = os.path.join(args.output_dir, name)
+        else:
+            target = None
+        # Written next to the target (or to a scratch file) and only moved
+        # into place once verified
+        fd, tmp_path = tempfile.mkstemp(suffix='.docx', dir=os.path.dirname(target or '') or None)
+        os.close(fd)
+        try:
+            normalised.write(tmp_path)
+            problems = verify_normalised(path, tmp_path)
+            changes = normalised.changes
+
+            def total(field):
+                return _size_change(sum(getattr(c, field + '_before') for c in changes),
+                                    sum(getattr(c, field + '_after') for c in changes))
+
+            split = sum(c.split_tags for c in changes)
+            print(f"🧹 {name}: XML {total('bytes')} bytes, {total('elements')} elements, "
+                  f"{total('runs')} runs, {split} split tag{'s' if split != 1 else ''} joined; "
+                  f".docx {_size_change(os.path.getsize(path), os.path.getsize(tmp_path))} bytes")
+            if args.verbose:
+                for c in changes:
+                    print(f"   {c.name}: {_size_change(c.bytes_before, c.bytes_after)} bytes, "
+                          f"{_size_change(c.elements_before, c.elements_after)} elements")
+            if problems:
+                failed += 1
+                for problem in problems[:args.max_errors]:
+                    print(f"   ❌ {problem}")
+                print("   not written: placeholders or rendered text would change")
+                continue
+            print("   ✅ same placeholders and locations, same rendered text")
+            if target is not None:
+                os.replace(tmp_path, target)
+                print(f"   → {target}")
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    if not (args.in_place or args.output_dir):
+        print("\nNothing written (use --output-dir or --in-place)")
+    if failed:
+        sys.exit(1)
+
+
+# ---------------------------------------------------------------- slim
+
+def _print_members(members):
+    print(f"   {'member':<40} {'size':>9} {'zipped':>9}")
+    for member in members:
+        flags = ('stored ' if member.stored else '') + ('' if member.referenced else 'UNREFERENCED')
+        print(f"   {member.name:<40} {member.size:>9,} {member.compressed:>9,}  {flags}")
+
+
+def cmd_slim(args):
+    """Slim templates; report only unless --output-dir / --in-place"""
+    import tempfile
+
+    from template_tools.slim import (
+        load_seconds,
+        package_members,
+        repack_seconds,
+        slim_template,
+        verify_slimmed,
+    )
+
+    templates = _templates(args.paths)
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+    failed = 0
+    for path in templates:
+        name = os.path.basename(path)
+        try:
+            members = package_members(path)
+            slimmed = slim_template(path)
+        except Exception as e:
+            print(f"❌ {name}: {e}")
+            failed += 1
+            continue
+
+        if args.in_place:
+            target = path
+        elif args.output_dir:
+            target = os.path.join(args.output_dir, name)
+        else:
+            target = None
+        # Written next to the target (or to a scratch file) and only moved
+        # into place once verified
+        fd, tmp_path = tempfile.mkstemp(suffix='.docx', dir=os.path.dirname(target or '') or None)
+        os.close(fd)
+        try:
+            slimmed.write(tmp_path)
+            print(f"🪶 {name}: {_size_change(os.path.getsize(path), os.path.getsize(tmp_path))} bytes")
+            if args.list:
+                _print_members(members)
+            report = slimmed.report
+            for dropped, reason in report.dropped.items():
+                print(f"   dropped {dropped} ({reason})")
+            for image, (before, after) in report.recompressed.items():
+                print(f"   recompressed {image}: {_size_change(before, after)} bytes")
+            print(f"   load {load_seconds(path) * 1000:.2f} → {load_seconds(tmp_path) * 1000:.2f} ms, "
+                  f"re-deflating stored members per render {repack_seconds(path) * 1000:.2f} → "
+                  f"{repack_seconds(tmp_path) * 1000:.2f} ms")
+            problems = verify_slimmed(path, tmp_path)
+            if problems:
+                failed += 1
+                for problem in problems[:args.max_errors]:
+                    print(f"   ❌ {problem}")
+                print("   not written: placeholders would change")
+                continue
+            print("   ✅ same placeholders and locations")
+            if target is not None:
+                os.replace(tmp_path, target)
+                print(f"   → {target}")
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    if not (args.in_place or args.output_dir):
+        print("\nNothing written (use --output-dir or --in-place)")
+    if failed:
+        sys.exit(1)
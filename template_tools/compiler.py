@@ -0,0 +1,530 @@
+"""
+Precompiled templates: static byte chunks interleaved with slots
+================================================================
+
+The process-* API routes build PizZip + Docxtemplater and re-parse the
+template XML for every letter. ``compile_template`` does that work once: it
+lexes each part that holds tags, resolves tags split across runs, applies
+the same edits docxtemplater makes to the surrounding XML and keeps the
+result as a list of operations:
+
+* ``bytes``                        static XML copied as is
+* ``(SLOT, name, run_props)``      XML-escaped value of ``{name}``
+* ``(RAW, name)``                  ``{@name}``, value inserted unescaped
+* ``(SECTION, name, inverted, ops)`` ``{#name}..{/name}`` / ``{^name}..{/name}``
+
+``CompiledTemplate.render`` then only walks the operations and joins bytes.
+
+docxtemplater behaviour reproduced (options used by the routes:
+``paragraphLoop: true``, ``linebreaks: true``, ``nullGetter: () => ''``):
+
+* a ``<w:t>`` holding the start of a tag, or the end of one with text left
+  after it, gets ``xml:space="preserve"``; fragments of a split tag are
+  removed from the other runs, leaving empty ``<w:t></w:t>``
+* a section whose content holds a ``<w:tc>`` repeats whole table rows; one
+  holding paragraphs, with the tags alone in their paragraphs, repeats the
+  paragraphs in between and drops the two tag paragraphs
+* ``<w:t xml:space="preserve"></w:t>`` collapses to ``<w:t/>``
+* names are looked up in the innermost section scope first, then outward;
+  missing and ``None`` values render as empty strings
+* ``\\n`` in a value becomes a ``<w:br/>`` in a new run with the same
+  ``<w:rPr>``
+* ``[Content_Types].xml`` is written with a bare ``\\n`` after the XML
+  declaration, as PizZip re-serialises it
+"""
+
+import json
+import re
+import zipfile
+from collections import namedtuple
+from html import unescape
+
+from template_tools.parts import CONTENT_TYPES_PART, discover_parts
+from template_tools.zipwriter import ZipTemplate
+
+SLOT = 'slot'
+RAW = 'raw'
+SECTION = 'section'
+
+# Bumped when the artifact layout changes
+ARTIFACT_VERSION = 1
+
+PRESERVE_ATTR = b' xml:space="preserve"'
+PRESERVE_OPEN = b'<w:t xml:space="preserve">'
+TEXT_CLOSE = b'</w:t>'
+EMPTY_TEXT = b'<w:t/>'
+
+_TAG_RE = re.compile(rb'<(/?)([A-Za-z_][\w:.\-]*)[^>]*?(/?)>')
+_RPR_RE = re.compile(rb'<w:rPr>.*?</w:rPr>|<w:rPr/>', re.S)
+_XML_DECL_RE = re.compile(rb'^(<\?xml[^>]*\?>)\r\n')
+
+_ESCAPES = (('&', '&amp;'), ('<', '&lt;'), ('>', '&gt;'), ('"', '&quot;'), ("'", '&apos;'))
+
+Tag = namedtuple('Tag', 'kind name pieces')
+
+
+class TemplateSyntaxError(ValueError):
+    """A tag or section that docxtemplater would refuse to render"""
+
+
+def escape_value(value):
+    """XML-escape a value the way docxtemplater's ``utf8ToWord`` does"""
+    for char, entity in _ESCAPES:
+        if char in value:
+            value = value.replace(char, entity)
+    return value
+
+
+def value_to_text(value):
+    """String form of a scope value, following JavaScript ``String(value)``"""
+    if value is None:
+        return ''
+    if value is True:
+        return 'true'
+    if value is False:
+        return 'false'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+class _Element:
+    __slots__ = ('name', 'start', 'open_end', 'close_start', 'end', 'parent')
+
+    def __init__(self, name, start, open_end, parent):
+        self.name = name
+        self.start = start
+        self.open_end = open_end
+        self.close_start = self.end = None
+        self.parent = parent
+
+    def ancestor(self, name):
+        elem = self
+        while elem is not None and elem.name != name:
+            elem = elem.parent
+        return elem
+
+
+class _PartCompiler:
+    """Turn one part's XML into an operation list"""
+
+    def __init__(self, xml, part_name=''):
+        self.xml = xml
+        self.part_name = part_name
+        self.texts = []         # <w:t> elements with content, document order
+        self.elements = []      # every element, document order
+        self._lex()
+
+    def _error(self, message):
+        where = f' in {self.part_name}' if self.part_name else ''
+        return TemplateSyntaxError(message + where)
+
+    def _lex(self):
+        stack = []
+        for match in _TAG_RE.finditer(self.xml):
+            closing, name, empty = match.groups()
+            if closing:
+                if not stack or stack[-1].name != name:
+                    raise self._error(f'Mismatched </{name.decode()}>')
+                elem = stack.pop()
+                elem.close_start, elem.end = match.start(), match.end()
+                continue
+            elem = _Element(name, match.start(), match.end(), stack[-1] if stack else None)
+            self.elements.append(elem)
+            if empty:
+                elem.close_start = elem.end = match.end()
+            else:
+                stack.append(elem)
+        if stack:
+            raise self._error(f'Unclosed <{stack[-1].name.decode()}>')
+        self.texts = [e for e in self.elements if e.name == b'w:t' and e.close_start > e.open_end]
+
+    def tags(self):
+        """Tags in document order; each piece is ``(w:t element, start, end)``"""
+        xml = self.xml
+        tags = []
+        pieces = None
+        for t in self.texts:
+            if pieces is not None:
+                pieces.append((t, t.open_end, None))
+            i = t.open_end
+            while True:
+                found = [p for p in (xml.find(b'{', i, t.close_start), xml.find(b'}', i, t.close_start))
+                         if p != -1]
+                if not found:
+                    if pieces is not None:
+                        pieces[-1] = (t, pieces[-1][1], t.close_start)
+                    break
+                brace = min(found)
+                if xml[brace] == 0x7B:
+                    if pieces is not None:
+                        raise self._error(f'Unclosed tag before offset {brace}')
+                    pieces = [(t, brace, None)]
+                else:
+                    if pieces is None:
+                        raise self._error(f'Unopened tag at offset {brace}')
+                    pieces[-1] = (t, pieces[-1][1], brace + 1)
+                    tags.append(self._make_tag(pieces))
+                    pieces = None
+                i = brace + 1
+        if pieces is not None:
+            raise self._error('Unclosed tag at end of part')
+        return tags
+
+    def _make_tag(self, pieces):
+        raw = b''.join(self.xml[a:b] for _, a, b in pieces)[1:-1]
+        value = unescape(raw.decode('utf-8')).strip()
+        kind = {'#': 'open', '^': 'inverted', '/': 'close', '@': RAW}.get(value[:1], SLOT)
+        name = value[1:].strip() if kind != SLOT else value
+        return Tag(kind, name, pieces)
+
+    def compile(self):
+        tags = self.tags()
+        deletes = []            # (start, end) byte ranges removed from the output
+        slots = []              # (offset, op)
+        preserve = set()        # <w:t> elements given xml:space="preserve"
+        sections = []           # (start, end, body_start, body_end, name, inverted)
+
+        for tag in tags:
+            first_t, a, b = tag.pieces[0]
+            for t, pa, pb in tag.pieces:
+                deletes.append((pa, pb))
+            if tag.kind in (SLOT, 'open', 'inverted', 'close'):
+                preserve.add(first_t)
+            if tag.kind == SLOT:
+                slots.append((a, (SLOT, tag.name, self._run_props(first_t))))
+        # End fragment of a split tag, kept as preserve when text follows it
+        preserve |= {tag.pieces[-1][0] for tag in tags if len(tag.pieces) > 1}
+
+        stack = []
+        for tag in tags:
+            if tag.kind in ('open', 'inverted'):
+                stack.append(tag)
+            elif tag.kind == 'close':
+                if not stack:
+                    raise self._error(f'Unopened section {{/{tag.name}}}')
+                opener = stack.pop()
+                if opener.name != tag.name and tag.name:
+                    raise self._error(f'Section {{#{opener.name}}} closed by {{/{tag.name}}}')
+                sections.append(self._expand(opener, tag))
+        if stack:
+            raise self._error(f'Unclosed section {{#{stack[-1].name}}}')
+
+        raws = []
+        for tag in tags:
+            if tag.kind == RAW:
+                p = tag.pieces[0][0].ancestor(b'w:p')
+                if p is None:
+                    raise self._error(f'Raw tag {{@{tag.name}}} outside a paragraph')
+                raws.append((p.start, p.end, (RAW, tag.name)))
+
+        slot_offsets = [offset for offset, _ in slots]
+        for t in preserve:
+            if PRESERVE_ATTR not in self.xml[t.start:t.open_end] \
+                    and self._has_content(t, deletes, slot_offsets):
+                slots.append((t.open_end - 1, PRESERVE_ATTR))
+
+        ops = self._build(0, len(self.xml), deletes, slots, sorted(sections), sorted(raws))
+        return _collapse_ops(ops)
+
+    def _run_props(self, t):
+        run = t.ancestor(b'w:r')
+        if run is None:
+            return b''
+        found = _RPR_RE.search(self.xml, run.open_end, t.start)
+        return found.group(0) if found else b''
+
+    @staticmethod
+    def _has_content(t, deletes, slot_offsets):
+        """True when ``t`` keeps text or a slot once tag fragments are removed"""
+        if any(t.open_end <= offset < t.close_start for offset in slot_offsets):
+            return True
+        kept = t.close_start - t.open_end
+        for a, b in deletes:
+            if t.open_end <= a < t.close_start:
+                kept -= b - a
+        return kept > 0
+
+    def _expand(self, opener, closer):
+        start = opener.pieces[0][1]
+        end = closer.pieces[-1][2]
+        stop = closer.pieces[0][1]
+        opened = [e for e in self.elements if start <= e.start < stop and e.end != e.open_end]
+        closed = [e for e in self.elements if start <= e.close_start < stop and e.end != e.open_end]
+        names = {e.name for e in opened} | {e.name for e in closed}
+        if len(opened) != len(closed):
+            raise self._error(f'Section {{#{opener.name}}} produces invalid XML')
+        inverted = opener.kind == 'inverted'
+        first_t, last_t = opener.pieces[0][0], closer.pieces[-1][0]
+        if b'w:tc' in names:
+            left, right = first_t.ancestor(b'w:tr'), last_t.ancestor(b'w:tr')
+            if left is not None and right is not None:
+                return (left.start, right.end, left.start, right.end, opener.name, inverted)
+        if b'w:p' in names:
+            left, right = first_t.ancestor(b'w:p'), last_t.ancestor(b'w:p')
+            if left is not None and right is not None and self._only_tag(left, opener) \
+                    and self._only_tag(right, closer):
+                return (left.start, right.end, left.end, right.start, opener.name, inverted)
+        return (start, end, opener.pieces[-1][2], closer.pieces[0][1], opener.name, inverted)
+
+    def _only_tag(self, paragraph, tag):
+        """True when the paragraph's text is just ``tag`` plus whitespace"""
+        own = {(a, b) for _, a, b in tag.pieces}
+        for t in self.texts:
+            if paragraph.start <= t.start < paragraph.end:
+                content = self.xml[t.open_end:t.close_start]
+                for a, b in own:
+                    if t.open_end <= a < t.close_start:
+                        content = content.replace(self.xml[a:b], b'', 1)
+                if content.strip():
+                    return False
+        return True
+
+    def _build(self, start, end, deletes, slots, sections, raws):
+        """Operations for ``xml[start:end]``"""
+        events = []
+        for a, b in deletes:
+            if start <= a < end:
+                events.append((a, 1, b, None))
+        for offset, op in slots:
+            if start <= offset < end:
+                events.append((offset, 0, offset, op))
+        for a, b, op in raws:
+            if start <= a < end:
+                events.append((a, 2, b, op))
+        outer = [s for s in sections if start <= s[0] < end
+                 and not any(o is not s and o[0] <= s[0] and s[1] <= o[1] and o[:2] != s[:2]
+                             for o in sections if start <= o[0] < end)]
+        for s in outer:
+            events.append((s[0], -1, s[1], s))
+        # Sections first at equal offsets: they swallow their own tag deletes
+        events.sort(key=lambda e: (e[0], e[1]))
+
+        ops = []
+        pos = start
+        for offset, kind, stop, op in events:
+            if offset < pos:
+                continue
+            ops.append(self.xml[pos:offset])
+            if kind == -1:
+                a, b, body_start, body_end, name, inverted = op
+                inner_sections = [s for s in sections if s is not op and a <= s[0] and s[1] <= b]
+                body = self._build(body_start, body_end, deletes, slots, inner_sections, raws)
+                ops.append((SECTION, name, inverted, _collapse_ops(body)))
+            elif op is not None:
+                ops.append(op)
+            pos = max(pos, stop)
+        ops.append(self.xml[pos:end])
+        return ops
+
+
+def _collapse_ops(ops):
+    """Merge adjacent byte chunks and apply the empty ``<w:t>`` collapse"""
+    merged = []
+    for op in ops:
+        if isinstance(op, bytes):
+            if not op:
+                continue
+            if merged and isinstance(merged[-1], bytes):
+                merged[-1] += op
+                continue
+        merged.append(op)
+    return [op.replace(PRESERVE_OPEN + TEXT_CLOSE, EMPTY_TEXT) if isinstance(op, bytes) else op
+            for op in merged]
+
+
+def lookup_value(scopes, name):
+    """Value of ``name`` in the innermost scope defining it (``.``: the
+    current scope itself), None when no scope does, like docxtemplater"""
+    if name == '.':
+        return scopes[-1]
+    for scope in reversed(scopes):
+        if isinstance(scope, dict) and name in scope:
+            return scope[name]
+    return None
+
+
+def _render_ops(ops, scopes, out):
+    for op in ops:
+        if op.__class__ is bytes:
+            out.append(op)
+            continue
+        kind = op[0]
+        if kind == SLOT:
+            text = value_to_text(lookup_value(scopes, op[1]))
+            if not text:
+                continue
+            text = escape_value(text)
+            if '\n' in text:
+                text = text.replace('\n', '</w:t></w:r><w:r>' + op[2].decode('utf-8')
+                                    + '<w:br/><w:t xml:space="preserve">')
+            out.append(text.encode('utf-8'))
+        elif kind == RAW:
+            out.append(value_to_text(lookup_value(scopes, op[1])).encode('utf-8'))
+        else:
+            _, name, inverted, body = op
+            value = lookup_value(scopes, name)
+            if inverted:
+                if not value:
+                    _render_ops(body, scopes, out)
+            elif isinstance(value, (list, tuple)):
+                for item in value:
+                    _render_ops(body, scopes + [item], out)
+            elif value:
+                _render_ops(body, scopes + [value] if isinstance(value, dict) else scopes, out)
+
+
+def _join(pieces):
+    """Join rendered pieces, collapsing ``<w:t xml:space="preserve"></w:t>``
+    formed across a chunk boundary by empty values"""
+    out = []
+    for piece in pieces:
+        if piece.startswith(TEXT_CLOSE) and out and out[-1].endswith(PRESERVE_OPEN):
+            out[-1] = out[-1][:-len(PRESERVE_OPEN)] + EMPTY_TEXT
+            piece = piece[len(TEXT_CLOSE):]
+            if not piece:
+                continue
+        out.append(piece)
+    return b''.join(out)
+
+
+class CompiledTemplate:
+    """A template turned into operation lists, one per part holding tags.
+
+    Attributes:
+        source: path of the template .docx
+        parts: part name -> operation list
+        replaced: part name -> fixed bytes written instead of the template's
+    """
+
+    def __init__(self, source, parts, replaced=None):
+        self.source = source
+        self.parts = parts
+        self.replaced = replaced or {}
+        self._package = None
+
+    @property
+    def package(self):
+        """``ZipTemplate`` of the source, read on first use"""
+        if self._package is None:
+            self._package = ZipTemplate(self.source)
+        return self._package
+
+    def placeholder_names(self, kinds=(SLOT, RAW, SECTION)):
+        """Sorted names of every slot, raw tag and section"""
+        names = set()
+
+        def walk(ops):
+            for op in ops:
+                if op.__class__ is not bytes:
+                    if op[0] in kinds:
+                        names.add(op[1])
+                    if op[0] == SECTION:
+                        walk(op[3])
+
+        for ops in self.parts.values():
+            walk(ops)
+        return sorted(names)
+
+    def slot_names(self):
+        """Sorted names of the plain ``{name}`` slots"""
+        return self.placeholder_names((SLOT,))
+
+    def top_level_names(self):
+        """Sorted names a record itself must provide: tags outside sections
+        and the sections themselves (tags inside a loop read the loop item)"""
+        names = set()
+        for ops in self.parts.values():
+            names.update(op[1] for op in ops if op.__class__ is not bytes)
+        return sorted(names)
+
+    def render_part(self, part, record):
+        """Rendered bytes of one compiled part"""
+        out = []
+        _render_ops(self.parts[part], [record], out)
+        return _join(out)
+
+    def render(self, record):
+        """Dict of part name -> bytes for every part that differs from the template"""
+        rendered = dict(self.replaced)
+        for part in self.parts:
+            rendered[part] = self.render_part(part, record)
+        return rendered
+
+    def render_docx(self, record, output, compresslevel=6):
+        """Write a finished .docx for ``record`` to a path or binary file object.
+
+        Only the rendered parts are deflated; every other member is copied
+        from the template as stored.
+        """
+        return self.package.write(output, self.render(record), compresslevel)
+
+    def render_bytes(self, record, compresslevel=6):
+        """Finished .docx for ``record`` as bytes"""
+        return self.package.to_bytes(self.render(record), compresslevel)
+
+    def to_json(self):
+        """Artifact as a JSON-serialisable dict (chunks as UTF-8 text)"""
+        def dump(ops):
+            return [op.decode('utf-8') if isinstance(op, bytes)
+                    else [op[0], op[1], op[2], dump(op[3])] if op[0] == SECTION
+                    else [op[0], op[1], op[2].decode('utf-8')] if op[0] == SLOT
+                    else list(op)
+                    for op in ops]
+
+        return {
+            'version': ARTIFACT_VERSION,
+            'source': self.source,
+            'parts': {name: dump(ops) for name, ops in self.parts.items()},
+            'replaced': {name: data.decode('utf-8') for name, data in self.replaced.items()},
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        if data.get('version') != ARTIFACT_VERSION:
+            raise ValueError(f"Unsupported artifact version: {data.get('version')}")
+
+        def load(ops):
+            return [op.encode('utf-8') if isinstance(op, str)
+                    else (SECTION, op[1], op[2], load(op[3])) if op[0] == SECTION
+                    else (SLOT, op[1], op[2].encode('utf-8')) if op[0] == SLOT
+                    else tuple(op)
+                    for op in ops]
+
+        return cls(data['source'], {name: load(ops) for name, ops in data['parts'].items()},
+                   {name: text.encode('utf-8') for name, text in data.get('replaced', {}).items()})
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_json(), f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_json(json.load(f))
+
+
+def compile_part(xml, part_name=''):
+    """Operation list for one part's XML bytes"""
+    return _PartCompiler(xml, part_name).compile()
+
+
+def compile_template(docx_path):
+    """Compile every part of a template that holds ``{tags}``"""
+    parts = {}
+    replaced = {}
+    with zipfile.ZipFile(docx_path) as zf:
+        for part in discover_parts(zf):
+            xml = zf.read(part.name)
+            if b'{' not in xml:
+                continue
+            ops = compile_part(xml, part.name)
+            if any(op.__class__ is not bytes for op in ops):
+                parts[part.name] = ops
+        try:
+            types = zf.read(CONTENT_TYPES_PART)
+        except KeyError:
+            types = None
+    if types is not None and _XML_DECL_RE.match(types):
+        replaced[CONTENT_TYPES_PART] = _XML_DECL_RE.sub(rb'\1\n', types, count=1)
+    return CompiledTemplate(str(docx_path), parts, replaced)
@@ -0,0 +1,721 @@
+"""
+Local DOCX -> PDF conversion
+============================
+
+The process-* routes send every letter to ConvertAPI, which costs seconds
+per letter and fails offline. ``ConversionPool`` keeps a few headless
+LibreOffice workers warm instead:
+
+* with the ``uno`` module (LibreOffice's Python bridge) each worker is one
+  long-running ``soffice`` listening on a pipe; a job is a
+  ``loadComponentFromURL`` + ``storeToURL`` on the running instance
+* without it each job runs ``soffice --convert-to pdf``: a fresh LibreOffice
+  process per job, so only the ``uno`` mode is warm. Every worker still
+  keeps its own user profile, initialised once at start, so jobs do not pay
+  for profile creation and do not fight over the default profile's lock
+
+A worker is recycled after ``max_jobs`` jobs, and killed (with its process
+group) and restarted when a job runs past ``timeout``.
+
+``serve`` puts the pool behind a local HTTP server speaking the part of the
+ConvertAPI v2 REST API the routes use through the convertapi client:
+
+    POST /upload                 raw bytes -> {"FileId", "FileName", ...}
+    POST /convert/docx/to/pdf    File as upload id, multipart file, JSON
+                                 FileValue or the raw body; StoreFile=true
+                                 answers with a download Url, otherwise
+                                 FileData (base64), or the bare PDF when
+                                 the request accepts application/octet-stream
+    GET  /d/<id>/<name>          a stored file
+    GET  /stats                  queue depth, workers, per-job latency
+
+so ``new ConvertAPI(secret, { baseUri: 'http://127.0.0.1:8079/' })`` is
+enough to switch a route over. The secret is not checked: the server only
+listens on localhost unless told otherwise.
+"""
+
+import base64
+import importlib.util
+import json
+import os
+import queue
+import re
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+SOFFICE_NAMES = ('soffice', 'libreoffice')
+MODES = ('uno', 'cli')
+PDF_FILTER = 'writer_pdf_Export'
+# Job latencies kept for the percentiles in ``stats``
+LATENCY_WINDOW = 1000
+# Uploads and stored results kept for download, oldest dropped first
+STORE_FILES = 256
+STORE_BYTES = 256 * 1024 * 1024
+
+_CONVERT_PATH_RE = re.compile(r'^/convert/(\w+)/to/pdf/?$')
+_DOWNLOAD_PATH_RE = re.compile(r'^/d/([0-9a-f]{32})(?:/[^/]*)?$')
+_FILENAME_STAR_RE = re.compile(r"filename\*=(?:UTF-8|utf-8)''([^;]+)")
+_FILENAME_RE = re.compile(r'filename="?([^";]+)"?')
+# Dropped from client-supplied names echoed in Content-Disposition
+_UNSAFE_NAME_RE = re.compile(r'["\\\x00-\x1f\x7f]')
+
+
+class ConversionError(Exception):
+    """A document could not be converted"""
+
+
+class ConversionTimeout(ConversionError):
+    """A job ran past the worker timeout (the worker was killed)"""
+
+
+def find_soffice(soffice=None):
+    """Path of the LibreOffice binary: ``soffice``, $SOFFICE, or on PATH"""
+    for candidate in (soffice, os.environ.get('SOFFICE')) + SOFFICE_NAMES:
+        if candidate:
+            found = shutil.which(candidate)
+            if found:
+                return found
+    raise ConversionError("LibreOffice not found (install it or pass --soffice / set SOFFICE)")
+
+
+def uno_available():
+    return importlib.util.find_spec('uno') is not None
+
+
+def _kill_group(process):
+    """Kill ``soffice`` and the ``soffice.bin`` it started"""
+    if process is None or process.poll() is not None:
+        return
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (OSError, AttributeError):
+        process.kill()
+    process.wait()
+
+
+# ---------------------------------------------------------------- workers
+
+class _Worker:
+    """One LibreOffice worker with its own profile and scratch directory"""
+
+    def __init__(self, number, soffice, work_dir, timeout):
+        self.number = number
+        self.soffice = soffice
+        self.dir = os.path.join(work_dir, f"worker-{number}")
+        self.profile_url = Path(self.dir, 'profile').absolute().as_uri()
+        self.timeout = timeout
+        self.jobs = 0      # since the last (re)start
+        self.started = 0   # starts, so recycles = started - 1
+        self.running = False
+
+    def _command(self, *args):
+        return [self.soffice, '--headless', '--invisible', '--nologo', '--norestore',
+                '--nodefault', '--nolockcheck', f'-env:UserInstallation={self.profile_url}', *args]
+
+    def restart(self):
+        self.stop()
+        os.makedirs(self.dir, exist_ok=True)
+        self.start()
+        self.jobs = 0
+        self.started += 1
+        self.running = True
+
+    def convert(self, data, name):
+        """PDF bytes of one document (raises ConversionError)"""
+        stem = Path(name).stem or 'document'
+        suffix = Path(name).suffix or '.docx'
+        job_dir = tempfile.mkdtemp(dir=self.dir)
+        try:
+            source = os.path.join(job_dir, stem + suffix)
+            with open(source, 'wb') as f:
+                f.write(data)
+            target = os.path.join(job_dir, stem + '.pdf')
+            self.jobs += 1
+            self._convert(source, target)
+            try:
+                with open(target, 'rb') as f:
+                    return f.read()
+            except OSError:
+                raise ConversionError(f"LibreOffice wrote no PDF for {name}") from None
+        finally:
+            shutil.rmtree(job_dir, ignore_errors=True)
+
+    def start(self):
+        raise NotImplementedError
+
+    def stop(self):
+        self.running = False
+
+    def _convert(self, source, target):
+        raise NotImplementedError
+
+
+class CliWorker(_Worker):
+    """``soffice --convert-to pdf`` per job over a profile created at start"""
+
+    mode = 'cli'
+
+    def start(self):
+        # First start of a profile is the slow part of a one-shot conversion
+        if not os.path.isdir(os.path.join(self.dir, 'profile')):
+            self._run(self._command('--terminate_after_init'))
+
+    def _run(self, command):
+        process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                   start_new_session=True)
+        try:
+            _, stderr = process.communicate(timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            _kill_group(process)
+            self.running = False
+            raise ConversionTimeout(f"no result after {self.timeout:g} s") from None
+        if process.returncode:
+            message = stderr.decode('utf-8', 'replace').strip().splitlines()
+            raise ConversionError(message[-1] if message else f"soffice exited with {process.returncode}")
+
+    def _convert(self, source, target):
+        self._run(self._command('--convert-to', 'pdf', '--outdir', os.path.dirname(target), source))
+
+
+class UnoWorker(_Worker):
+    """A running ``soffice`` driven over a UNO pipe"""
+
+    mode = 'uno'
+    START_TIMEOUT = 60.0
+
+    def __init__(self, number, soffice, work_dir, timeout):
+        super().__init__(number, soffice, work_dir, timeout)
+        self.pipe = f"template_tools_{os.getpid()}_{number}"
+        self.process = None
+        self.desktop = None
+        self.timed_out = False
+
+    def start(self):
+        import uno
+        from com.sun.star.connection import NoConnectException
+
+        self.process = subprocess.Popen(
+            self._command(f'--accept=pipe,name={self.pipe};urp;StarOffice.ComponentContext'),
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True,
+        )
+        local = uno.getComponentContext()
+        resolver = local.ServiceManager.createInstanceWithContext(
+            'com.sun.star.bridge.UnoUrlResolver', local)
+        deadline = time.monotonic() + self.START_TIMEOUT
+        while True:
+            try:
+                context = resolver.resolve(
+                    f'uno:pipe,name={self.pipe};urp;StarOffice.ComponentContext')
+                break
+            except NoConnectException:
+                if self.process.poll() is not None or time.monotonic() > deadline:
+                    _kill_group(self.process)
+                    raise ConversionError("LibreOffice did not start") from None
+                time.sleep(0.1)
+        self.desktop = context.ServiceManager.createInstanceWithContext(
+            'com.sun.star.frame.Desktop', context)
+
+    def stop(self):
+        if self.desktop is not None:
+            try:
+                self.desktop.terminate()
+            except Exception:
+                pass  # already gone
+            self.desktop = None
+        if self.process is not None:
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                pass
+            _kill_group(self.process)
+            self.process = None
+        super().stop()
+
+    def _kill(self):
+        self.timed_out = True
+        _kill_group(self.process)
+
+    @staticmethod
+    def _properties(**values):
+        from com.sun.star.beans import PropertyValue
+
+        properties = []
+        for name, value in values.items():
+            prop = PropertyValue()
+            prop.Name, prop.Value = name, value
+            properties.append(prop)
+        return tuple(properties)
+
+    def _convert(self, source, target):
+        import uno
+
+        self.timed_out = False
+        watchdog = threading.Timer(self.timeout, self._kill)
+        watchdog.start()
+        try:
+            document = self.desktop.loadComponentFromURL(
+                uno.systemPathToFileUrl(source), '_blank', 0,
+                self._properties(Hidden=True, ReadOnly=True))
+            if document is None:
+                raise ConversionError("LibreOffice could not open the document")
+            try:
+                document.storeToURL(uno.systemPathToFileUrl(target),
+                                    self._properties(FilterName=PDF_FILTER))
+            finally:
+                document.close(True)
+        except ConversionError:
+            raise
+        except Exception as e:
+            self.running = False
+            if self.timed_out:
+                raise ConversionTimeout(f"no result after {self.timeout:g} s") from None
+            raise ConversionError(f"{type(e).__name__}: {e}") from None
+        finally:
+            watchdog.cancel()
+
+
+# ---------------------------------------------------------------- pool
+
+class LatencyStats:
+    """Seconds of the last ``LATENCY_WINDOW`` jobs"""
+
+    def __init__(self):
+        self.samples = deque(maxlen=LATENCY_WINDOW)
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+
+    def to_dict(self):
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {'count': 0}
+
+        def at(fraction):
+            return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000, 1)
+
+        return {
+            'count': len(ordered),
+            'mean_ms': round(sum(ordered) / len(ordered) * 1000, 1),
+            'p50_ms': at(0.5),
+            'p95_ms': at(0.95),
+            'max_ms': round(ordered[-1] * 1000, 1),
+        }
+
+
+class ConversionPool:
+    """Warm LibreOffice workers fed from one job queue.
+
+    Args:
+        workers: LibreOffice instances
+        max_jobs: jobs before a worker is restarted (0: never)
+        timeout: seconds one job may take before its worker is killed
+        mode: 'uno' or 'cli' (default: 'uno' when the bridge imports)
+        soffice: LibreOffice binary (default: found on PATH)
+        work_dir: profiles and scratch files (default: a temporary directory)
+    """
+
+    def __init__(self, workers=2, max_jobs=50, timeout=60.0, mode=None, soffice=None,
+                 work_dir=None):
+        if mode is None:
+            mode = 'uno' if uno_available() else 'cli'
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode: {mode} (choose from {', '.join(MODES)})")
+        self.mode = mode
+        self.max_jobs = max_jobs
+        self.soffice = find_soffice(soffice)
+        self._own_dir = work_dir is None
+        self.work_dir = work_dir or tempfile.mkdtemp(prefix='template_tools-soffice-')
+        worker_class = UnoWorker if mode == 'uno' else CliWorker
+        self.workers = [worker_class(n, self.soffice, self.work_dir, timeout)
+                        for n in range(1, workers + 1)]
+        self.queue = queue.Queue()
+        self.latency = LatencyStats()
+        self.wait = LatencyStats()
+        self.done = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.busy = 0
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def start(self):
+        """Start every worker (in parallel) and the threads feeding them.
+
+        A worker that fails to start is retried on its first job; raises
+        ConversionError only when none of them starts.
+        """
+        errors = []
+
+        def start_worker(worker):
+            try:
+                worker.restart()
+            except ConversionError as e:
+                errors.append(e)
+
+        starters = [threading.Thread(target=start_worker, args=(worker,)) for worker in self.workers]
+        for thread in starters:
+            thread.start()
+        for thread in starters:
+            thread.join()
+        if errors and len(errors) == len(self.workers):
+            raise errors[0]
+        for worker in self.workers:
+            thread = threading.Thread(target=self._run, args=(worker,), daemon=True,
+                                      name=f"soffice-{worker.number}")
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def submit(self, data, name='document.docx'):
+        """``Future`` of the PDF bytes of one document"""
+        future = Future()
+        self.queue.put((future, data, name, time.perf_counter()))
+        return future
+
+    def convert(self, data, name='document.docx'):
+        return self.submit(data, name).result()
+
+    def _run(self, worker):
+        while True:
+            job = self.queue.get()
+            if job is None:
+                break
+            future, data, name, queued = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            started = time.perf_counter()
+            with self._lock:
+                self.busy += 1
+            try:
+                if not worker.running or (self.max_jobs and worker.jobs >= self.max_jobs):
+                    worker.restart()
+                result = worker.convert(data, name)
+            except Exception as e:
+                with self._lock:
+                    self.failed += 1
+                    self.timeouts += isinstance(e, ConversionTimeout)
+                future.set_exception(e)
+            else:
+                with self._lock:
+                    self.done += 1
+                future.set_result(result)
+            finally:
+                finished = time.perf_counter()
+                with self._lock:
+                    self.busy -= 1
+                    self.wait.add(started - queued)
+                    self.latency.add(finished - started)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'mode': self.mode,
+                'workers': len(self.workers),
+                'busy': self.busy,
+                'queue_depth': self.queue.qsize(),
+                'done': self.done,
+                'failed': self.failed,
+                'timeouts': self.timeouts,
+                'recycled': sum(max(0, worker.started - 1) for worker in self.workers),
+                'jobs_per_worker': {worker.number: worker.jobs for worker in self.workers},
+                'latency': self.latency.to_dict(),
+                'queue_wait': self.wait.to_dict(),
+            }
+
+    def close(self):
+        for _ in self._threads:
+            self.queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        for worker in self.workers:
+            worker.stop()
+        if self._own_dir:
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+
+
+def convert_once(data, name='document.docx', soffice=None, timeout=120.0):
+    """PDF bytes from a one-shot ``soffice --convert-to`` with a fresh
+    profile, the cost every conversion pays without a pool"""
+    with tempfile.TemporaryDirectory(prefix='template_tools-once-') as work_dir:
+        worker = CliWorker(0, find_soffice(soffice), work_dir, timeout)
+        os.makedirs(worker.dir)
+        return worker.convert(data, name)
+
+
+# ---------------------------------------------------------------- HTTP
+
+class FileStore:
+    """Uploads and results kept for download, least recently added dropped first"""
+
+    def __init__(self, max_files=STORE_FILES, max_bytes=STORE_BYTES):
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.files = OrderedDict()  # id -> (name, bytes)
+        self.size = 0
+        self._lock = threading.Lock()
+
+    def put(self, name, data):
+        file_id = uuid.uuid4().hex
+        with self._lock:
+            self.files[file_id] = (name, data)
+            self.size += len(data)
+            while len(self.files) > self.max_files or self.size > self.max_bytes:
+                _, (_, dropped) = self.files.popitem(last=False)
+                self.size -= len(dropped)
+        return file_id
+
+    def get(self, file_id):
+        with self._lock:
+            return self.files.get(file_id)
+
+    def delete(self, file_id):
+        with self._lock:
+            entry = self.files.pop(file_id, None)
+            if entry is not None:
+                self.size -= len(entry[1])
+            return entry is not None
+
+
+def _file_info(file_id, name, data):
+    return {'FileId': file_id, 'FileName': name, 'FileExt': Path(name).suffix.lstrip('.'),
+            'FileSize': len(data)}
+
+
+def _attachment(name):
+    """Content-Disposition of a download named by the client: quotes, CR,
+    LF and other control characters are removed so the name cannot end the
+    header early; non-ASCII names go in ``filename*``"""
+    name = _UNSAFE_NAME_RE.sub('', name) or 'document'
+    fallback = name.encode('ascii', 'replace').decode('ascii')
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(name)}"
+
+
+def _disposition_name(value):
+    match = _FILENAME_STAR_RE.search(value or '')
+    if match:
+        return unquote(match.group(1))
+    match = _FILENAME_RE.search(value or '')
+    return match.group(1) if match else None
+
+
+def _multipart_fields(content_type, body):
+    """``{name: (filename or None, bytes)}`` of a multipart/form-data body"""
+    from email.parser import BytesParser
+    from email.policy import HTTP
+
+    message = BytesParser(policy=HTTP).parsebytes(
+        b'Content-Type: ' + content_type.encode('latin-1') + b'\r\n\r\n' + body)
+    fields = {}
+    for part in message.iter_parts():
+        name = part.get_param('name', header='content-disposition')
+        if name:
+            fields[name] = (part.get_filename(), part.get_payload(decode=True) or b'')
+    return fields
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = 'template_tools-convert'
+    protocol_version = 'HTTP/1.1'
+
+    # -------------------------------------------------------- plumbing
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status, body, content_type='application/json', headers=()):
+        if not isinstance(body, bytes):
+            body = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status, message):
+        # ConvertAPI's error body
+        self._send(status, {'Code': status, 'Message': message})
+
+    def _body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def _url(self, file_id, name):
+        host = self.headers.get('Host') or '%s:%s' % self.server.server_address[:2]
+        return f"http://{host}/d/{file_id}/{quote(name)}"
+
+    # -------------------------------------------------------- routes
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path in ('/stats', '/stats/'):
+            return self._send(200, self.server.pool.stats())
+        match = _DOWNLOAD_PATH_RE.match(path)
+        entry = match and self.server.store.get(match.group(1))
+        if not entry:
+            return self._error(404, "File not found")
+        name, data = entry
+        content_type = 'application/pdf' if name.lower().endswith('.pdf') else 'application/octet-stream'
+        self._send(200, data, content_type,
+                   [('Content-Disposition', _attachment(name))])
+
+    def do_DELETE(self):
+        match = _DOWNLOAD_PATH_RE.match(urlsplit(self.path).path)
+        if not match or not self.server.store.delete(match.group(1)):
+            return self._error(404, "File not found")
+        self._send(200, {})
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path.rstrip('/') == '/upload':
+            return self._upload(url)
+        match = _CONVERT_PATH_RE.match(url.path)
+        if match is None:
+            return self._error(404, f"Unknown endpoint: {url.path}")
+        try:
+            name, data, params = self._source(url, match.group(1))
+        except ValueError as e:
+            return self._error(400, str(e))
+        started = time.perf_counter()
+        try:
+            pdf = self.server.pool.convert(data, name)
+        except ConversionTimeout as e:
+            return self._error(504, str(e))
+        except ConversionError as e:
+            return self._error(500, str(e))
+        elapsed = time.perf_counter() - started
+
+        pdf_name = Path(name).stem + '.pdf'
+        if 'application/octet-stream' in (self.headers.get('Accept') or ''):
+            return self._send(200, pdf, 'application/pdf',
+                              [('Content-Disposition', _attachment(pdf_name))])
+        info = {'FileName': pdf_name, 'FileExt': 'pdf', 'FileSize': len(pdf)}
+        if str(params.get('StoreFile', '')).lower() == 'true':
+            file_id = self.server.store.put(pdf_name, pdf)
+            info.update(FileId=file_id, Url=self._url(file_id, pdf_name))
+        else:
+            info['FileData'] = base64.b64encode(pdf).decode('ascii')
+        self._send(200, {'ConversionCost': 0, 'ConversionTime': round(elapsed), 'Files': [info]})
+
+    def _upload(self, url):
+        query = parse_qs(url.query)
+        name = (_disposition_name(self.headers.get('Content-Disposition'))
+                or query.get('filename', ['document.docx'])[0])
+        data = self._body()
+        if not data:
+            return self._error(400, "Empty upload")
+        file_id = self.server.store.put(name, data)
+        self._send(200, _file_info(file_id, name, data))
+
+    def _stored(self, value):
+        """Upload id, or a download URL of this server, -> ``(name, bytes)``"""
+        value = value.strip()
+        if value.startswith(('http://', 'https://')):
+            match = _DOWNLOAD_PATH_RE.match(urlsplit(value).path)
+            if match is None:
+                raise ValueError("Only files uploaded to this server can be converted")
+            value = match.group(1)
+        entry = self.server.store.get(value)
+        if entry is None:
+            raise ValueError(f"Unknown file id: {value}")
+        return entry
+
+    def _source(self, url, source_format):
+        """``(name, bytes, params)`` of the document in a convert request"""
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        content_type = self.headers.get('Content-Type') or ''
+        body = self._body()
+        default_name = f"document.{source_format}"
+
+        if content_type.startswith('multipart/form-data'):
+            fields = _multipart_fields(content_type, body)
+            params.update({k: v.decode('utf-8', 'replace') for k, (filename, v) in fields.items()
+                           if filename is None and k != 'File'})
+            if 'File' not in fields:
+                raise ValueError("Missing File parameter")
+            filename, data = fields['File']
+            if filename is None:
+                filename, data = self._stored(data.decode('utf-8', 'replace'))
+            return filename, data, params
+
+        if content_type.startswith('application/json'):
+            try:
+                request = json.loads(body or b'{}')
+                parameters = request.get('Parameters', [])
+            except (ValueError, AttributeError):
+                raise ValueError("Invalid JSON body") from None
+            if not isinstance(parameters, list) or not all(
+                    isinstance(parameter, dict)
+                    and isinstance(parameter.get('FileValue') or {}, dict)
+                    for parameter in parameters):
+                raise ValueError("Invalid JSON body")
+            source = None
+            for parameter in parameters:
+                if parameter.get('Name') == 'File':
+                    value = parameter.get('FileValue') or {}
+                    if value.get('Data'):
+                        source = (value.get('Name') or default_name, base64.b64decode(value['Data']))
+                    elif value.get('Id') or value.get('Url'):
+                        source = self._stored(value.get('Id') or value['Url'])
+                else:
+                    params[parameter.get('Name')] = parameter.get('Value')
+            if source is None:
+                raise ValueError("Missing File parameter")
+            return source + (params,)
+
+        if content_type.startswith('application/x-www-form-urlencoded'):
+            try:
+                form = {k: v[-1] for k, v in parse_qs(body.decode('utf-8')).items()}
+            except UnicodeDecodeError:
+                form = {}  # a raw document sent without a content type (curl --data-binary)
+            if 'File' in form:
+                params.update(form)
+                return self._stored(params.pop('File')) + (params,)
+
+        # Raw document in the body (ConvertAPI's octet-stream upload)
+        if not body:
+            raise ValueError("Missing File parameter")
+        name = _disposition_name(self.headers.get('Content-Disposition')) or default_name
+        return name, body, params
+
+
+class ConversionServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, pool, store=None, verbose=False):
+        super().__init__(address, _Handler)
+        self.pool = pool
+        self.store = store or FileStore()
+        self.verbose = verbose
+
+
+def serve(pool, host='127.0.0.1', port=8079, verbose=False, on_ready=None):
+    """Run the HTTP front of ``pool`` until interrupted"""
+    server = ConversionServer((host, port), pool, verbose=verbose)
+    if on_ready is not None:
+        on_ready(server)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,31 @@
+"""Defaults shared by the extractor and the command line (kept import-free)"""
+
+import os
+
+ENGINES = ('stream', 'docx')
+# Documentation formats written by extract/docs, and their file extensions
+DOC_FORMATS = ('markdown', 'json', 'ndjson')
+DOC_EXTENSIONS = {'markdown': '.md', 'json': '.json', 'ndjson': '.ndjson'}
+SUMMARY_FILENAME = 'TEMPLATE_PLACEHOLDERS_SUMMARY.json'
+DEFAULT_OUTPUT_DIR = 'documentation'
+DEFAULT_CACHE_DIR = os.path.join('.cache', 'placeholders')
+DEFAULT_CACHE_MB = 32
+DEFAULT_COMPILED_DIR = os.path.join('.cache', 'compiled')
+DEFAULT_PREVIEW_DIR = os.path.join('.cache', 'preview')
+DEFAULT_TEMPLATE_DIR = os.path.join('public', 'template')
+DEFAULT_ROUTES_DIR = os.path.join('src', 'app', 'api')
+DEFAULT_ARCHIVE_DIR = os.path.join('public', 'storage', 'surat')
+DEFAULT_AUDIT_STATE = os.path.join('.cache', 'audit-state.json')
+DEFAULT_INDEX_PATH = os.path.join('.cache', 'placeholder-index.json')
+DEFAULT_SEARCH_DB = os.path.join('.cache', 'letters.sqlite')
+
+# --watch: seconds between polls / quiet period after a save
+DEFAULT_WATCH_INTERVAL = 1.0
+DEFAULT_WATCH_DEBOUNCE = 1.5
+
+# convert-server: local stand-in for ConvertAPI
+DEFAULT_CONVERT_HOST = '127.0.0.1'
+DEFAULT_CONVERT_PORT = 8079
+DEFAULT_CONVERT_WORKERS = 2
+DEFAULT_CONVERT_MAX_JOBS = 50
+DEFAULT_CONVERT_TIMEOUT = 60.0
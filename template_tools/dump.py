@@ -0,0 +1,59 @@
+"""
+Quick looks inside a template
+=============================
+
+Helpers behind ``python -m template_tools dump``: every delimiter style found
+in the document (what read_template.py printed), the run-merged text (what
+read_template_simple.py printed) and the paragraph/table layout (what
+scripts/extract-f103-detailed.py printed). Only zipfile and ElementTree are
+used; python-docx is never imported.
+"""
+
+import zipfile
+
+from template_tools.parts import DOCUMENT_PART
+from template_tools.scanner import (
+    BRACE_PATTERNS,
+    DOCXTEMPLATER_PATTERNS,
+    MultiPatternScanner,
+    merged_text_bytes,
+)
+from template_tools.text_index import LINE_BREAK, layout_text
+
+# {{..}}, {..}, [..], <..> plus docxtemplater {#loop} {/loop} {^inv} {@raw},
+# all matched in a single pass
+SCANNER = MultiPatternScanner(BRACE_PATTERNS + DOCXTEMPLATER_PATTERNS)
+
+
+def read_part(docx_path, part=DOCUMENT_PART):
+    with zipfile.ZipFile(docx_path) as zf:
+        return zf.read(part)
+
+
+def document_text(docx_path):
+    """Run-merged text of the main document, one line per paragraph"""
+    return layout_text(read_part(docx_path)).replace(LINE_BREAK, '\n')
+
+
+def scan_delimiters(docx_path, scanner=SCANNER):
+    """Sorted unique ``(kind, value)`` pairs plus the run-merged text"""
+    xml = read_part(docx_path)
+    matches = sorted({(match.kind, match.value) for match in scanner.scan(merged_text_bytes(xml))})
+    return matches, layout_text(xml).replace(LINE_BREAK, '\n')
+
+
+def document_structure(docx_path):
+    """``(location, text)`` of every non-empty paragraph, table cell and text box"""
+    # Imported here so `dump` without --structure stays on the byte scanner
+    from template_tools.extractor import StreamingDocumentReader
+    from template_tools.locations import format_location
+
+    with zipfile.ZipFile(docx_path) as zf:
+        with zf.open(DOCUMENT_PART) as xml_file:
+            paragraphs, tables, text_boxes = StreamingDocumentReader(
+                xml_file, keep=lambda text: bool(text.strip()),
+            ).read()
+    return [
+        (format_location('', *location), text)
+        for location, text in paragraphs + tables + text_boxes
+    ]
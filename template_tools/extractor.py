@@ -0,0 +1,954 @@
+"""
+Placeholder extraction engine
+=============================
+
+``PlaceholderExtractor`` finds every ``{placeholder}`` in a template and
+records where it occurs in a ``LocationIndex`` (labelled "Paragraph 3",
+"Table 1, Row 2, Cell 1", "header1.xml > Paragraph 1" when rendered), then
+renders markdown documentation and TypeScript snippets from the result.
+
+Two engines give the same results:
+
+- ``stream`` (default): ``StreamingDocumentReader`` walks each part with
+  iterparse, no python-docx needed; also covers headers, footers,
+  footnotes/endnotes and text boxes
+- ``docx``: the python-docx object model, body only; python-docx is
+  imported only when this engine is used
+
+Results can be cached on disk (``ExtractionCache``) and many templates can
+be extracted over a process pool (``run_batch``).
+"""
+
+import os
+import json
+import zipfile
+import zlib
+import contextlib
+import hashlib
+import re
+import xml.etree.ElementTree as ET
+from itertools import zip_longest
+from pathlib import Path
+
+from template_tools.defaults import (
+    DEFAULT_CACHE_DIR,
+    DEFAULT_CACHE_MB,
+    DOC_EXTENSIONS,
+    DOC_FORMATS,
+    ENGINES,
+)
+from template_tools.locations import NO_CELLS, LocationIndex
+from template_tools.parts import DocumentPart, candidate_members, discover_parts, part_label
+
+DOCUMENT_PART = 'word/document.xml'
+# Line of the generated markdown that changes on every run
+TIMESTAMP_PREFIX = '**Generated**: '
+# The same in any documentation format (markdown line, JSON / NDJSON field)
+TIMESTAMP_RE = re.compile(r'^\*\*Generated\*\*: .*|"generated": "[^"]*"')
+# Bump when extraction output changes for the same template bytes
+CACHE_VERSION = 3
+
+W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+W_BODY = W + 'body'
+W_HDR = W + 'hdr'
+W_FTR = W + 'ftr'
+W_FOOTNOTES = W + 'footnotes'
+W_ENDNOTES = W + 'endnotes'
+W_FOOTNOTE = W + 'footnote'
+W_ENDNOTE = W + 'endnote'
+W_TXBX_CONTENT = W + 'txbxContent'
+W_P = W + 'p'
+W_R = W + 'r'
+W_T = W + 't'
+W_BR = W + 'br'
+W_HYPERLINK = W + 'hyperlink'
+W_TBL = W + 'tbl'
+W_TR = W + 'tr'
+W_TC = W + 'tc'
+W_TRPR = W + 'trPr'
+W_TCPR = W + 'tcPr'
+W_GRID_BEFORE = W + 'gridBefore'
+W_GRID_SPAN = W + 'gridSpan'
+W_V_MERGE = W + 'vMerge'
+W_VAL = W + 'val'
+W_TYPE = W + 'type'
+MC_FALLBACK = '{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback'
+
+# Root elements of the parts scanned, and note wrappers inside them
+CONTAINER_TAGS = {W_BODY, W_HDR, W_FTR, W_FOOTNOTES, W_ENDNOTES}
+NOTE_TAGS = {W_FOOTNOTE, W_ENDNOTE}
+
+# Run children python-docx translates to text (besides w:t and w:br)
+RUN_TEXT = {
+    W + 'tab': '\t',
+    W + 'ptab': '\t',
+    W + 'cr': '\n',
+    W + 'noBreakHyphen': '-',
+}
+
+
+def has_braces(text):
+    """Cheap pre-check used before running the placeholder regex"""
+    return '{' in text and '}' in text
+
+
+class _Container:
+    """Open block container (body, header, footer, notes, text box) while streaming"""
+    __slots__ = ('box', 'paragraphs', 'tables', 'paragraph_count', 'table_count')
+
+    def __init__(self, box):
+        self.box = box          # text box number, 0 for the part itself
+        self.paragraphs = []
+        self.tables = []
+        self.paragraph_count = 0
+        self.table_count = 0
+
+
+class _Table:
+    """Open w:tbl while streaming"""
+    __slots__ = ('num', 'sink', 'box', 'row', 'grid_col', 'cell_idx', 'above', 'current')
+
+    def __init__(self, num, sink, box=None):
+        self.num = num
+        self.sink = sink        # list receiving (location, text)
+        self.box = box          # None for a table nested in a cell
+        self.row = 0
+        self.grid_col = 0
+        self.cell_idx = 0
+        self.above = {}         # {grid_col: (span, entries)} of previous row
+        self.current = {}
+
+
+class _Cell:
+    """Open w:tc while streaming"""
+    __slots__ = ('table', 'span', 'v_merge', 'paragraphs', 'nested')
+
+    def __init__(self, table):
+        self.table = table
+        self.span = 1
+        self.v_merge = None
+        self.paragraphs = []    # (None, text) for the cell's own paragraphs
+        self.nested = []        # (cells below this one, text) from nested tables
+
+
+class _Paragraph:
+    """Open w:p while streaming"""
+    __slots__ = ('pieces', 'sink', 'location')
+
+    def __init__(self, sink, location):
+        self.pieces = []
+        self.sink = sink
+        self.location = location
+
+
+class StreamingDocumentReader:
+    """Incremental reader for one WordprocessingML part.
+
+    For word/document.xml it gives the same view python-docx exposes through
+    ``doc.paragraphs`` and ``doc.tables``: direct body paragraphs, direct
+    body tables, nested tables inside cells, horizontally spanned cells
+    repeated per grid column and vertically merged cells resolved to the
+    cell above. Headers, footers and footnote/endnote parts are read the
+    same way, and text boxes (``w:txbxContent``, skipping the duplicate VML
+    fallback copy) are reported separately as "Text Box N > ...".
+
+    Locations are ``(box, paragraph, cells)`` tuples (see
+    ``template_tools.locations``); ``format_location`` turns them into the
+    labels python-docx users know.
+
+    Every element is cleared and detached as soon as its end tag is seen, so
+    peak memory only depends on the texts that are kept, not on the size of
+    the part.
+    """
+
+    def __init__(self, source, keep=has_braces, text_boxes=True):
+        self.source = source
+        self.keep = keep
+        self.text_boxes = text_boxes
+
+    def read(self):
+        """Return ``(paragraphs, tables, text_boxes)`` as lists of ``(location, text)``"""
+        root = None
+        text_boxes = []
+        elements = []
+        states = []
+        text_box_count = 0
+        fallback_depth = 0
+
+        for event, elem in ET.iterparse(self.source, events=('start', 'end')):
+            tag = elem.tag
+
+            if event == 'start':
+                parent = states[-1] if states else None
+                state = None
+
+                if tag in CONTAINER_TAGS and root is None:
+                    state = root = _Container(0)
+                elif tag in NOTE_TAGS and isinstance(parent, _Container):
+                    state = parent
+                elif tag == W_TXBX_CONTENT:
+                    if self.text_boxes and not fallback_depth:
+                        text_box_count += 1
+                        state = _Container(text_box_count)
+                elif tag == MC_FALLBACK:
+                    fallback_depth += 1
+                elif tag == W_P:
+                    if isinstance(parent, _Container):
+                        parent.paragraph_count += 1
+                        state = _Paragraph(
+                            parent.paragraphs, (parent.box, parent.paragraph_count, NO_CELLS),
+                        )
+                    elif isinstance(parent, _Cell):
+                        state = _Paragraph(parent.paragraphs, None)
+                elif tag == W_R or tag == W_HYPERLINK:
+                    if isinstance(parent, _Paragraph):
+                        state = ('hyperlink' if tag == W_HYPERLINK else 'run', parent)
+                    elif tag == W_R and isinstance(parent, tuple) and parent[0] == 'hyperlink':
+                        state = ('run', parent[1])
+                elif tag == W_TBL:
+                    if isinstance(parent, _Container):
+                        parent.table_count += 1
+                        state = _Table(parent.table_count, parent.tables, parent.box)
+                    elif isinstance(parent, _Cell):
+                        # python-docx labels nested tables with the parent's number
+                        state = _Table(parent.table.num, parent.nested)
+                elif tag == W_TR and isinstance(parent, _Table):
+                    parent.row += 1
+                    parent.grid_col = 0
+                    parent.cell_idx = 0
+                    parent.above, parent.current = parent.current, {}
+                    state = ('tr', parent)
+                elif tag == W_TC and isinstance(parent, tuple) and parent[0] == 'tr':
+                    state = _Cell(parent[1])
+                elif tag == W_TRPR and isinstance(parent, tuple) and parent[0] == 'tr':
+                    state = ('trPr', parent[1])
+                elif tag == W_TCPR and isinstance(parent, _Cell):
+                    state = ('tcPr', parent)
+
+                elements.append(elem)
+                states.append(state)
+                continue
+
+            # event == 'end'
+            state = states.pop()
+            elements.pop()
+            parent = states[-1] if states else None
+
+            if isinstance(parent, tuple) and parent[0] == 'run':
+                pieces = parent[1].pieces
+                if tag == W_T:
+                    pieces.append(elem.text or '')
+                elif tag == W_BR:
+                    if elem.get(W_TYPE, 'textWrapping') == 'textWrapping':
+                        pieces.append('\n')
+                elif tag in RUN_TEXT:
+                    pieces.append(RUN_TEXT[tag])
+            elif isinstance(parent, tuple) and parent[0] == 'tcPr':
+                if tag == W_GRID_SPAN:
+                    parent[1].span = int(elem.get(W_VAL, '1'))
+                elif tag == W_V_MERGE:
+                    parent[1].v_merge = elem.get(W_VAL, 'continue')
+            elif isinstance(parent, tuple) and parent[0] == 'trPr':
+                if tag == W_GRID_BEFORE:
+                    parent[1].grid_col = int(elem.get(W_VAL, '0'))
+
+            if isinstance(state, _Paragraph):
+                text = ''.join(state.pieces)
+                if self.keep(text):
+                    state.sink.append((state.location, text))
+            elif isinstance(state, _Cell):
+                self._close_cell(state)
+            elif tag == W_TXBX_CONTENT and isinstance(state, _Container):
+                text_boxes.extend(state.paragraphs)
+                text_boxes.extend(state.tables)
+            elif tag == MC_FALLBACK:
+                fallback_depth -= 1
+
+            # Drop the handled subtree so the tree never grows
+            elem.clear()
+            if elements:
+                elements[-1].remove(elem)
+
+        if root is None:
+            return [], [], text_boxes
+        return root.paragraphs, root.tables, text_boxes
+
+    @staticmethod
+    def _close_cell(cell):
+        """Emit a finished cell once per grid column it covers"""
+        table = cell.table
+        span = cell.span
+        entries = cell.paragraphs + cell.nested
+
+        if cell.v_merge == 'continue' and table.grid_col in table.above:
+            span, entries = table.above[table.grid_col]
+        table.current[table.grid_col] = (span, entries)
+
+        for _ in range(span):
+            table.cell_idx += 1
+            here = ((table.num, table.row, table.cell_idx),)
+            for below, text in entries:
+                cells = here if below is None else here + below
+                # Nested tables hand their cells up; the outermost one locates them
+                table.sink.append((cells if table.box is None else (table.box, 0, cells), text))
+
+        table.grid_col += cell.span
+
+
+class ExtractionCache:
+    """Persistent, content-addressed cache of extraction results.
+
+    The key is built from the template path, the engine and the CRC32 and
+    uncompressed size of every part that can be scanned (plus the package
+    files that decide which parts are scanned) as recorded in the zip
+    central directory, so computing it never decompresses anything. Entries are
+    ``LocationIndex`` files in their binary form; the least recently used ones
+    are evicted once the directory grows past ``max_bytes``.
+    """
+    SUFFIX = '.idx'
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_CACHE_MB * 1024 * 1024,
+                 rebuild=False):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.rebuild = rebuild
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key_for(docx_path, engine='stream', all_parts=True):
+        """Cache key from the zip central directory (raises BadZipFile/KeyError)"""
+        with zipfile.ZipFile(docx_path) as zf:
+            zf.getinfo(DOCUMENT_PART)
+            parts = [[info.filename, info.CRC, info.file_size] for info in candidate_members(zf)]
+        ident = json.dumps({
+            'version': CACHE_VERSION,
+            'engine': engine,
+            'all_parts': all_parts,
+            'path': Path(os.path.abspath(docx_path)).as_posix(),
+            'parts': parts,
+        }, sort_keys=True)
+        return hashlib.sha256(ident.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}{self.SUFFIX}")
+
+    def get(self, key):
+        """Return the cached LocationIndex for ``key`` or None (counts hits/misses)"""
+        if not self.rebuild:
+            path = self._entry_path(key)
+            try:
+                index = LocationIndex.load(path)
+                os.utime(path)  # mark as recently used for eviction
+                self.hits += 1
+                return index
+            except (OSError, ValueError):
+                pass
+        self.misses += 1
+        return None
+
+    def put(self, key, index):
+        """Store an extraction result and evict old entries if over budget"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._entry_path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        index.save(tmp_path)
+        # Atomic so parallel batch workers never see half-written entries
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes"""
+        entries = []
+        total = 0
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return
+        for name in names:
+            if not name.endswith(self.SUFFIX):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass  # already evicted by another worker
+            total -= size
+
+
+class ExtractionError(Exception):
+    """A template could not be read (not a zip, missing or corrupt part)"""
+
+
+class PlaceholderExtractor:
+    def __init__(self, docx_path, engine='stream', cache=None, all_parts=True, profiler=None):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine: {engine} (choose from {', '.join(ENGINES)})")
+        self.docx_path = docx_path
+        self.template_name = Path(docx_path).stem
+        self.engine = engine
+        # Headers, footers, notes and text boxes (stream engine only)
+        self.all_parts = all_parts and engine == 'stream'
+        self.cache = cache
+        self.cache_status = None  # 'hit' / 'miss' when a cache is used
+        self.cache_error = None  # why the cache entry could not be written
+        self.index = LocationIndex()  # every occurrence, structured
+        self.doc = None
+        self.documentation_changed = None  # set by save_documentation
+        self.profiler = profiler  # template_tools.profiling.Profiler, times each phase
+
+    def _phase(self, name):
+        return self.profiler.phase(name) if self.profiler else contextlib.nullcontext()
+
+    def open_document(self):
+        """Load DOCX document (python-docx object model, or just open the zip
+        when streaming); raises ExtractionError, prints nothing"""
+        try:
+            if self.engine == 'docx':
+                from docx import Document
+                self.doc = Document(self.docx_path)
+            else:
+                with zipfile.ZipFile(self.docx_path) as zf:
+                    zf.getinfo(DOCUMENT_PART)
+        except Exception as e:
+            raise ExtractionError(f"Error loading document: {e}") from e
+
+    def load_document(self):
+        """Load DOCX document, printing the outcome; False on error"""
+        try:
+            self.open_document()
+        except ExtractionError as e:
+            print(f"❌ {e}")
+            return False
+        print(f"✅ Loaded: {self.docx_path}")
+        return True
+
+    @property
+    def placeholders(self):
+        """``{placeholder: [location labels]}``, formatted from the index on access"""
+        return self.index.labels()
+
+    def extract_from_text(self, text, location, part=''):
+        """Extract placeholders from text and record location"""
+        # {name} where name is NAME_CHARS (letters, digits, _ / - .), found by
+        # text_index.iter_placeholders; '{/list}' counts as a name here
+        self.index.add_text(text, location, part)
+
+    def extract_from_paragraphs(self):
+        """Extract placeholders from all paragraphs"""
+        for i, para in enumerate(self.doc.paragraphs):
+            text = para.text
+            if has_braces(text):
+                self.extract_from_text(text, (0, i + 1, NO_CELLS))
+
+    def extract_from_tables(self):
+        """Extract placeholders from all tables (including nested)"""
+        for table_idx, table in enumerate(self.doc.tables):
+            self._extract_from_table(table, table_idx + 1)
+
+    def _extract_from_table(self, table, table_num, parent_cells=NO_CELLS):
+        """Recursively extract from table and nested tables"""
+        for row_idx, row in enumerate(table.rows):
+            for cell_idx, cell in enumerate(row.cells):
+                cells = parent_cells + ((table_num, row_idx + 1, cell_idx + 1),)
+
+                # Extract from cell paragraphs
+                for para in cell.paragraphs:
+                    text = para.text
+                    if has_braces(text):
+                        self.extract_from_text(text, (0, 0, cells))
+
+                # Handle nested tables
+                for nested_table in cell.tables:
+                    self._extract_from_table(nested_table, table_num, cells)
+
+    def extract_streaming(self):
+        """Extract from every scanned part: one zip open, one incremental pass per part"""
+        with zipfile.ZipFile(self.docx_path) as zf:
+            with self._phase('discover_parts'):
+                if self.all_parts:
+                    parts = discover_parts(zf)
+                else:
+                    parts = [DocumentPart(DOCUMENT_PART, 'document')]
+
+            for part in parts:
+                # Main document keeps the plain "Paragraph N" labels
+                label = '' if part.kind == 'document' else part_label(part.name)
+                # Inflating the part and iterparse run interleaved, timed together
+                with self._phase('parse_xml'), zf.open(part.name) as xml_file:
+                    reader = StreamingDocumentReader(xml_file, text_boxes=self.all_parts)
+                    paragraphs, tables, text_boxes = reader.read()
+
+                # Same order as the python-docx engine: paragraphs first, then tables
+                with self._phase('scan_placeholders'):
+                    for location, text in paragraphs:
+                        self.extract_from_text(text, location, label)
+                    for location, text in tables:
+                        self.extract_from_text(text, location, label)
+                    for location, text in text_boxes:
+                        self.extract_from_text(text, location, label)
+
+    def extract(self):
+        """Extract all placeholders into ``self.index`` and return it.
+
+        Prints nothing: an unreadable template raises ExtractionError, and a
+        cache entry that could not be written is left in ``cache_error``.
+        """
+        cache_key = None
+        if self.cache is not None:
+            with self._phase('cache_lookup'):
+                try:
+                    cache_key = self.cache.key_for(self.docx_path, self.engine, self.all_parts)
+                except (OSError, zipfile.BadZipFile, KeyError):
+                    cache_key = None  # unreadable zip: let open_document report it
+                cached = None if cache_key is None else self.cache.get(cache_key)
+            if cache_key is not None:
+                self.cache_status = 'miss' if cached is None else 'hit'
+                if cached is not None:
+                    self.index = cached
+                    return self.index
+
+        with self._phase('load_document'):
+            self.open_document()
+
+        if self.engine == 'docx':
+            with self._phase('extract_from_paragraphs'):
+                self.extract_from_paragraphs()
+            with self._phase('extract_from_tables'):
+                self.extract_from_tables()
+        else:
+            try:
+                self.extract_streaming()
+            except (zipfile.BadZipFile, zlib.error, KeyError, ValueError, ET.ParseError) as e:
+                # zlib.error: corrupt deflate data in a part
+                raise ExtractionError(f"Error reading document: {e}") from e
+
+        if cache_key is not None:
+            try:
+                with self._phase('cache_store'):
+                    self.cache.put(cache_key, self.index)
+            except OSError as e:
+                self.cache_error = str(e)
+        return self.index
+
+    def extract_all(self):
+        """Extract all placeholders, printing progress; False on error"""
+        try:
+            self.extract()
+        except ExtractionError as e:
+            print(f"❌ {e}")
+            return False
+        print(self.report())
+        return True
+
+    def report(self):
+        """Outcome of a successful ``extract`` as console lines"""
+        if self.cache_status == 'hit':
+            lines = [f"✅ Loaded from cache: {self.docx_path}"]
+        else:
+            lines = [f"✅ Loaded: {self.docx_path}"]
+        if self.cache_error is not None:
+            lines.append(f"⚠️  Could not write cache entry: {self.cache_error}")
+        lines.append(f"✅ Found {len(self.index.names)} unique placeholders")
+        return '\n'.join(lines)
+
+    def get_sorted_placeholders(self):
+        """Get sorted list of placeholders"""
+        return self.index.placeholder_names()
+
+    def iter_markdown_doc(self):
+        """Markdown documentation, yielded a line (or a few) at a time"""
+        placeholders = self.get_sorted_placeholders()
+        # Row numbers only: each label is formatted as its line is written
+        rows = self.index.rows_by_name()
+
+        yield f"# {self.template_name}.docx - Template Placeholders\n\n"
+        yield f"{TIMESTAMP_PREFIX}{self._get_timestamp()}\n\n"
+        yield f"**Total Placeholders**: {len(placeholders)}\n\n"
+
+        # Table of contents
+        yield "## Table of Contents\n\n"
+        yield "1. [Placeholder List](#placeholder-list)\n"
+        yield "2. [Placeholder Locations](#placeholder-locations)\n"
+        yield "3. [TypeScript Interface](#typescript-interface)\n"
+        yield "4. [Template Data Mapping](#template-data-mapping)\n"
+        yield "5. [Usage Example](#usage-example)\n\n"
+
+        # Placeholder list
+        yield "## Placeholder List\n\n"
+        yield f"Total: **{len(placeholders)}** placeholders\n\n"
+
+        for i, placeholder in enumerate(placeholders, 1):
+            yield f"{i}. `{{{placeholder}}}`\n"
+
+        # Placeholder locations
+        yield "\n## Placeholder Locations\n\n"
+        yield "Shows where each placeholder appears in the document:\n\n"
+
+        for placeholder in placeholders:
+            occurrences = rows[placeholder]
+            yield f"### `{{{placeholder}}}`\n\n"
+            if len(occurrences) > 1:
+                yield f"**Appears {len(occurrences)} times:**\n\n"
+            for loc in self.index.iter_labels(occurrences):
+                yield f"- {loc}\n"
+            yield "\n"
+
+        # TypeScript interface
+        yield "## TypeScript Interface\n\n"
+        yield "```typescript\n"
+        yield f"interface {self._to_pascal_case(self.template_name)}FormData {{\n"
+
+        for placeholder in placeholders:
+            # Convert placeholder to camelCase field name
+            yield f"  {self._to_camel_case(placeholder)}: string;\n"
+
+        yield "}\n```\n\n"
+
+        # Template data mapping
+        yield "## Template Data Mapping\n\n"
+        yield "```typescript\n"
+        yield "const templateData = {\n"
+
+        for placeholder in placeholders:
+            yield f"  {self._mapping(placeholder)},\n"
+
+        yield "};\n```\n\n"
+
+        # Usage example
+        yield "## Usage Example\n\n"
+        yield "```typescript\n"
+        yield "import Docxtemplater from 'docxtemplater';\n"
+        yield "import PizZip from 'pizzip';\n"
+        yield "import { readFileSync } from 'fs';\n"
+        yield "import { join } from 'path';\n\n"
+
+        yield "// Load template\n"
+        yield f"const templatePath = join(process.cwd(), 'public', 'template', '{self.template_name}.docx');\n"
+        yield "const content = readFileSync(templatePath, 'binary');\n\n"
+
+        yield "const zip = new PizZip(content);\n"
+        yield "const doc = new Docxtemplater(zip, {\n"
+        yield "  paragraphLoop: true,\n"
+        yield "  linebreaks: true,\n"
+        yield "  nullGetter: function() {\n"
+        yield "    return '';\n"
+        yield "  },\n"
+        yield "});\n\n"
+
+        yield "// Prepare template data\n"
+        yield "const templateData = {\n"
+
+        # Show first 5 placeholders as example
+        for placeholder in placeholders[:5]:
+            if '/' in placeholder or '-' in placeholder:
+                yield f"  '{placeholder}': formData.{self._to_camel_case(placeholder)} || '',\n"
+            else:
+                yield f"  {placeholder}: formData.{placeholder} || '',\n"
+
+        if len(placeholders) > 5:
+            yield "  // ... (see Template Data Mapping section for complete list)\n"
+
+        yield "};\n\n"
+
+        yield "// Render document\n"
+        yield "doc.render(templateData);\n\n"
+
+        yield "// Generate DOCX buffer\n"
+        yield "const buffer = doc.getZip().generate({\n"
+        yield "  type: 'nodebuffer',\n"
+        yield "  compression: 'DEFLATE',\n"
+        yield "});\n"
+        yield "```\n\n"
+
+        # Notes
+        yield "## Notes\n\n"
+        yield "- All placeholders use the format `{placeholder_name}`\n"
+        yield "- Empty strings (`''`) are used as default values\n"
+        yield "- Special characters in placeholder names require quotes in object keys\n"
+        yield f"- Template file: `public/template/{self.template_name}.docx`\n\n"
+
+        # Warnings for special cases
+        special_chars = [p for p in placeholders if _needs_quotes(p)]
+        if special_chars:
+            yield "### ⚠️ Special Characters\n\n"
+            yield "The following placeholders contain special characters and require quotes:\n\n"
+            for p in special_chars:
+                yield f"- `{{{p}}}` → `'{p}': formData.{self._to_camel_case(p)}`\n"
+            yield "\n"
+
+    def generate_markdown_doc(self):
+        """Markdown documentation as one string"""
+        return ''.join(self.iter_markdown_doc())
+
+    def _placeholder_records(self):
+        """One dict per placeholder: locations and TypeScript mapping"""
+        rows = self.index.rows_by_name()
+        for placeholder in self.get_sorted_placeholders():
+            yield {
+                'name': placeholder,
+                'field': self._to_camel_case(placeholder),
+                'mapping': self._mapping(placeholder),
+                'locations': list(self.index.iter_labels(rows[placeholder])),
+            }
+
+    def _header_record(self):
+        return {
+            'generated': self._get_timestamp(),
+            'template': self.template_name,
+            'file': f"public/template/{self.template_name}.docx",
+            'total': len(self.index.names),
+            'interface': f"{self._to_pascal_case(self.template_name)}FormData",
+        }
+
+    def iter_json_doc(self):
+        """JSON documentation: the header fields and a ``placeholders``
+        array, one placeholder per line"""
+        yield "{\n"
+        for key, value in self._header_record().items():
+            yield f"  {json.dumps(key)}: {json.dumps(value, ensure_ascii=False)},\n"
+        yield '  "placeholders": ['
+        separator = "\n"
+        for record in self._placeholder_records():
+            yield f"{separator}    {json.dumps(record, ensure_ascii=False)}"
+            separator = ",\n"
+        yield "\n  ]\n}\n"
+
+    def iter_ndjson_doc(self):
+        """NDJSON documentation: a ``template`` line, then one line per placeholder"""
+        yield json.dumps({'type': 'template', **self._header_record()}, ensure_ascii=False) + "\n"
+        for record in self._placeholder_records():
+            yield json.dumps({'type': 'placeholder', **record}, ensure_ascii=False) + "\n"
+
+    def iter_documentation(self, doc_format='markdown'):
+        """Chunks of the documentation in one of ``DOC_FORMATS``"""
+        if doc_format not in DOC_FORMATS:
+            raise ValueError(f"Unknown format: {doc_format} (choose from {', '.join(DOC_FORMATS)})")
+        return getattr(self, f"iter_{doc_format}_doc")()
+
+    def iter_console_output(self):
+        """Formatted console output, a line at a time"""
+        placeholders = self.get_sorted_placeholders()
+
+        yield "=" * 70 + "\n"
+        yield f"PLACEHOLDERS FROM {self.template_name}.docx\n"
+        yield "=" * 70 + "\n\n"
+
+        yield f"Total placeholders found: {len(placeholders)}\n\n"
+
+        for i, placeholder in enumerate(placeholders, 1):
+            yield f"{i:2}. {{{placeholder}}}\n"
+
+        yield "\n" + "=" * 70 + "\n"
+
+    def generate_console_output(self):
+        """Formatted console output as one string"""
+        return ''.join(self.iter_console_output())
+
+    def save_documentation(self, output_dir="documentation", doc_format='markdown'):
+        """Stream the documentation to ``<NAME>_PLACEHOLDERS.<ext>``.
+
+        The chunks go to a temporary file next to the target, which then
+        replaces it, unless only the "Generated" timestamp differs: the
+        existing file is then left alone. ``documentation_changed`` tells
+        which case happened.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+
+        filename = f"{self.template_name.upper()}_PLACEHOLDERS{DOC_EXTENSIONS[doc_format]}"
+        filepath = os.path.join(output_dir, filename)
+        tmp_path = f"{filepath}.{os.getpid()}.tmp"
+
+        chunks = self.iter_documentation(doc_format)
+        # Generating and writing are interleaved, timed together
+        try:
+            with self._phase(f'generate_{doc_format}_doc'), open(tmp_path, 'w', encoding='utf-8') as f:
+                f.writelines(chunks)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+            raise
+
+        with self._phase('save_documentation'):
+            self.documentation_changed = not _same_apart_from_timestamp(filepath, tmp_path)
+            if self.documentation_changed:
+                os.replace(tmp_path, filepath)
+            else:
+                os.remove(tmp_path)
+
+        return filepath
+
+    def _mapping(self, placeholder):
+        """``templateData`` entry of a placeholder (quoted key when needed)"""
+        if _needs_quotes(placeholder):
+            return f"'{placeholder}': formData.{self._to_camel_case(placeholder)} || ''"
+        return f"{placeholder}: formData.{placeholder} || ''"
+
+    def _to_camel_case(self, text):
+        """Convert placeholder to camelCase"""
+        # Replace special characters with underscore
+        text = text.replace('/', '_').replace('-', '_').replace('.', '_')
+
+        # Split by underscore
+        parts = text.split('_')
+
+        # First part lowercase, rest capitalized
+        if len(parts) == 1:
+            return parts[0].lower()
+
+        return parts[0].lower() + ''.join(word.capitalize() for word in parts[1:])
+
+    def _to_pascal_case(self, text):
+        """Convert to PascalCase"""
+        text = text.replace('/', '_').replace('-', '_').replace('.', '_')
+        parts = text.split('_')
+        return ''.join(word.capitalize() for word in parts)
+
+    def _get_timestamp(self):
+        """Get current timestamp"""
+        from datetime import datetime
+        return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def strip_timestamp(markdown):
+    """Markdown without its "Generated" line, for change detection"""
+    return '\n'.join(line for line in markdown.split('\n') if not line.startswith(TIMESTAMP_PREFIX))
+
+
+def _needs_quotes(placeholder):
+    """Placeholder that is not a valid bare TypeScript object key"""
+    return '/' in placeholder or '-' in placeholder or '.' in placeholder
+
+
+def _same_apart_from_timestamp(path, other_path):
+    """Both files hold the same documentation, compared line by line
+    without reading either whole; False when ``path`` is unreadable"""
+    try:
+        with open(path, 'r', encoding='utf-8') as a, open(other_path, 'r', encoding='utf-8') as b:
+            lines = zip_longest(
+                (TIMESTAMP_RE.sub('', line) for line in a),
+                (TIMESTAMP_RE.sub('', line) for line in b),
+            )
+            return all(x == y for x, y in lines)
+    except (OSError, UnicodeDecodeError):
+        return False
+
+
+def make_cache(cache_options):
+    """Build an ExtractionCache from picklable options (None disables caching)"""
+    if cache_options is None:
+        return None
+    return ExtractionCache(**cache_options)
+
+
+def extract_template(docx_path, engine='stream', output_dir="documentation", cache_options=None,
+                     all_parts=True, profile_options=None, doc_format='markdown'):
+    """Extract one template and save its documentation (batch worker).
+
+    Never raises: a corrupt or unreadable template is reported in the
+    returned dict so the rest of the batch keeps going. With
+    ``profile_options`` (``Profiler`` keyword arguments) the dict also
+    holds the phase ``profile`` and, with cProfile, its ``function_stats``.
+    """
+    result = {
+        'template': Path(docx_path).stem,
+        'path': Path(docx_path).as_posix(),
+        'ok': False,
+        'error': None,
+        'cache': None,
+        'documentation': None,
+        'documentation_changed': False,
+        'total': 0,
+        'placeholders': {},
+    }
+    profiler = None
+    if profile_options is not None:
+        from template_tools.profiling import Profiler
+        profiler = Profiler(**profile_options).start()
+    try:
+        extractor = PlaceholderExtractor(
+            docx_path, engine=engine, cache=make_cache(cache_options), all_parts=all_parts,
+            profiler=profiler,
+        )
+        try:
+            extractor.extract()
+        except ExtractionError as e:
+            result['error'] = str(e)
+            return result
+        finally:
+            result['cache'] = extractor.cache_status
+        result['documentation'] = Path(extractor.save_documentation(output_dir, doc_format)).as_posix()
+        result['documentation_changed'] = extractor.documentation_changed
+        labels = extractor.index.labels()
+        result['placeholders'] = {p: labels[p] for p in extractor.get_sorted_placeholders()}
+        result['total'] = len(result['placeholders'])
+        result['ok'] = True
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    finally:
+        if profiler is not None:
+            profiler.stop()
+            result['profile'] = profiler.to_dict()
+            result['function_stats'] = profiler.function_stats()
+    return result
+
+
+def run_batch(docx_paths, engine='stream', output_dir="documentation", workers=None,
+              cache_options=None, all_parts=True, profile_options=None, doc_format='markdown'):
+    """Extract many templates over a process pool.
+
+    Results come back in the order of ``docx_paths`` regardless of which
+    worker finishes first.
+    """
+    workers = workers or os.cpu_count() or 1
+    workers = min(workers, len(docx_paths)) or 1
+
+    if workers == 1:
+        return [
+            extract_template(p, engine, output_dir, cache_options, all_parts, profile_options, doc_format)
+            for p in docx_paths
+        ]
+
+    # Imported here: it pulls in multiprocessing, which single-template runs never need
+    from concurrent.futures import ProcessPoolExecutor
+
+    n = len(docx_paths)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(
+            extract_template, docx_paths,
+            [engine] * n, [output_dir] * n, [cache_options] * n, [all_parts] * n,
+            [profile_options] * n, [doc_format] * n,
+        ))
+
+
+def format_cache_stats(hits, misses):
+    """One-line cache summary printed at the end of a run"""
+    return f"💾 Cache: {hits} hit{'s' if hits != 1 else ''}, {misses} miss{'es' if misses != 1 else ''}"
+
+
+def save_summary(results, summary_path, engine='stream'):
+    """Write the combined JSON summary of a batch run"""
+    from datetime import datetime
+    summary = {
+        'generated': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'engine': engine,
+        'total_templates': len(results),
+        'failed': [r['template'] for r in results if not r['ok']],
+        'templates': results,
+    }
+    os.makedirs(os.path.dirname(summary_path) or '.', exist_ok=True)
+    with open(summary_path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+        f.write('\n')
+    return summary_path
@@ -0,0 +1,226 @@
+"""
+Inverted placeholder index
+==========================
+
+Renaming a field such as ``kelamin_pemohon`` or ``nip_pejabat`` means
+finding every template that uses it. ``PlaceholderIndex`` keeps, in one
+JSON file, the placeholders and locations of every template extracted so
+far plus the inverted map ``name -> templates``, so a query never opens a
+.docx:
+
+    exact   ``nip_pejabat``
+    prefix  ``nama_`` (every name starting with it)
+    glob    ``*_pejabat``, ``tanggal_*`` (any query with ``*?[``)
+    fuzzy   ``kelamin_pemohn`` (closest names, for typos)
+
+Each template is stored with a content hash built like the extraction
+cache key, from the CRC32 and size of the scanned parts in the zip central
+directory. ``update`` extracts only the templates whose hash changed and
+forgets templates that no longer exist; ``extract``/``batch``/``docs``
+record what they extract as they go.
+
+Templates are keyed by their path relative to the directory of the index
+file, so the same index works from any working directory (and survives
+moving the repo); paths handed back are relative to the current one.
+"""
+
+import difflib
+import fnmatch
+import hashlib
+import json
+import os
+import zipfile
+from collections import namedtuple
+from pathlib import Path
+
+from template_tools.parts import candidate_members
+
+# Bumped when the file layout changes: older indexes are rebuilt
+# (2: keys relative to the index file, were relative to the working directory)
+INDEX_VERSION = 2
+QUERY_MODES = ('exact', 'prefix', 'glob', 'fuzzy')
+FUZZY_CUTOFF = 0.6
+
+Hit = namedtuple('Hit', 'name template locations')
+
+
+def content_hash(docx_path):
+    """Hash of the scanned parts' CRC32 and size (raises OSError/BadZipFile)"""
+    with zipfile.ZipFile(docx_path) as zf:
+        parts = [[info.filename, info.CRC, info.file_size] for info in candidate_members(zf)]
+    return hashlib.sha256(json.dumps(parts).encode('utf-8')).hexdigest()
+
+
+def query_mode(query, prefix=False, fuzzy=False):
+    """Mode of a CLI query: the flag given, else glob when it has ``*?[``"""
+    if fuzzy:
+        return 'fuzzy'
+    if prefix:
+        return 'prefix'
+    return 'glob' if any(c in query for c in '*?[') else 'exact'
+
+
+class PlaceholderIndex:
+    """Placeholders of many templates, queried without opening them.
+
+    Attributes:
+        path: the JSON file (None: in memory only)
+        base: directory the template keys are relative to (the index
+            file's, or the working directory when in memory)
+        templates: template key -> ``{'hash': ..., 'placeholders': {name: [label, ...]}}``
+        names: placeholder name -> sorted template keys
+    """
+
+    def __init__(self, path=None, rebuild=False):
+        self.path = path
+        self.base = os.path.dirname(os.path.abspath(path)) if path else os.getcwd()
+        self.templates = {}
+        self.names = {}
+        self.changed = rebuild
+        if path and os.path.exists(path) and not rebuild:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') == INDEX_VERSION:
+                    self.templates = data['templates']
+                    self.names = data['names']
+            except (OSError, ValueError, KeyError):
+                self.templates, self.names = {}, {}  # unreadable: rebuilt on update
+
+    def __len__(self):
+        return len(self.templates)
+
+    def _key(self, docx_path):
+        try:
+            key = os.path.relpath(os.path.abspath(docx_path), self.base)
+        except ValueError:
+            key = os.path.abspath(docx_path)  # another drive on Windows
+        return Path(key).as_posix()
+
+    def template_path(self, key):
+        """Path of the template stored under ``key``, relative to the working directory"""
+        # normpath first: '..' must not go through the index directory, which
+        # may not exist yet
+        path = os.path.normpath(os.path.join(self.base, key))
+        try:
+            return os.path.relpath(path)
+        except ValueError:
+            return path
+
+    def placeholders(self, docx_path):
+        """``{name: [label, ...]}`` of an indexed template (empty if not indexed)"""
+        return self.templates.get(self._key(docx_path), {}).get('placeholders', {})
+
+    # ------------------------------------------------------------ updates
+
+    def is_current(self, docx_path, digest):
+        entry = self.templates.get(self._key(docx_path))
+        return entry is not None and entry['hash'] == digest
+
+    def record(self, docx_path, digest, placeholders):
+        """Store one template's ``{name: [label, ...]}``"""
+        key = self._key(docx_path)
+        self._unlink(key)
+        self.templates[key] = {'hash': digest, 'placeholders': placeholders}
+        for name in placeholders:
+            templates = self.names.setdefault(name, [])
+            templates.append(key)
+            templates.sort()
+        self.changed = True
+
+    def record_results(self, results):
+        """Store the ok results of ``run_batch``/``extract_template``"""
+        for result in results:
+            if not result['ok']:
+                continue
+            try:
+                digest = content_hash(result['path'])
+            except (OSError, zipfile.BadZipFile):
+                continue
+            if not self.is_current(result['path'], digest):
+                self.record(result['path'], digest, result['placeholders'])
+
+    def forget(self, docx_path):
+        key = self._key(docx_path)
+        if key in self.templates:
+            self._unlink(key)
+            del self.templates[key]
+            self.changed = True
+
+    def _unlink(self, key):
+        for name in self.templates.get(key, {}).get('placeholders', ()):
+            templates = self.names.get(name)
+            if templates and key in templates:
+                templates.remove(key)
+                if not templates:
+                    del self.names[name]
+
+    def forget_missing(self):
+        """Drop templates whose file is gone; returns their paths"""
+        paths = [self.template_path(key) for key in self.templates]
+        gone = [path for path in paths if not os.path.exists(path)]
+        for path in gone:
+            self.forget(path)
+        return gone
+
+    def update(self, docx_paths, cache=None):
+        """Extract the templates whose content hash changed.
+
+        Returns ``(updated, unchanged, failed)`` path lists; failed entries
+        are ``(path, message)``.
+        """
+        from template_tools.extractor import ExtractionError, PlaceholderExtractor
+
+        updated, unchanged, failed = [], [], []
+        for docx_path in docx_paths:
+            try:
+                digest = content_hash(docx_path)
+            except (OSError, zipfile.BadZipFile) as e:
+                failed.append((docx_path, str(e)))
+                continue
+            if self.is_current(docx_path, digest):
+                unchanged.append(docx_path)
+                continue
+            extractor = PlaceholderExtractor(docx_path, cache=cache)
+            try:
+                extractor.extract()
+            except ExtractionError as e:
+                failed.append((docx_path, str(e)))
+                continue
+            labels = extractor.index.labels()
+            self.record(docx_path, digest, {name: labels[name] for name in sorted(labels)})
+            updated.append(docx_path)
+        return updated, unchanged, failed
+
+    def save(self):
+        if not self.path or not self.changed:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': INDEX_VERSION, 'templates': self.templates, 'names': self.names},
+                      f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self.changed = False
+
+    # ------------------------------------------------------------ queries
+
+    def matching_names(self, query, mode='exact'):
+        """Sorted names matching ``query`` (fuzzy: closest first)"""
+        if mode == 'exact':
+            return [query] if query in self.names else []
+        if mode == 'prefix':
+            return sorted(name for name in self.names if name.startswith(query))
+        if mode == 'glob':
+            return sorted(name for name in self.names if fnmatch.fnmatchcase(name, query))
+        if mode == 'fuzzy':
+            return difflib.get_close_matches(query, list(self.names), n=10, cutoff=FUZZY_CUTOFF)
+        raise ValueError(f"Unknown query mode: {mode} (choose from {', '.join(QUERY_MODES)})")
+
+    def lookup(self, query, mode='exact'):
+        """``Hit`` per matching name and template using it"""
+        return [
+            Hit(name, self.template_path(key), self.templates[key]['placeholders'][name])
+            for name in self.matching_names(query, mode)
+            for key in self.names[name]
+        ]
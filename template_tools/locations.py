@@ -0,0 +1,280 @@
+"""
+Structured placeholder locations
+================================
+
+Every occurrence of a placeholder used to be kept as a formatted string
+("Table 1, Row 3, Cell 2 > Table 1, Row 1, Cell 1"), which repeats the parent
+labels for each nested cell and can only be searched by string matching.
+``LocationIndex`` keeps occurrences as integer columns instead:
+
+    name       id into ``names`` (interned placeholder names)
+    part       id into ``parts``: '' for word/document.xml, else e.g. 'header1.xml'
+    box        text box number, 0 outside text boxes
+    paragraph  paragraph number in the body or text box, 0 inside tables
+    cells      id into ``paths``: ``(table, row, cell)`` triples from the
+               outermost table inward, ``()`` outside tables
+    offset     character offset of the ``{`` in the paragraph text
+
+A location inside one part is the tuple ``(box, paragraph, cells)``, which is
+what ``StreamingDocumentReader`` reports. Labels are only formatted when
+documentation is rendered (``Occurrence.label``, ``LocationIndex.labels``).
+``to_bytes``/``from_bytes`` give the compact binary form stored by the
+extraction cache.
+"""
+
+import struct
+import sys
+from array import array
+from collections import namedtuple
+
+from template_tools.text_index import iter_placeholders
+
+COLUMNS = ('name', 'part', 'box', 'paragraph', 'cells', 'offset')
+
+# Unsigned 32-bit column type ('I' is 4 bytes on every supported platform)
+_TYPECODE = 'I' if array('I').itemsize == 4 else 'L'
+
+MAGIC = b'TPLX'
+FORMAT_VERSION = 1
+_HEADER = struct.Struct('<4sHIIII')   # magic, version, names, parts, path ints, rows
+# Stored integer width in bytes -> array typecode
+_WIDTHS = {1: 'B', 2: 'H', 4: _TYPECODE}
+
+# Location of a paragraph directly in the body (or a text box), no tables
+NO_CELLS = ()
+
+
+def format_location(part, box, paragraph, cells):
+    """Human-readable label, e.g. "header1.xml > Table 1, Row 2, Cell 1" """
+    label = f"{part} > " if part else ''
+    if box:
+        label += f"Text Box {box} > "
+    if not cells:
+        return f"{label}Paragraph {paragraph}"
+    return label + ' > '.join(f"Table {table}, Row {row}, Cell {cell}" for table, row, cell in cells)
+
+
+def _narrowest(values):
+    largest = max(values, default=0)
+    if largest < 1 << 8:
+        return 'B'
+    return 'H' if largest < 1 << 16 else _TYPECODE
+
+
+class Occurrence(namedtuple('Occurrence', 'name part box paragraph cells offset')):
+    """One placeholder occurrence with its ids resolved"""
+    __slots__ = ()
+
+    @property
+    def table(self):
+        """Number of the outermost table, 0 outside tables"""
+        return self.cells[0][0] if self.cells else 0
+
+    @property
+    def label(self):
+        return format_location(self.part, self.box, self.paragraph, self.cells)
+
+
+class LocationIndex:
+    """Column store of placeholder occurrences in one template"""
+
+    def __init__(self):
+        self.names = []
+        self.parts = ['']
+        self.paths = [NO_CELLS]
+        self._name_ids = {}
+        self._part_ids = {'': 0}
+        self._path_ids = {NO_CELLS: 0}
+        self.columns = {column: array(_TYPECODE) for column in COLUMNS}
+
+    def __len__(self):
+        return len(self.columns['offset'])
+
+    @staticmethod
+    def _intern(values, ids, value):
+        index = ids.get(value)
+        if index is None:
+            index = ids[value] = len(values)
+            values.append(value)
+        return index
+
+    def add(self, name, location, offset=0, part=''):
+        """Record one occurrence of ``name`` at ``(box, paragraph, cells)``"""
+        box, paragraph, cells = location
+        columns = self.columns
+        columns['name'].append(self._intern(self.names, self._name_ids, name))
+        columns['part'].append(self._intern(self.parts, self._part_ids, part))
+        columns['box'].append(box)
+        columns['paragraph'].append(paragraph)
+        columns['cells'].append(self._intern(self.paths, self._path_ids, tuple(cells)))
+        columns['offset'].append(offset)
+
+    def add_text(self, text, location, part=''):
+        """Record every ``{placeholder}`` in one paragraph's text"""
+        for placeholder in iter_placeholders(text):
+            self.add(placeholder.name, location, placeholder.start, part)
+
+    # ------------------------------------------------------------ queries
+
+    def placeholder_names(self):
+        """Sorted names that occur at least once"""
+        return sorted(self.names)
+
+    def occurrence(self, row):
+        """``Occurrence`` for row number ``row``"""
+        columns = self.columns
+        return Occurrence(
+            self.names[columns['name'][row]],
+            self.parts[columns['part'][row]],
+            columns['box'][row],
+            columns['paragraph'][row],
+            self.paths[columns['cells'][row]],
+            columns['offset'][row],
+        )
+
+    def find(self, name=None, part=None, table=None, row=None, box=None):
+        """Occurrences matching every given filter, in document order.
+
+        ``table`` and ``row`` refer to the outermost table (nested tables
+        carry their parent's number, as python-docx reports them), so
+        ``find(table=2)`` is every occurrence anywhere inside table 2.
+        ``part`` is a label such as ``'header1.xml'`` (``''`` for the body).
+        """
+        filters = []
+        if name is not None:
+            if name not in self._name_ids:
+                return
+            filters.append((self.columns['name'], self._name_ids[name]))
+        if part is not None:
+            if part not in self._part_ids:
+                return
+            filters.append((self.columns['part'], self._part_ids[part]))
+        if box is not None:
+            filters.append((self.columns['box'], box))
+
+        paths = None
+        if table is not None or row is not None:
+            paths = {
+                index for index, cells in enumerate(self.paths)
+                if cells
+                and (table is None or cells[0][0] == table)
+                and (row is None or cells[0][1] == row)
+            }
+        path_column = self.columns['cells']
+
+        for index in range(len(self)):
+            if paths is not None and path_column[index] not in paths:
+                continue
+            if all(column[index] == value for column, value in filters):
+                yield self.occurrence(index)
+
+    def rows_by_name(self):
+        """``{name: [row, ...]}`` in first-occurrence order; no label is formatted"""
+        names = self.names
+        grouped = {name: [] for name in names}
+        for row, name_id in enumerate(self.columns['name']):
+            grouped[names[name_id]].append(row)
+        return grouped
+
+    def iter_labels(self, rows):
+        """Labels of the given rows, formatted one at a time"""
+        for row in rows:
+            yield self.occurrence(row).label
+
+    def labels(self):
+        """``{name: [label, ...]}`` in first-occurrence order (old dict layout)"""
+        return {name: list(self.iter_labels(rows)) for name, rows in self.rows_by_name().items()}
+
+    # ------------------------------------------------------------ storage
+
+    def to_bytes(self):
+        """Compact binary form: header, interned strings, path table, columns.
+
+        Each integer array is stored at the narrowest width (1, 2 or 4
+        bytes) that holds its largest value.
+        """
+        names = '\n'.join(self.names).encode('utf-8')
+        parts = '\n'.join(self.parts[1:]).encode('utf-8')
+        path_ints = array(_TYPECODE)
+        for cells in self.paths[1:]:
+            path_ints.append(len(cells))
+            for triple in cells:
+                path_ints.extend(triple)
+
+        arrays = [path_ints] + [self.columns[column] for column in COLUMNS]
+        arrays = [array(_narrowest(values), values) for values in arrays]
+        if sys.byteorder == 'big':
+            for values in arrays:
+                values.byteswap()
+
+        chunks = [
+            _HEADER.pack(MAGIC, FORMAT_VERSION, len(self.names), len(self.parts) - 1,
+                         len(path_ints), len(self)),
+            bytes(values.itemsize for values in arrays),
+            struct.pack('<II', len(names), len(parts)), names, parts,
+        ]
+        chunks.extend(values.tobytes() for values in arrays)
+        return b''.join(chunks)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Inverse of ``to_bytes`` (raises ValueError on foreign or truncated data)"""
+        widths_len = 1 + len(COLUMNS)
+        try:
+            magic, version, name_count, part_count, path_len, rows = _HEADER.unpack_from(data)
+            pos = _HEADER.size
+            widths = data[pos:pos + widths_len]
+            names_len, parts_len = struct.unpack_from('<II', data, pos + widths_len)
+        except struct.error as e:
+            raise ValueError(f"truncated location index: {e}") from None
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError("not a location index (or an older format)")
+        if any(width not in _WIDTHS for width in widths):
+            raise ValueError("corrupt location index")
+        pos += widths_len + 8
+
+        counts = [path_len] + [rows] * len(COLUMNS)
+        size = sum(count * width for count, width in zip(counts, widths))
+        if len(data) != pos + names_len + parts_len + size:
+            raise ValueError("truncated location index")
+
+        index = cls()
+        names = data[pos:pos + names_len].decode('utf-8')
+        pos += names_len
+        parts = data[pos:pos + parts_len].decode('utf-8')
+        pos += parts_len
+        index.names = names.split('\n') if name_count else []
+        index.parts = [''] + (parts.split('\n') if part_count else [])
+
+        arrays = []
+        for count, width in zip(counts, widths):
+            values = array(_WIDTHS[width])
+            values.frombytes(data[pos:pos + count * width])
+            if sys.byteorder == 'big':
+                values.byteswap()
+            arrays.append(array(_TYPECODE, values))
+            pos += count * width
+
+        path_ints, i = arrays[0], 0
+        while i < len(path_ints):
+            depth = path_ints[i]
+            flat = path_ints[i + 1:i + 1 + 3 * depth]
+            index.paths.append(tuple(tuple(flat[j:j + 3]) for j in range(0, len(flat), 3)))
+            i += 1 + 3 * depth
+
+        index.columns = dict(zip(COLUMNS, arrays[1:]))
+        index._name_ids = {name: i for i, name in enumerate(index.names)}
+        index._part_ids = {part: i for i, part in enumerate(index.parts)}
+        index._path_ids = {cells: i for i, cells in enumerate(index.paths)}
+        if len(index.names) != name_count or len(index.parts) != part_count + 1:
+            raise ValueError("corrupt location index")
+        return index
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            return cls.from_bytes(f.read())
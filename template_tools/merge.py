@@ -0,0 +1,225 @@
+"""
+Mail merge: one template, a stream of records, many letters
+===========================================================
+
+``merge`` renders a letter per record of a JSONL or CSV file with a
+``CompiledTemplate``, the way the process-* routes do for one form at a
+time. Letters are named like the routes name them in public/storage/surat
+(``F106_<nik>_<timestamp>.docx``) and go to a directory or into one zip.
+
+Memory stays flat however long the input is: records are read lazily and
+at most ``window`` chunks are in flight. Writing to a directory, the
+workers write their letters themselves and only hand back names; writing a
+zip, finished letters come back to the parent, which appends them to the
+archive as they arrive (only the zip's central directory grows, by one
+small entry per letter).
+"""
+
+import csv
+import json
+import os
+import re
+import time
+import zipfile
+from collections import namedtuple
+from functools import partial
+
+from template_tools.compiler import CompiledTemplate
+from template_tools.pool import bounded_map
+from template_tools.schema import parse_schema
+
+RECORD_FORMATS = ('jsonl', 'csv')
+# Record fields tried, in order, for the <id> part of a letter's name
+ID_FIELDS = ('nik', 'nik_pemohon')
+CHUNK_SIZE = 32
+# Schema problems quoted per skipped record
+MAX_PROBLEMS = 5
+
+Record = namedtuple('Record', 'number data error')
+Letter = namedtuple('Letter', 'number name data size')
+
+_UNSAFE = re.compile(r'[^0-9A-Za-z_-]+')
+
+
+def record_format(path, fmt=None):
+    """``'jsonl'`` or ``'csv'`` from ``fmt`` or the file extension"""
+    if fmt:
+        return fmt
+    return 'csv' if path.lower().endswith('.csv') else 'jsonl'
+
+
+def read_records(path, fmt=None):
+    """Yield ``Record(number, data, error)`` one line/row at a time.
+
+    ``number`` is the 1-based line (JSONL) or data row (CSV); unparseable
+    lines come through with ``data=None`` and an error message.
+    """
+    fmt = record_format(path, fmt)
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        if fmt == 'csv':
+            for number, row in enumerate(csv.DictReader(f), 1):
+                yield Record(number, row, None)
+            return
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError as e:
+                yield Record(number, None, f"invalid JSON: {e}")
+                continue
+            if not isinstance(data, dict):
+                yield Record(number, None, "not a JSON object")
+                continue
+            yield Record(number, data, None)
+
+
+def default_prefix(template_path):
+    """``F-106.docx`` -> ``F106``, as the routes name their letters"""
+    stem = os.path.splitext(os.path.basename(template_path))[0]
+    return _UNSAFE.sub('', stem.replace('-', '')).upper()
+
+
+def letter_name(prefix, record, number, timestamp, id_field=None):
+    """``<prefix>_<id>_<timestamp>.docx`` with the id taken from the record"""
+    fields = (id_field,) if id_field else ID_FIELDS
+    ident = next((str(record[field]) for field in fields if record.get(field) not in (None, '')), '')
+    ident = _UNSAFE.sub('', ident) or f"record{number}"
+    return f"{prefix}_{ident}_{timestamp}.docx"
+
+
+# ---------------------------------------------------------------- workers
+
+_template = None
+
+
+def _init_worker(artifact):
+    global _template
+    _template = CompiledTemplate.from_json(artifact)
+
+
+def _render_chunk(chunk, out_dir, compresslevel, template=None):
+    """Render ``(number, name, record)`` items; bytes only when ``out_dir`` is None"""
+    template = template or _template
+    letters = []
+    for number, name, record in chunk:
+        rendered = template.render(record)
+        if out_dir is None:
+            data = template.package.to_bytes(rendered, compresslevel)
+            letters.append(Letter(number, name, data, len(data)))
+        else:
+            size = template.package.write(os.path.join(out_dir, name), rendered, compresslevel)
+            letters.append(Letter(number, name, None, size))
+    return letters
+
+
+# ---------------------------------------------------------------- driver
+
+class MergeStats:
+    """Counters of a merge run"""
+
+    def __init__(self):
+        self.written = 0
+        self.skipped = 0
+        self.bytes = 0
+        self.started = time.perf_counter()
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def rate(self):
+        return self.written / self.elapsed if self.elapsed else 0.0
+
+
+def _chunks(records, schema, prefix, id_field, stats, on_invalid):
+    """Valid records as chunks of ``(number, name, record)``"""
+    # One timestamp per letter, counting up from the start: names stay unique
+    timestamp = int(time.time() * 1000)
+    chunk = []
+    for record in records:
+        error = record.error
+        if error is None and schema is not None:
+            problems = schema.validate(record.data)
+            if problems:
+                error = '; '.join(problems[:MAX_PROBLEMS])
+                if len(problems) > MAX_PROBLEMS:
+                    error += f" (+{len(problems) - MAX_PROBLEMS} more)"
+        if error is not None:
+            stats.skipped += 1
+            on_invalid(record.number, error)
+            continue
+        name = letter_name(prefix, record.data, record.number, timestamp, id_field)
+        chunk.append((record.number, name, record.data))
+        timestamp += 1
+        if len(chunk) == CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def merge(compiled, records, out_dir=None, zip_path=None, workers=1, prefix=None,
+          id_field=None, allow_missing=False, compresslevel=6, on_invalid=None,
+          on_progress=None, window=None):
+    """Render every record and write the letters; returns ``MergeStats``.
+
+    Args:
+        compiled: CompiledTemplate of the letter
+        records: iterable of ``Record`` (see ``read_records``)
+        out_dir / zip_path: write letters into a directory, or into one zip
+        workers: render processes (1 renders in this process)
+        prefix: first part of the letter names (default from the template name)
+        id_field: record field for the id part (default: nik, nik_pemohon)
+        allow_missing: render records that do not match the template's
+            ``TemplateSchema`` (missing fields render as '', like the routes'
+            nullGetter) instead of skipping them
+        on_invalid: ``callback(number, message)`` for skipped records
+        on_progress: ``callback(stats)`` after each finished chunk
+        window: chunks in flight at once (default: 4 per worker)
+    """
+    if (out_dir is None) == (zip_path is None):
+        raise ValueError("give exactly one of out_dir and zip_path")
+    stats = MergeStats()
+    prefix = prefix or default_prefix(compiled.source)
+    schema = None if allow_missing else parse_schema(compiled.source)
+    chunks = _chunks(records, schema, prefix, id_field, stats,
+                     on_invalid or (lambda number, message: None))
+    if out_dir is not None:
+        os.makedirs(out_dir, exist_ok=True)
+    archive = zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_STORED) if zip_path else None
+
+    def collect(letters):
+        for letter in letters:
+            if archive is not None:
+                # A .docx is already deflated: store it as is
+                archive.writestr(letter.name, letter.data)
+            stats.written += 1
+            stats.bytes += letter.size
+        if on_progress is not None:
+            on_progress(stats)
+
+    try:
+        if workers <= 1:
+            for chunk in chunks:
+                collect(_render_chunk(chunk, out_dir, compresslevel, compiled))
+        else:
+            _merge_parallel(compiled, chunks, out_dir, compresslevel, workers, window, collect)
+    finally:
+        if archive is not None:
+            archive.close()
+    return stats
+
+
+def _merge_parallel(compiled, chunks, out_dir, compresslevel, workers, window, collect):
+    task = partial(_render_chunk, out_dir=out_dir, compresslevel=compresslevel)
+    for letters in bounded_map(task, chunks, workers, window, _init_worker, (compiled.to_json(),)):
+        collect(letters)
+
+
+def format_rate(stats):
+    """``1,234 letters in 2.1 s (587/s, 24.1 MB)``"""
+    return (f"{stats.written:,} letters in {stats.elapsed:.1f} s "
+            f"({stats.rate:,.0f}/s, {stats.bytes / (1024 * 1024):.1f} MB)")
+
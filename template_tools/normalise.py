@@ -0,0 +1,286 @@
+"""
+Template normaliser
+===================
+
+Word breaks the text of a template into many runs. Every editing session
+leaves ``w:rsid*`` revision ids on paragraphs and runs, the spell checker
+adds ``<w:proofErr/>`` markers, and a tag typed in two goes can end up as
+``{nama_`` and ``pemohon}`` in two runs. scripts/patch-template-f106-final.js
+had to repair that by hand for F-106. docxtemplater copes, but every render
+in the Node routes parses the bloat again.
+
+``normalise_part`` rewrites the XML bytes of one part and leaves the rest
+byte for byte:
+
+* ``w:rsid*`` attributes and ``<w:proofErr/>`` are removed
+* adjacent runs with the same ``<w:rPr>`` that hold only text, tabs and
+  breaks are merged, and so are adjacent ``<w:t>`` inside a run
+* a tag split over several runs is moved whole into the run where it
+  starts. docxtemplater gives the value that run's formatting anyway.
+  Runs left empty are dropped
+
+``normalise_template`` does this for every scanned part, and drops the
+``<w:rsids>`` list of settings.xml. ``verify_normalised`` then checks that
+``PlaceholderExtractor`` finds the same placeholders at the same locations
+and that the compiled template renders the same text.
+"""
+
+import re
+import zipfile
+from collections import namedtuple
+
+from template_tools.compiler import _PartCompiler, compile_template
+from template_tools.parts import discover_parts
+from template_tools.zipwriter import ZipTemplate
+
+SETTINGS_PART = 'word/settings.xml'
+
+_MARKUP_RE = re.compile(rb'<[^>]+>')
+_RSID_RE = re.compile(rb'\s+w:rsid\w*="[^"]*"')
+_PROOF_ERR_RE = re.compile(rb'<w:proofErr\b[^>]*/>')
+_RSIDS_RE = re.compile(rb'<w:rsids>.*?</w:rsids>|<w:rsids/>', re.S)
+
+_RPR = rb'<w:rPr>(?:(?!</w:rPr>).)*</w:rPr>|<w:rPr/>'
+_TEXT = rb'<w:t(?: [^>]*)?>[^<]*</w:t>'
+# Run children that mean the same in one run as spread over several
+_RUN_CHILD = _TEXT + rb'|<w:t/>|<w:(?:tab|cr|noBreakHyphen|softHyphen)/>|<w:br(?: [^>]*)?/>'
+_SIMPLE_RUN_RE = re.compile(rb'<w:r>(' + _RPR + rb')?((?:' + _RUN_CHILD + rb')*)</w:r>', re.S)
+_EMPTY_RUN_RE = re.compile(rb'<w:r>(?:' + _RPR + rb')?</w:r>', re.S)
+_TEXTS_RE = re.compile(rb'(?:' + _TEXT + rb'){2,}')
+_TEXT_PARTS_RE = re.compile(rb'<w:t( [^>]*)?>([^<]*)</w:t>')
+_START_TAG_RE = re.compile(rb'<[A-Za-z]')
+
+PRESERVE = b' xml:space="preserve"'
+EDGE_SPACE = (b' ', b'\t')
+
+PartChange = namedtuple(
+    'PartChange',
+    'name bytes_before bytes_after elements_before elements_after runs_before runs_after split_tags',
+)
+
+
+def _strip_rsids(xml):
+    return _MARKUP_RE.sub(
+        lambda m: _RSID_RE.sub(b'', m.group()) if b'w:rsid' in m.group() else m.group(), xml,
+    )
+
+
+def _merge_texts(content):
+    """One ``<w:t>`` for each sequence of adjacent ones. A sequence is kept
+    as is when a piece without ``xml:space="preserve"`` starts or ends with
+    a space, which Word would drop there but not inside the merged text."""
+    def merge(match):
+        pieces = _TEXT_PARTS_RE.findall(match.group())
+        preserve = False
+        for attrs, text in pieces:
+            if attrs and PRESERVE in attrs:
+                preserve = True
+            elif text.startswith(EDGE_SPACE) or text.endswith(EDGE_SPACE):
+                return match.group()
+        text = b''.join(text for _, text in pieces)
+        return b'<w:t' + (PRESERVE if preserve else b'') + b'>' + text + b'</w:t>'
+
+    return _TEXTS_RE.sub(merge, content)
+
+
+def _merge_runs(xml):
+    """Merge adjacent runs with identical ``<w:rPr>`` and simple content"""
+    out = []
+    pos = 0
+    group = None  # [start, end, run properties, contents]
+
+    def flush():
+        out.append(xml[pos:group[0]])
+        if len(group[3]) == 1 and not _TEXTS_RE.search(group[3][0]):
+            out.append(xml[group[0]:group[1]])
+        else:
+            out.append(b'<w:r>' + group[2] + _merge_texts(b''.join(group[3])) + b'</w:r>')
+        return group[1]
+
+    for match in _SIMPLE_RUN_RE.finditer(xml):
+        rpr = match.group(1) or b''
+        if group is not None and match.start() == group[1] and rpr == group[2]:
+            group[1] = match.end()
+            group[3].append(match.group(2))
+            continue
+        if group is not None:
+            pos = flush()
+        group = [match.start(), match.end(), rpr, [match.group(2)]]
+    if group is None:
+        return xml
+    pos = flush()
+    out.append(xml[pos:])
+    return b''.join(out)
+
+
+def _join_split_tags(xml, part_name=''):
+    """Move each tag split over several ``<w:t>`` of one paragraph into the
+    first of them; returns the new bytes and how many tags were moved"""
+    compiler = _PartCompiler(xml, part_name)
+    edits = {}  # <w:t> element -> [(start, end, replacement)]
+    joined = 0
+    for tag in compiler.tags():
+        if len(tag.pieces) == 1:
+            continue
+        first, _, first_end = tag.pieces[0]
+        paragraph = first.ancestor(b'w:p')
+        if any(t.ancestor(b'w:p') is not paragraph for t, _, _ in tag.pieces):
+            continue
+        rest = b''.join(xml[a:b] for _, a, b in tag.pieces[1:])
+        edits.setdefault(first, []).append((first_end, first_end, rest))
+        for t, a, b in tag.pieces[1:]:
+            edits.setdefault(t, []).append((a, b, b''))
+        joined += 1
+    if not joined:
+        return xml, 0
+
+    out = []
+    pos = 0
+    for t in sorted(edits, key=lambda t: t.start):
+        content = []
+        cursor = t.open_end
+        for a, b, replacement in sorted(edits[t], key=lambda edit: edit[0]):
+            content.append(xml[cursor:a])
+            content.append(replacement)
+            cursor = b
+        content.append(xml[cursor:t.close_start])
+        content = b''.join(content)
+        out.append(xml[pos:t.start])
+        if content:
+            open_tag = xml[t.start:t.open_end]
+            if PRESERVE not in open_tag and (content.startswith(EDGE_SPACE)
+                                            or content.endswith(EDGE_SPACE)):
+                open_tag = open_tag[:-1] + PRESERVE + b'>'
+            out.append(open_tag + content + xml[t.close_start:t.end])
+        pos = t.end
+    out.append(xml[pos:])
+    return b''.join(out), joined
+
+
+def normalise_part(xml, part_name=''):
+    """Normalised XML bytes of one part, and how many split tags were joined"""
+    xml = _PROOF_ERR_RE.sub(b'', _strip_rsids(xml))
+    xml = _merge_runs(xml)
+    joined = 0
+    if b'{' in xml:
+        xml, joined = _join_split_tags(xml, part_name)
+        if joined:
+            xml = _merge_runs(_EMPTY_RUN_RE.sub(b'', xml))
+    return xml, joined
+
+
+def _change(name, before, after, joined=0):
+    return PartChange(
+        name, len(before), len(after),
+        len(_START_TAG_RE.findall(before)), len(_START_TAG_RE.findall(after)),
+        before.count(b'<w:r>') + before.count(b'<w:r '),
+        after.count(b'<w:r>') + after.count(b'<w:r '),
+        joined,
+    )
+
+
+class NormalisedTemplate:
+    """Result of ``normalise_template``.
+
+    Attributes:
+        source: path of the template .docx
+        replaced: part name -> normalised bytes, for the parts that changed
+        changes: ``PartChange`` of every changed part
+    """
+
+    def __init__(self, source, replaced, changes):
+        self.source = source
+        self.replaced = replaced
+        self.changes = changes
+
+    def write(self, output):
+        """Write the normalised .docx (other members copied as stored)"""
+        return ZipTemplate(self.source).write(output, self.replaced)
+
+
+def normalise_template(docx_path):
+    """Normalise every scanned part of a template (nothing is written)"""
+    replaced = {}
+    changes = []
+    with zipfile.ZipFile(docx_path) as zf:
+        for part in discover_parts(zf):
+            xml = zf.read(part.name)
+            normalised, joined = normalise_part(xml, part.name)
+            if normalised != xml:
+                replaced[part.name] = normalised
+                changes.append(_change(part.name, xml, normalised, joined))
+        if SETTINGS_PART in zf.namelist():
+            settings = zf.read(SETTINGS_PART)
+            slimmed = _RSIDS_RE.sub(b'', settings)
+            if slimmed != settings:
+                replaced[SETTINGS_PART] = slimmed
+                changes.append(_change(SETTINGS_PART, settings, slimmed))
+    return NormalisedTemplate(str(docx_path), replaced, changes)
+
+
+# ---------------------------------------------------------------- verify
+
+def _sample_record(scope, flag):
+    """Record giving every field of a schema scope a distinct value, two
+    items to every loop and ``flag`` to every condition"""
+    from template_tools.schema import LOOP_OR_CONDITION, Section
+
+    record = {}
+    for name, node in scope.fields.items():
+        if not isinstance(node, Section):
+            record[name] = f"<{name}>"
+        elif node.kind == LOOP_OR_CONDITION:
+            record[name] = [_sample_record(node, flag), _sample_record(node, not flag)]
+        else:
+            record[name] = flag
+    return record
+
+
+def _rendered_texts(docx_path, records):
+    from template_tools.text_index import layout_text
+
+    compiled = compile_template(docx_path)
+    texts = []
+    with zipfile.ZipFile(docx_path) as zf:
+        parts = {part.name: zf.read(part.name) for part in discover_parts(zf)}
+    for record in records:
+        rendered = compiled.render(record)
+        texts.append({name: layout_text(rendered.get(name, xml)) for name, xml in parts.items()})
+    return texts
+
+
+def verify_normalised(original, normalised):
+    """Problems found comparing two versions of a template (empty: same).
+
+    ``PlaceholderExtractor`` must find the same placeholders at the same
+    locations, and both must render the same text for sample records.
+    """
+    from template_tools.extractor import ExtractionError, PlaceholderExtractor
+    from template_tools.schema import parse_schema
+
+    indexes = []
+    for path in (original, normalised):
+        extractor = PlaceholderExtractor(path)
+        try:
+            extractor.extract()
+        except ExtractionError:
+            return [f"extraction failed for {path}"]
+        indexes.append(extractor.index.labels())
+    problems = []
+    before, after = indexes
+    for name in sorted(set(before) | set(after)):
+        if before.get(name) != after.get(name):
+            problems.append(f"{{{name}}}: {before.get(name, 'missing')} → {after.get(name, 'missing')}")
+    if problems:
+        return problems
+
+    schema = parse_schema(original)
+    if schema.errors:
+        return [f"not rendered: {schema.errors[0].message}"]
+    records = [_sample_record(schema.root, True), _sample_record(schema.root, False)]
+    expected, actual = _rendered_texts(original, records), _rendered_texts(normalised, records)
+    for record_texts, normalised_texts in zip(expected, actual):
+        for name, text in record_texts.items():
+            if normalised_texts.get(name) != text:
+                problems.append(f"{name}: rendered text differs")
+    return sorted(set(problems))
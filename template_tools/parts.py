@@ -0,0 +1,124 @@
+"""
+Discover the WordprocessingML parts that can hold placeholders
+==============================================================
+
+Besides ``word/document.xml`` a template can carry text in headers (the
+kelurahan letterhead), footers, footnotes and endnotes. The parts are found
+the way Word does it: the main part from ``_rels/.rels``, the others from the
+main part's relationships, checked against ``[Content_Types].xml``.
+"""
+
+import posixpath
+import re
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+
+DOCUMENT_PART = 'word/document.xml'
+CONTENT_TYPES_PART = '[Content_Types].xml'
+PACKAGE_RELS_PART = '_rels/.rels'
+
+CT = '{http://schemas.openxmlformats.org/package/2006/content-types}'
+PR = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+WML = 'application/vnd.openxmlformats-officedocument.wordprocessingml.'
+CONTENT_TYPE_KINDS = {
+    WML + 'document.main+xml': 'document',
+    WML + 'template.main+xml': 'document',
+    'application/vnd.ms-word.document.macroEnabled.main+xml': 'document',
+    'application/vnd.ms-word.template.macroEnabledTemplate.main+xml': 'document',
+    WML + 'header+xml': 'header',
+    WML + 'footer+xml': 'footer',
+    WML + 'footnotes+xml': 'footnotes',
+    WML + 'endnotes+xml': 'endnotes',
+}
+
+# Scan order after the main part
+KIND_ORDER = ('document', 'header', 'footer', 'footnotes', 'endnotes')
+
+# Zip members whose bytes decide which parts are scanned and what they hold
+_CANDIDATE_RE = re.compile(r'word/(document|header\d*|footer\d*|footnotes|endnotes)\.xml$')
+
+DocumentPart = namedtuple('DocumentPart', 'name kind')
+
+
+def part_label(name):
+    """Short label used in locations, e.g. ``header2.xml``"""
+    return posixpath.basename(name)
+
+
+def _natural_key(name):
+    return [int(tok) if tok.isdigit() else tok for tok in re.split(r'(\d+)', name)]
+
+
+def _read_xml(zf, name):
+    try:
+        with zf.open(name) as f:
+            return ET.parse(f).getroot()
+    except KeyError:
+        return None
+
+
+def _rels_path(part_name):
+    folder, base = posixpath.split(part_name)
+    return posixpath.join(folder, '_rels', base + '.rels')
+
+
+def _relationships(zf, part_name):
+    """Yield ``(type_suffix, target_part)`` for internal relationships of a part"""
+    root = _read_xml(zf, _rels_path(part_name) if part_name else PACKAGE_RELS_PART)
+    if root is None:
+        return
+    base = posixpath.dirname(part_name) if part_name else ''
+    for rel in root.iter(PR + 'Relationship'):
+        if rel.get('TargetMode') == 'External':
+            continue
+        target = rel.get('Target', '')
+        if target.startswith('/'):
+            target = target[1:]
+        else:
+            target = posixpath.normpath(posixpath.join(base, target))
+        yield rel.get('Type', '').rsplit('/', 1)[-1], target
+
+
+def discover_parts(zf):
+    """List the parts to scan, main document first.
+
+    ``zf`` is an open ``zipfile.ZipFile``; only the small package XML files
+    are read. Falls back to ``word/document.xml`` alone for packages without
+    usable relationships.
+    """
+    names = set(zf.namelist())
+    overrides = {}
+    types_root = _read_xml(zf, CONTENT_TYPES_PART)
+    if types_root is not None:
+        for override in types_root.iter(CT + 'Override'):
+            kind = CONTENT_TYPE_KINDS.get(override.get('ContentType', ''))
+            if kind:
+                overrides[override.get('PartName', '').lstrip('/')] = kind
+
+    main = None
+    for rel_type, target in _relationships(zf, None):
+        if rel_type == 'officeDocument' and target in names:
+            main = target
+            break
+    if main is None:
+        main = next((n for n, k in overrides.items() if k == 'document' and n in names), DOCUMENT_PART)
+
+    parts = {}
+    for rel_type, target in _relationships(zf, main):
+        if rel_type in KIND_ORDER and target in names and target != main:
+            # Content type wins when present; the relationship type otherwise
+            parts[target] = overrides.get(target, rel_type)
+
+    ordered = sorted(parts.items(), key=lambda kv: (KIND_ORDER.index(kv[1]), _natural_key(kv[0])))
+    return [DocumentPart(main, 'document')] + [DocumentPart(n, k) for n, k in ordered]
+
+
+def candidate_members(zf):
+    """Zip members that determine scan results, from the central directory only"""
+    fixed = (CONTENT_TYPES_PART, PACKAGE_RELS_PART, _rels_path(DOCUMENT_PART))
+    return sorted(
+        (info for info in zf.infolist()
+         if info.filename in fixed or _CANDIDATE_RE.match(info.filename)),
+        key=lambda info: info.filename,
+    )
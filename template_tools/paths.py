@@ -0,0 +1,27 @@
+"""Expand command line paths (files, directories, globs) into template lists"""
+
+import glob
+import os
+from pathlib import Path
+
+
+def is_pattern(path):
+    """True when a CLI path is a directory or glob rather than a single file"""
+    return os.path.isdir(path) or any(c in path for c in '*?[')
+
+
+def collect_templates(paths):
+    """Expand directories and globs into a sorted, de-duplicated list of .docx files"""
+    found = set()
+    for path in paths:
+        if os.path.isdir(path):
+            matches = glob.glob(os.path.join(path, '*.docx'))
+        elif any(c in path for c in '*?['):
+            matches = glob.glob(path)
+        else:
+            matches = [path]
+        for match in matches:
+            # Skip Word's "~$NAME.docx" lock files
+            if match.lower().endswith('.docx') and not Path(match).name.startswith('~$'):
+                found.add(os.path.normpath(match))
+    return sorted(found)
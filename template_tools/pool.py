@@ -0,0 +1,37 @@
+"""
+Bounded process pool
+====================
+
+``ProcessPoolExecutor.map`` submits the whole input up front, which for a
+stream of a hundred thousand records or letters means holding all of them
+(and their results) in memory. ``bounded_map`` keeps at most ``window``
+tasks in flight and yields results as they finish.
+"""
+
+
+def bounded_map(fn, items, workers, window=None, initializer=None, initargs=()):
+    """Yield ``fn(item)`` for every item, in completion order.
+
+    Args:
+        fn: picklable top-level function run in the workers
+        items: iterable of arguments, consumed lazily
+        workers: worker processes
+        window: tasks in flight at once (default: 4 per worker)
+        initializer / initargs: run once in every worker
+    """
+    # Imported here: it pulls in multiprocessing, which one worker never needs
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+    window = window or 4 * workers
+    with ProcessPoolExecutor(workers, initializer=initializer, initargs=initargs) as executor:
+        pending = set()
+        for item in items:
+            pending.add(executor.submit(fn, item))
+            if len(pending) >= window:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
@@ -0,0 +1,383 @@
+"""
+HTML previews of templates
+==========================
+
+The preview-*-html routes rebuild a preview for every keystroke-driven
+request. ``compile_preview`` turns a template into an HTML skeleton once:
+it walks the operation list of the compiled ``word/document.xml`` (so tags
+split over runs and sections behave exactly as in the rendered letter) and
+converts the static XML around the slots to HTML:
+
+* paragraphs -> ``<p>`` with their alignment; empty ones keep their line
+* tables -> ``<table>``, with ``colspan`` for merged columns
+* bold / italic / underline runs -> ``<strong>`` / ``<em>`` / ``<u>``
+* tabs, line breaks, text boxes (``mc:Fallback`` copies skipped)
+
+Images, headers and footers are left out. ``HtmlPreview.render`` then only
+joins strings: slots are HTML-escaped values (``\\n`` -> ``<br>``) and
+sections repeat or drop their chunks as the compiler's do; ``{@raw}`` XML
+has no HTML form and renders empty.
+
+Skeletons are cached as JSON next to the compiled templates and reused
+while they are newer than the .docx (``load_preview``).
+"""
+
+import json
+import os
+import re
+import zipfile
+from html import escape
+
+from template_tools.compiler import SECTION, SLOT, compile_template, lookup_value, value_to_text
+from template_tools.defaults import DEFAULT_PREVIEW_DIR
+
+DOCUMENT_PART = 'word/document.xml'
+# Bumped when the skeleton layout or the HTML produced changes
+PREVIEW_VERSION = 2
+
+PREVIEW_CSS = """\
+.docx-preview { font-family: 'Times New Roman', serif; font-size: 12pt; line-height: 1.15; }
+.docx-preview p { margin: 0; min-height: 1.15em; }
+.docx-preview table { border-collapse: collapse; }
+.docx-preview td { vertical-align: top; padding: 0 4px; }
+.docx-preview .tab { display: inline-block; min-width: 2em; }
+.docx-preview .textbox, .docx-preview .textbox .p { display: block; }
+"""
+
+ALIGNMENTS = {b'center': 'center', b'right': 'right', b'end': 'right', b'both': 'justify',
+              b'distribute': 'justify'}
+# Run properties shown, outermost first
+FORMATS = ((b'w:b', 'strong'), (b'w:i', 'em'), (b'w:u', 'u'))
+_OFF = (b'0', b'false', b'none')
+
+_TOKEN_RE = re.compile(rb'<(/?)([A-Za-z_][\w:.\-]*)([^>]*?)(/?)>|([^<]+)')
+_VAL_RE = re.compile(rb'w:val="([^"]*)"')
+_RPR_TAG_RE = re.compile(rb'<(w:[bi]|w:u)\b([^>]*?)/?>')
+
+
+def _val(attrs):
+    found = _VAL_RE.search(attrs)
+    return found.group(1) if found else None
+
+
+def _run_format(rpr):
+    """Tuple of HTML tags for the b/i/u of ``<w:rPr>`` bytes"""
+    on = {name for name, attrs in _RPR_TAG_RE.findall(rpr) if _val(attrs) not in _OFF}
+    return tuple(tag for name, tag in FORMATS if name in on)
+
+
+def _html_text(text):
+    """XML text content as HTML (entities are shared; spaces kept)"""
+    text = text.decode('utf-8')
+    if '  ' in text:
+        text = text.replace('  ', ' &nbsp;')
+    return text
+
+
+class _Converter:
+    """Convert compiled operations into HTML operations, keeping the slots"""
+
+    def __init__(self):
+        self.stack = []          # open element names
+        self.skip = 0            # depth inside mc:Fallback
+        self.paragraphs = []     # [tag, align, opened, has_content] per open w:p
+        self.cell = None         # [colspan, vmerge] of a w:tc not yet written
+        self.run = ()            # format of the current run
+        self.rpr = False         # inside the current run's w:rPr
+        self.in_text = False
+        self.open = ()           # format tags open in the output
+        self.out = []
+        self.pending = b''
+
+    # -------------------------------------------------------- output
+
+    def emit(self, html):
+        self.out.append(html)
+
+    def set_format(self, fmt):
+        if fmt == self.open:
+            return
+        self.emit(''.join(f'</{tag}>' for tag in reversed(self.open)))
+        self.emit(''.join(f'<{tag}>' for tag in fmt))
+        self.open = fmt
+
+    def flush_cell(self):
+        if self.cell is not None:
+            colspan, vmerge = self.cell
+            attrs = f' colspan="{colspan}"' if colspan > 1 else ''
+            attrs += ' class="vmerge"' if vmerge else ''
+            self.emit(f'<td{attrs}>')
+            self.cell = None
+
+    def open_paragraph(self):
+        """Write the innermost pending paragraph start before content"""
+        self.flush_cell()
+        for paragraph in self.paragraphs:
+            if not paragraph[2]:
+                tag, align = paragraph[0], paragraph[1]
+                style = f' style="text-align:{align}"' if align else ''
+                css = ' class="p"' if tag == 'span' else ''
+                self.emit(f'<{tag}{css}{style}>')
+                paragraph[2] = True
+            paragraph[3] = True
+
+    def content(self, html, fmt=()):
+        self.open_paragraph()
+        self.set_format(fmt)
+        self.emit(html)
+
+    # -------------------------------------------------------- XML
+
+    def feed(self, data):
+        data = self.pending + data
+        self.pending = b''
+        cut = data.rfind(b'<')
+        if cut != -1 and data.find(b'>', cut) == -1:
+            data, self.pending = data[:cut], data[cut:]
+        for match in _TOKEN_RE.finditer(data):
+            text = match.group(5)
+            if text is not None:
+                if self.in_text and not self.skip:
+                    self.content(_html_text(text), self.run)
+                continue
+            closing, name, attrs, empty = match.group(1, 2, 3, 4)
+            if closing:
+                self.end(name)
+            else:
+                self.start(name, attrs)
+                if empty:
+                    self.end(name)
+
+    def start(self, name, attrs):
+        self.stack.append(name)
+        if self.skip or name == b'mc:Fallback':
+            self.skip += 1
+            return
+        parent = self.stack[-2] if len(self.stack) > 1 else None
+        if name == b'w:p':
+            self.set_format(())
+            self.paragraphs.append(['span' if self.paragraphs else 'p', None, False, False])
+        elif name == b'w:jc' and parent == b'w:pPr' and self.paragraphs:
+            self.paragraphs[-1][1] = ALIGNMENTS.get(_val(attrs))
+        elif name == b'w:r':
+            self.run = ()
+        elif name == b'w:rPr' and parent == b'w:r':
+            self.rpr = True
+        elif self.rpr and name in (b'w:b', b'w:i', b'w:u'):
+            if _val(attrs) not in _OFF:
+                self.run = tuple(tag for fmt, tag in FORMATS if fmt == name or tag in self.run)
+        elif name == b'w:t' and parent == b'w:r':
+            self.in_text = True
+        elif parent == b'w:r' and name == b'w:tab':
+            self.content('<span class="tab"></span>')
+        elif parent == b'w:r' and name in (b'w:br', b'w:cr'):
+            self.content('<br>')
+        elif parent == b'w:r' and name == b'w:noBreakHyphen':
+            self.content('-', self.run)
+        elif name == b'w:txbxContent':
+            self.open_paragraph()
+            self.set_format(())
+            self.emit('<span class="textbox">')
+        elif name == b'w:tbl':
+            self.set_format(())
+            self.flush_cell()
+            self.emit('<table>')
+        elif name == b'w:tr':
+            self.emit('<tr>')
+        elif name == b'w:tc':
+            self.cell = [1, False]
+        elif name == b'w:gridSpan' and self.cell is not None:
+            self.cell[0] = int(_val(attrs) or 1)
+        elif name == b'w:vMerge' and self.cell is not None:
+            self.cell[1] = _val(attrs) != b'restart'
+
+    def end(self, name):
+        if self.stack:
+            self.stack.pop()
+        if self.skip:
+            self.skip -= 1
+            return
+        if name == b'w:t':
+            self.in_text = False
+        elif name == b'w:rPr':
+            self.rpr = False
+        elif name == b'w:p' and self.paragraphs:
+            tag, _, opened, has_content = self.paragraphs[-1]
+            if not opened:
+                self.open_paragraph()
+            self.set_format(())
+            self.emit(f'</{tag}>' if has_content else f'&nbsp;</{tag}>')
+            self.paragraphs.pop()
+        elif name == b'w:txbxContent':
+            self.set_format(())
+            self.emit('</span>')
+        elif name == b'w:tc':
+            self.flush_cell()
+            self.set_format(())
+            self.emit('</td>')
+        elif name == b'w:tr':
+            self.emit('</tr>')
+        elif name == b'w:tbl':
+            self.emit('</table>')
+
+    # -------------------------------------------------------- operations
+
+    def convert(self, ops):
+        """HTML operation list for compiled operations"""
+        for op in ops:
+            if op.__class__ is bytes:
+                self.feed(op)
+            elif op[0] == SLOT:
+                if not self.skip:
+                    self.content('', _run_format(op[2]))
+                    self.emit((SLOT, op[1]))
+            elif op[0] == SECTION:
+                # Sections hold whole rows/paragraphs or text inside runs: the
+                # output must be balanced at both ends to be repeatable, and a
+                # paragraph around an inline section starts once, before it
+                if self.paragraphs:
+                    self.open_paragraph()
+                self.set_format(())
+                outer = self.out
+                self.out = []
+                self.convert(op[3])
+                self.set_format(())
+                body, self.out = self.out, outer
+                self.emit((SECTION, op[1], op[2], _collapse(body)))
+            # RAW: no HTML form
+        return self.out
+
+
+def _collapse(ops):
+    merged = []
+    for op in ops:
+        if isinstance(op, str):
+            if not op:
+                continue
+            if merged and isinstance(merged[-1], str):
+                merged[-1] += op
+                continue
+        merged.append(op)
+    return merged
+
+
+def _render(ops, scopes, out):
+    for op in ops:
+        if op.__class__ is str:
+            out.append(op)
+        elif op[0] == SLOT:
+            text = value_to_text(lookup_value(scopes, op[1]))
+            if text:
+                text = escape(text, quote=False)
+                out.append(text.replace('\n', '<br>') if '\n' in text else text)
+        else:
+            _, name, inverted, body = op
+            value = lookup_value(scopes, name)
+            if inverted:
+                if not value:
+                    _render(body, scopes, out)
+            elif isinstance(value, (list, tuple)):
+                for item in value:
+                    _render(body, scopes + [item], out)
+            elif value:
+                _render(body, scopes + [value] if isinstance(value, dict) else scopes, out)
+
+
+class HtmlPreview:
+    """HTML skeleton of a template: strings interleaved with slots.
+
+    Operations: ``str`` (static HTML), ``(SLOT, name)`` and
+    ``(SECTION, name, inverted, ops)``.
+    """
+
+    def __init__(self, source, ops):
+        self.source = source
+        self.ops = ops
+
+    def render(self, record):
+        """HTML fragment (``<div class="docx-preview">``) for one record"""
+        out = ['<div class="docx-preview">']
+        _render(self.ops, [record], out)
+        out.append('</div>')
+        return ''.join(out)
+
+    def render_page(self, record, title=''):
+        """Standalone HTML page with ``PREVIEW_CSS``"""
+        return (f'<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>{escape(title)}</title>'
+                f'<style>\n{PREVIEW_CSS}</style></head>\n<body>{self.render(record)}</body></html>\n')
+
+    def slot_names(self):
+        names = set()
+
+        def walk(ops):
+            for op in ops:
+                if op.__class__ is not str:
+                    names.add(op[1])
+                    if op[0] == SECTION:
+                        walk(op[3])
+
+        walk(self.ops)
+        return sorted(names)
+
+    def to_json(self):
+        def dump(ops):
+            return [op if isinstance(op, str) else
+                    [op[0], op[1], op[2], dump(op[3])] if op[0] == SECTION else list(op)
+                    for op in ops]
+
+        return {'version': PREVIEW_VERSION, 'source': self.source, 'ops': dump(self.ops)}
+
+    @classmethod
+    def from_json(cls, data):
+        if data.get('version') != PREVIEW_VERSION:
+            raise ValueError(f"Unsupported preview version: {data.get('version')}")
+
+        def load(ops):
+            return [op if isinstance(op, str) else
+                    (SECTION, op[1], op[2], load(op[3])) if op[0] == SECTION else tuple(op)
+                    for op in ops]
+
+        return cls(data['source'], load(data['ops']))
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_json(), f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_json(json.load(f))
+
+
+def compile_preview(docx_path, compiled=None):
+    """HTML skeleton of a template's body (``compiled``: its CompiledTemplate)"""
+    compiled = compiled or compile_template(docx_path)
+    ops = compiled.parts.get(DOCUMENT_PART)
+    if ops is None:
+        with zipfile.ZipFile(docx_path) as zf:
+            ops = [zf.read(DOCUMENT_PART)]
+    return HtmlPreview(str(docx_path), _collapse(_Converter().convert(ops)))
+
+
+def preview_path(docx_path, cache_dir=DEFAULT_PREVIEW_DIR):
+    stem = os.path.splitext(os.path.basename(docx_path))[0]
+    return os.path.join(cache_dir, f"{stem}.preview.json")
+
+
+def load_preview(docx_path, cache_dir=DEFAULT_PREVIEW_DIR):
+    """Skeleton from the cache when it is newer than the .docx, else compiled
+    and cached (``cache_dir=None``: no cache)"""
+    if cache_dir is None:
+        return compile_preview(docx_path)
+    path = preview_path(docx_path, cache_dir)
+    if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(docx_path):
+        try:
+            return HtmlPreview.load(path)
+        except (ValueError, KeyError):
+            pass  # stale layout: recompile
+    preview = compile_preview(docx_path)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    preview.save(tmp_path)
+    os.replace(tmp_path, path)
+    return preview
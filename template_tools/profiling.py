@@ -0,0 +1,171 @@
+"""
+Per-phase profiling
+===================
+
+``Profiler`` times the named phases of an extraction
+(``with profiler.phase('load_document'): ...``). With ``memory=True`` each
+phase is also measured with tracemalloc: the memory still allocated when it
+ends (``net``) and the highest point above where it started (``peak``).
+With ``cprofile=True`` cProfile runs between ``start()`` and ``stop()``.
+
+Profiles are plain dicts (``to_dict``) so batch workers can send them back
+through the process pool; ``merge_profiles`` adds them up across
+templates, ``format_profile`` prints the table and ``hotspots`` the
+hottest functions of the cProfile stats of every run.
+
+Phases are not nested: tracemalloc has one peak counter, reset when a
+phase starts.
+"""
+
+import contextlib
+import io
+import time
+import tracemalloc
+
+
+class Profiler:
+    """Timers (and tracemalloc / cProfile) for the phases of one run"""
+
+    def __init__(self, memory=True, cprofile=False):
+        self.memory = memory
+        self.cprofile = cprofile
+        self.phases = {}  # name -> [calls, seconds, net bytes, peak bytes]
+        self.wall_seconds = 0.0
+        self._started = None
+        self._tracing = False
+        self._profile = None
+
+    def start(self):
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+        if self.cprofile:
+            import cProfile
+
+            self._profile = self._profile or cProfile.Profile()
+            self._profile.enable()
+        self._started = time.perf_counter()
+        return self
+
+    def stop(self):
+        self.wall_seconds += time.perf_counter() - self._started
+        if self._profile is not None:
+            self._profile.disable()
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        tracing = self.memory and tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry = self.phases.setdefault(name, [0, 0.0, 0, 0])
+            entry[0] += 1
+            entry[1] += time.perf_counter() - started
+            if tracing:
+                current, peak = tracemalloc.get_traced_memory()
+                entry[2] += current - before
+                entry[3] = max(entry[3], peak - before)
+
+    def to_dict(self):
+        return {
+            'runs': 1,
+            'wall_seconds': self.wall_seconds,
+            'memory': self.memory,
+            'phases': {
+                name: {'calls': calls, 'seconds': seconds, 'net_bytes': net, 'peak_bytes': peak}
+                for name, (calls, seconds, net, peak) in self.phases.items()
+            },
+        }
+
+    def function_stats(self):
+        """Raw cProfile stats (picklable), None without cProfile"""
+        if self._profile is None:
+            return None
+        self._profile.create_stats()
+        return self._profile.stats
+
+
+def merge_profiles(profiles):
+    """Sum of ``Profiler.to_dict()`` results: calls, seconds and net bytes
+    add up, the peak is the highest of any run"""
+    merged = {'runs': 0, 'wall_seconds': 0.0, 'memory': False, 'phases': {}}
+    for profile in profiles:
+        merged['runs'] += profile['runs']
+        merged['wall_seconds'] += profile['wall_seconds']
+        merged['memory'] = merged['memory'] or profile['memory']
+        for name, phase in profile['phases'].items():
+            total = merged['phases'].setdefault(
+                name, {'calls': 0, 'seconds': 0.0, 'net_bytes': 0, 'peak_bytes': 0},
+            )
+            total['calls'] += phase['calls']
+            total['seconds'] += phase['seconds']
+            total['net_bytes'] += phase['net_bytes']
+            total['peak_bytes'] = max(total['peak_bytes'], phase['peak_bytes'])
+    return merged
+
+
+def format_profile(profile, title="Profile"):
+    """Human-readable table of a (merged) profile"""
+    wall = profile['wall_seconds']
+    memory = profile['memory']
+    lines = [f"⏱️  {title}: {profile['runs']} run{'s' if profile['runs'] != 1 else ''}, "
+             f"{wall:.3f} s"
+             + (" (tracemalloc on: timings include its overhead)" if memory else "")]
+    header = f"  {'phase':<24} {'calls':>6} {'total s':>9} {'mean ms':>9} {'%':>6}"
+    if memory:
+        header += f" {'net KiB':>10} {'peak KiB':>10}"
+    lines.append(header)
+    accounted = 0.0
+    for name, phase in sorted(profile['phases'].items(), key=lambda item: -item[1]['seconds']):
+        accounted += phase['seconds']
+        line = (f"  {name:<24} {phase['calls']:>6} {phase['seconds']:>9.3f} "
+                f"{1000 * phase['seconds'] / phase['calls']:>9.2f} "
+                f"{100 * phase['seconds'] / wall if wall else 0:>6.1f}")
+        if memory:
+            line += f" {phase['net_bytes'] / 1024:>10.1f} {phase['peak_bytes'] / 1024:>10.1f}"
+        lines.append(line)
+    rest = max(wall - accounted, 0.0)
+    lines.append(f"  {'(other)':<24} {'':>6} {rest:>9.3f} {'':>9} "
+                 f"{100 * rest / wall if wall else 0:>6.1f}")
+    return '\n'.join(lines)
+
+
+class _Stats:
+    """What ``pstats.Stats`` loads from: anything with ``create_stats``"""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+def combined_stats(function_stats):
+    """``pstats.Stats`` over the cProfile stats of several runs"""
+    import pstats
+
+    stream = io.StringIO()
+    combined = pstats.Stats(_Stats(function_stats[0]), stream=stream)
+    for stats in function_stats[1:]:
+        combined.add(_Stats(stats))
+    return combined
+
+
+def hotspots(stats, limit=20, sort='tottime'):
+    """The ``limit`` hottest functions of a ``pstats.Stats``, as text"""
+    stats.stream = io.StringIO()
+    stats.strip_dirs().sort_stats(sort).print_stats(limit)
+    return stats.stream.getvalue().strip('\n')
@@ -0,0 +1,408 @@
+"""
+Recover placeholder values from generated letters
+=================================================
+
+The letters in public/storage/surat are all that is left of most requests:
+the form data itself was never stored. ``TemplateSkeleton`` reads the
+values back out of a letter by aligning its text with the template's.
+
+The skeleton comes from the ``CompiledTemplate`` rather than from the
+template's raw text, so it knows what docxtemplater did to the XML: which
+paragraphs a loop repeats, which tag paragraphs it dropped, which table rows
+``{#list}`` expands to. Each compiled part is rendered once with marker
+characters in place of the values and around each section, run through the
+same ``TextIndex`` the extractor uses, and the marked text becomes one
+regular expression: static text matched literally, each slot a lazy group,
+each section a repeated group whose items are matched again one by one.
+
+``TextIndex`` is used with ``layout=True`` so an empty value still leaves
+its (empty) paragraph line, and a value's line breaks (``<w:br/>``) are told
+apart from paragraph ends: a slot never spans paragraphs, only ``{@raw}``
+XML does.
+
+What cannot come back: values of two slots with no static text between them
+(the first gets the shortest split), formatting, and anything a letter from
+an older template revision has in a different place - those letters are
+reported as not matching instead of guessed at.
+"""
+
+import io
+import os
+import re
+import zipfile
+import zlib
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+
+from template_tools.compiler import RAW, SECTION, SLOT, CompiledTemplate
+from template_tools.text_index import LINE_BREAK, PARAGRAPH_BREAK, TextIndex, layout_text
+
+# Private-use characters: never in a template or a value
+FIELD = '\ue000'
+OPEN = '\ue001'
+CLOSE = '\ue002'
+END = '\ue003'
+BLOCK = '\ue004'    # the marker sits in a paragraph of its own
+
+_MARK_RE = re.compile(f'({BLOCK}?)([{FIELD}{OPEN}{CLOSE}])(\\d+){END}')
+_ELEMENT_RE = re.compile(rb'<(/?)w:(t|r|p|tc|tr|tbl|body|txbxContent|hdr|ftr|footnote|endnote)'
+                         rb'(?=[\s/>])[^>]*?(/?)>')
+_LETTER_RE = re.compile(r'^([^_]+)_(.*)_(\d+)\.docx$', re.I)
+
+Recovered = namedtuple('Recovered', 'path template values conflicts error')
+
+
+def letter_prefix(path):
+    """``F106`` for ``F106_<nik>_<timestamp>.docx``"""
+    return os.path.basename(path).split('_', 1)[0].upper()
+
+
+def letter_fields(path):
+    """``(id, timestamp)`` from a letter's name, ``(None, None)`` if unnamed"""
+    match = _LETTER_RE.match(os.path.basename(path))
+    if not match:
+        return None, None
+    return match.group(2), int(match.group(3))
+
+
+# ---------------------------------------------------------------- skeleton
+
+class _Context:
+    """Tracks the innermost open text/run/paragraph/block element of
+    generated XML, to know how a marker can be inserted at its end"""
+
+    def __init__(self):
+        self.stack = []
+
+    def feed(self, chunk):
+        for match in _ELEMENT_RE.finditer(chunk):
+            if match.group(3):
+                continue
+            if match.group(1):
+                if self.stack:
+                    self.stack.pop()
+            else:
+                self.stack.append(match.group(2))
+
+    def marker(self, text):
+        """XML inserting ``text`` where the fed XML stops"""
+        inner = self.stack[-1] if self.stack else b'body'
+        data = text.encode('utf-8')
+        if inner == b't':
+            return data
+        if inner == b'r':
+            return b'<w:t>' + data + b'</w:t>'
+        if inner == b'p':
+            return b'<w:r><w:t>' + data + b'</w:t></w:r>'
+        return b'<w:p><w:r><w:t>' + BLOCK.encode('utf-8') + data + b'</w:t></w:r></w:p>'
+
+
+def _marked_xml(ops, context, fields, out):
+    for op in ops:
+        if op.__class__ is bytes:
+            context.feed(op)
+            out.append(op)
+            continue
+        number = len(fields)
+        fields.append(op)
+        if op[0] == SECTION:
+            out.append(context.marker(f'{OPEN}{number}{END}'))
+            _marked_xml(op[3], context, fields, out)
+            out.append(context.marker(f'{CLOSE}{number}{END}'))
+        else:
+            out.append(context.marker(f'{FIELD}{number}{END}'))
+
+
+def _tokens(text):
+    """Marked skeleton text -> flat list of static strings and ``(kind, number)``"""
+    tokens = []
+    pos = 0
+    for match in _MARK_RE.finditer(text):
+        start, end = match.span()
+        if start > pos:
+            tokens.append(text[pos:start])
+        if match.group(1):
+            # The marker's own paragraph is not in the letter: drop one line break
+            if text.startswith(PARAGRAPH_BREAK, end):
+                end += 1
+            else:
+                last = next((i for i in range(len(tokens) - 1, -1, -1)
+                             if isinstance(tokens[i], str)), None)
+                if last is not None and tokens[last].endswith(PARAGRAPH_BREAK):
+                    tokens[last] = tokens[last][:-1]
+        tokens.append((match.group(2), int(match.group(3))))
+        pos = end
+    if pos < len(text):
+        tokens.append(text[pos:])
+    return tokens
+
+
+def _tree(text):
+    """Marked skeleton text -> nested items: str, (field,), (section, items)"""
+    root = []
+    stack = [root]
+    for token in _tokens(text):
+        if isinstance(token, str):
+            if token:
+                stack[-1].append(token)
+            continue
+        kind, number = token
+        if kind == FIELD:
+            stack[-1].append((number,))
+        elif kind == OPEN:
+            items = []
+            stack[-1].append((number, items))
+            stack.append(items)
+        else:
+            stack.pop()
+    return root
+
+
+class _Pattern:
+    """Regex of one item list; sections keep a ``_Pattern`` of their body"""
+
+    def __init__(self, items, fields):
+        self.groups = []    # (group name, op, body pattern or None)
+        # Slots with nothing but blanks between them: "{a} {b}" cannot be
+        # split back when a value holds a space
+        self.ambiguous = set()
+        parts = []
+        previous = None
+        for item in items:
+            if isinstance(item, str):
+                parts.append(re.escape(item))
+                if item.strip() or PARAGRAPH_BREAK in item:
+                    previous = None
+                continue
+            group = f'g{len(self.groups)}'
+            op = fields[item[0]]
+            if len(item) == 1:
+                self.groups.append((group, op, None))
+                parts.append(f'(?P<{group}>{_field(op)})')
+                if previous is not None:
+                    self.ambiguous.update((previous, op[1]))
+                previous = op[1]
+            else:
+                body = _Pattern(item[1], fields)
+                self.groups.append((group, op, body))
+                parts.append(f'(?P<{group}>(?:{body.bare})*)')
+                self.ambiguous |= body.ambiguous
+                previous = None
+        self.source = ''.join(parts)
+        self.bare = _bare(items, fields)
+        self.statics = [item for item in items if isinstance(item, str)]
+        self.regex = re.compile(self.source, re.S)
+        # An item of a section ends where the next one or the section ends
+        self.item_regex = re.compile(f'{self.source}(?=(?:{self.bare})|\\Z)', re.S)
+
+    def values(self, match, values, conflicts):
+        for group, op, body in self.groups:
+            span = match.group(group)
+            name = op[1]
+            if body is None:
+                value = (span.rstrip(PARAGRAPH_BREAK) if op[0] == RAW
+                         else span.replace(LINE_BREAK, '\n'))
+            elif op[2]:
+                # {^name} shows its body only when name is falsy
+                value = not span
+            else:
+                value = []
+                pos = 0
+                while pos < len(span):
+                    item = body.item_regex.match(span, pos)
+                    if item is None or item.end() == pos:
+                        break
+                    value.append(body.values(item, {}, conflicts))
+                    pos = item.end()
+            if name not in values or values[name] in ('', [], None):
+                values[name] = value
+            elif value not in ('', []) and values[name] != value:
+                conflicts.add(name)
+        return values
+
+
+def _field(op):
+    return '.*?' if op[0] == RAW else '[^\\n]*?'
+
+
+def _bare(items, fields):
+    """Pattern of ``items`` without capturing groups"""
+    parts = []
+    for item in items:
+        if isinstance(item, str):
+            parts.append(re.escape(item))
+        elif len(item) == 1:
+            parts.append(_field(fields[item[0]]))
+        else:
+            parts.append(f'(?:{_bare(item[1], fields)})*')
+    return ''.join(parts)
+
+
+def _in_order(text, statics):
+    """Every static chunk found in order: cheap test before the regex, which
+    could backtrack for a long time over a letter that cannot match"""
+    pos = 0
+    for static in statics:
+        pos = text.find(static, pos)
+        if pos == -1:
+            return False
+        pos += len(static)
+    return True
+
+
+class TemplateSkeleton:
+    """Static text of a compiled template, one pattern per part.
+
+    Attributes:
+        source: path of the template .docx
+        patterns: part name -> pattern of its layout text
+        slot_names: sorted names of the slots outside sections
+        ambiguous: sorted names of slots whose values may be split wrongly
+            (only blanks between them and the next slot)
+    """
+
+    def __init__(self, compiled):
+        self.source = compiled.source
+        self.patterns = {}
+        self.slot_names = sorted({op[1] for ops in compiled.parts.values() for op in ops
+                                  if op.__class__ is not bytes and op[0] == SLOT})
+        ambiguous = set()
+        for part, ops in compiled.parts.items():
+            fields = []
+            out = []
+            _marked_xml(ops, _Context(), fields, out)
+            text = TextIndex.from_xml(io.BytesIO(b''.join(out)), layout=True).text
+            self.patterns[part] = _Pattern(_tree(text), fields)
+            ambiguous |= self.patterns[part].ambiguous
+        self.ambiguous = sorted(ambiguous)
+
+    def recover_text(self, part, text, values=None, conflicts=None):
+        """Values found in one part's layout text (``layout_text``), or
+        None when the text does not follow the template"""
+        values = {} if values is None else values
+        conflicts = set() if conflicts is None else conflicts
+        pattern = self.patterns[part]
+        if not _in_order(text, pattern.statics):
+            return None
+        match = pattern.regex.fullmatch(text)
+        if match is None:
+            return None
+        return pattern.values(match, values, conflicts)
+
+    def recover_part(self, part, xml, values=None, conflicts=None):
+        """``recover_text`` of a part given as XML bytes"""
+        return self.recover_text(part, layout_text(xml), values, conflicts)
+
+    def recover(self, docx):
+        """``(values, conflicts)`` of a generated letter (path or file object).
+
+        Raises:
+            ValueError: the letter does not follow this template
+        """
+        values = {}
+        conflicts = set()
+        with zipfile.ZipFile(docx) as zf:
+            names = set(zf.namelist())
+            for part in self.patterns:
+                if part not in names:
+                    raise ValueError(f"no {part}")
+                if self.recover_part(part, zf.read(part), values, conflicts) is None:
+                    raise ValueError(f"{part} does not match {os.path.basename(self.source)}")
+        return values, sorted(conflicts)
+
+
+# ---------------------------------------------------------------- archive
+
+def iter_letters(paths):
+    """Yield every .docx under ``paths`` (files or directories), lazily"""
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith('.docx') and not name.startswith('~$'):
+                    yield os.path.join(root, name)
+
+
+# Per-process registry of templates, shared with the audit workers
+_templates = {}
+_skeletons = {}
+
+
+def register_templates(templates):
+    """Make ``prefix -> CompiledTemplate`` the templates of this process,
+    replacing any registered before"""
+    _templates.clear()
+    _templates.update(templates)
+    # Skeletons built (or found missing) for the previous registry are stale
+    _skeletons.clear()
+
+
+def load_templates(artifacts):
+    """Register ``prefix -> CompiledTemplate.to_json()`` artifacts in this
+    process (the worker initializer of ``recover_letters``)"""
+    register_templates({prefix: CompiledTemplate.from_json(artifact)
+                        for prefix, artifact in artifacts.items()})
+
+
+def skeleton_for(prefix):
+    """Skeleton of the registered template for a letter prefix, built on
+    first use in this process; None when no template matches"""
+    if prefix not in _skeletons:
+        compiled = _templates.get(prefix, _templates.get(None))
+        _skeletons[prefix] = TemplateSkeleton(compiled) if compiled else None
+    return _skeletons[prefix]
+
+
+def _recover_one(path, skeleton):
+    if skeleton is None:
+        return Recovered(path, None, None, None, "no template for this letter")
+    template = os.path.basename(skeleton.source)
+    try:
+        values, conflicts = skeleton.recover(path)
+    except (OSError, KeyError, ValueError, zipfile.BadZipFile, zlib.error, ET.ParseError) as e:
+        return Recovered(path, template, None, None, str(e) or type(e).__name__)
+    return Recovered(path, template, values, conflicts, None)
+
+
+def _recover_chunk(chunk):
+    return [_recover_one(path, skeleton_for(prefix)) for prefix, path in chunk]
+
+
+def _chunks(paths, size):
+    chunk = []
+    for path in paths:
+        chunk.append((letter_prefix(path), path))
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def recover_letters(templates, paths, workers=1, chunk_size=64, window=None):
+    """Yield a ``Recovered`` per letter, in completion order.
+
+    Args:
+        templates: letter name prefix (``F106``) -> CompiledTemplate; letters
+            are matched to a template by the first part of their name, the
+            ``None`` entry (if any) takes every other letter
+        paths: letter paths (see ``iter_letters``), consumed lazily
+        workers: processes (1 works in this process)
+        chunk_size: letters handed to a worker at a time
+        window: chunks in flight at once (default: 4 per worker)
+    """
+    chunks = _chunks(paths, chunk_size)
+    if workers <= 1:
+        register_templates(templates)
+        for chunk in chunks:
+            yield from _recover_chunk(chunk)
+        return
+
+    from template_tools.pool import bounded_map
+
+    artifacts = {prefix: compiled.to_json() for prefix, compiled in templates.items()}
+    for results in bounded_map(_recover_chunk, chunks, workers, window, load_templates, (artifacts,)):
+        yield from results
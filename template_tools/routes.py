@@ -0,0 +1,386 @@
+"""
+Cross-check template placeholders against the API routes that fill them
+=======================================================================
+
+Every ``src/app/api/*/route.ts`` that renders a template builds its data
+object by hand::
+
+    const templatePath = join(process.cwd(), 'public', 'template', 'SKU.docx');
+    ...
+    const templateData = { nomor_surat: formData.nomor_surat || '', ... };
+    doc.render(templateData);
+
+Nothing ties those keys to the template, and docxtemplater's ``nullGetter``
+renders a missing key as ''. ``scan_route`` finds each such binding with a
+small TypeScript tokenizer (strings, template literals, comments and regex
+literals are skipped properly; no Node toolchain needed):
+
+- data objects are the arguments of ``.render(x)`` / ``.setData(x)``; their
+  keys come from the ``const x = {...}`` literal plus ``x.key = ...``
+  assignments
+- the template of a call is the last ``'NAME.docx'`` string literal before
+  it that names a file in the template directory (all of them when one line
+  holds several, as in ``cond ? 'A.docx' : 'B.docx'``)
+- a key whose value is a plain identifier (``list_ubah: list_ubah``) also
+  provides the keys of that identifier's object literals, which is how loop
+  items reach ``{#list_ubah}...{/list_ubah}``
+
+``check_binding`` then compares the keys with the extracted placeholders.
+"""
+
+import difflib
+import os
+import re
+from collections import namedtuple
+from pathlib import Path
+
+from template_tools.defaults import DEFAULT_TEMPLATE_DIR
+from template_tools.text_index import TAG_PREFIXES
+
+ROUTE_FILENAMES = ('route.ts', 'route.tsx', 'route.js')
+DATA_METHODS = ('render', 'setData')
+# Similarity above which a missing placeholder and an unused key are one typo
+MISSPELLING_CUTOFF = 0.8
+
+Token = namedtuple('Token', 'kind value pos')
+Binding = namedtuple('Binding', 'route line variable templates keys nested spread')
+Report = namedtuple('Report', 'binding expected missing extra misspelled')
+
+_IDENT_START = re.compile(r'[A-Za-z_$]')
+_IDENT = re.compile(r'[A-Za-z0-9_$]*')
+_NUMBER = re.compile(r'[0-9][0-9A-Za-z_.]*')
+_TEMPLATE_NAME = re.compile(r'(?:^|/)([A-Za-z0-9_.\-]+\.docx)$')
+# Keywords after which a '/' starts a regex literal rather than a division
+_REGEX_KEYWORDS = {'return', 'typeof', 'case', 'in', 'of', 'void', 'yield', 'await'}
+_PUNCT3 = ('...', '===', '!==', '**=', '<<=', '>>=', '&&=', '||=', '??=')
+_PUNCT2 = ('=>', '==', '!=', '<=', '>=', '&&', '||', '??', '?.', '++', '--',
+           '+=', '-=', '*=', '/=', '%=', '&=', '|=', '^=', '<<', '>>', '**')
+
+
+def _skip_string(source, i, quote):
+    """Index just past the string literal whose opening quote is at ``i``"""
+    n = len(source)
+    i += 1
+    while i < n:
+        c = source[i]
+        if c == '\\':
+            i += 2
+            continue
+        if c == quote:
+            return i + 1
+        if c == '\n' and quote != '`':
+            return i  # unterminated: stop at the line end
+        if quote == '`' and source.startswith('${', i):
+            i = _skip_expression(source, i + 2)
+            continue
+        i += 1
+    return n
+
+
+def _skip_expression(source, i):
+    """Index just past the ``}`` closing a template literal ``${`` expression"""
+    depth = 1
+    for token in tokenize(source, i):
+        if token.value == '{':
+            depth += 1
+        elif token.value == '}':
+            depth -= 1
+            if not depth:
+                return token.pos + 1
+    return len(source)
+
+
+def _skip_regex(source, i):
+    """Index just past the regex literal starting at ``i`` (flags included)"""
+    n = len(source)
+    i += 1
+    in_class = False
+    while i < n and source[i] != '\n':
+        c = source[i]
+        if c == '\\':
+            i += 2
+            continue
+        if c == '[':
+            in_class = True
+        elif c == ']':
+            in_class = False
+        elif c == '/' and not in_class:
+            return _IDENT.match(source, i + 1).end()
+        i += 1
+    return i
+
+
+def _regex_allowed(previous):
+    if previous is None:
+        return True
+    if previous.kind == 'punct':
+        return previous.value not in (')', ']', '}')
+    return previous.kind == 'ident' and previous.value in _REGEX_KEYWORDS
+
+
+def tokenize(source, start=0):
+    """Yield identifier, number, string and punctuation tokens of TS/JS source.
+
+    String values are the raw text between the quotes (escapes are kept,
+    template literal expressions are skipped).
+    """
+    n = len(source)
+    i = start
+    previous = None
+    while i < n:
+        c = source[i]
+        if c in ' \t\r\n':
+            i += 1
+            continue
+        if source.startswith('//', i):
+            end = source.find('\n', i)
+            i = n if end == -1 else end
+            continue
+        if source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            i = n if end == -1 else end + 2
+            continue
+
+        if c in '\'"`':
+            end = _skip_string(source, i, c)
+            token = Token('str', source[i + 1:end - 1], i)
+            i = end
+        elif _IDENT_START.match(c):
+            end = _IDENT.match(source, i + 1).end()
+            token = Token('ident', source[i:end], i)
+            i = end
+        elif c.isdigit():
+            end = _NUMBER.match(source, i).end()
+            token = Token('num', source[i:end], i)
+            i = end
+        elif c == '/' and _regex_allowed(previous):
+            end = _skip_regex(source, i)
+            token = Token('regex', source[i:end], i)
+            i = end
+        else:
+            for width, choices in ((3, _PUNCT3), (2, _PUNCT2)):
+                if source[i:i + width] in choices:
+                    token = Token('punct', source[i:i + width], i)
+                    i += width
+                    break
+            else:
+                token = Token('punct', c, i)
+                i += 1
+        previous = token
+        yield token
+
+
+def _matching(tokens, i):
+    """Index of the bracket closing the one at ``tokens[i]``"""
+    depth = 0
+    for j in range(i, len(tokens)):
+        value = tokens[j].value if tokens[j].kind == 'punct' else None
+        if value in ('{', '(', '['):
+            depth += 1
+        elif value in ('}', ')', ']'):
+            depth -= 1
+            if not depth:
+                return j
+    return len(tokens) - 1
+
+
+def _object_keys(tokens, start, end):
+    """``(keys, aliases, spread)`` of the object literal ``tokens[start:end+1]``.
+
+    ``aliases`` maps keys to the identifier they are set from (shorthand
+    properties included); ``spread`` is True when ``...x`` is present.
+    """
+    keys = []
+    aliases = {}
+    spread = False
+    depth = 0
+    for j in range(start, end + 1):
+        token = tokens[j]
+        if token.kind == 'punct' and token.value in ('{', '(', '['):
+            depth += 1
+            continue
+        if token.kind == 'punct' and token.value in ('}', ')', ']'):
+            depth -= 1
+            continue
+        if depth != 1:
+            continue
+        before = tokens[j - 1]
+        if before.kind != 'punct' or before.value not in ('{', ','):
+            continue
+        if token.value == '...':
+            spread = True
+            continue
+        if token.kind not in ('ident', 'str'):
+            continue
+        after = tokens[j + 1] if j + 1 <= end else None
+        if after is None:
+            continue
+        if after.value == ':':
+            keys.append(token.value)
+            value = tokens[j + 2] if j + 2 <= end else None
+            follow = tokens[j + 3] if j + 3 <= end else None
+            if value is not None and value.kind == 'ident' and follow is not None \
+                    and follow.value in (',', '}'):
+                aliases[token.value] = value.value
+        elif token.kind == 'ident' and after.value in (',', '}'):
+            keys.append(token.value)  # shorthand property
+            aliases[token.value] = token.value
+    return keys, aliases, spread
+
+
+def _definition(tokens, name, before):
+    """``(start, end)`` token range of the last ``const/let/var name = ...``
+    ahead of token ``before``, or None"""
+    found = None
+    for i in range(before - 2):
+        if tokens[i].value not in ('const', 'let', 'var') or tokens[i].kind != 'ident':
+            continue
+        if tokens[i + 1].kind != 'ident' or tokens[i + 1].value != name:
+            continue
+        # Skip a type annotation up to '=' at depth 0
+        j = i + 2
+        depth = 0
+        while j < len(tokens):
+            value = tokens[j].value if tokens[j].kind == 'punct' else None
+            if value in ('{', '(', '[', '<'):
+                depth += 1
+            elif value in ('}', ')', ']', '>'):
+                depth -= 1
+            elif value == '=' and depth == 0:
+                break
+            elif value == ';' and depth == 0:
+                j = before
+                break
+            j += 1
+        if j >= before - 1:
+            continue
+        start = j + 1
+        end = start
+        depth = 0
+        while end < len(tokens):
+            value = tokens[end].value if tokens[end].kind == 'punct' else None
+            if value in ('{', '(', '['):
+                depth += 1
+            elif value in ('}', ')', ']'):
+                depth -= 1
+                if depth < 0:
+                    break
+            elif value == ';' and depth == 0:
+                break
+            end += 1
+        found = (start, end - 1)
+    return found
+
+
+def _line(source, pos):
+    return source.count('\n', 0, pos) + 1
+
+
+def scan_route(path, template_dir=DEFAULT_TEMPLATE_DIR, source=None):
+    """Template data bindings (``Binding``) found in one route file"""
+    if source is None:
+        with open(path, 'r', encoding='utf-8') as f:
+            source = f.read()
+    if '.docx' not in source:
+        return []  # most routes never touch a template: skip tokenizing them
+    tokens = list(tokenize(source))
+
+    # Template references: 'X.docx' / 'public/template/X.docx' naming an existing template
+    references = []
+    for token in tokens:
+        if token.kind != 'str':
+            continue
+        match = _TEMPLATE_NAME.search(token.value)
+        if match and os.path.isfile(os.path.join(template_dir, match.group(1))):
+            references.append((token.pos, _line(source, token.pos), match.group(1)))
+
+    bindings = []
+    seen = set()
+    for i in range(1, len(tokens) - 3):
+        token = tokens[i]
+        if token.kind != 'ident' or token.value not in DATA_METHODS or tokens[i - 1].value != '.':
+            continue
+        if tokens[i + 1].value != '(' or tokens[i + 2].kind != 'ident' or tokens[i + 3].value != ')':
+            continue
+        before = [ref for ref in references if ref[0] < token.pos]
+        if not before:
+            continue
+        last_line = before[-1][1]
+        templates = sorted({name for _, line, name in before if line == last_line})
+        variable = tokens[i + 2].value
+        if (variable, tuple(templates)) in seen:
+            continue  # doc.setData(x) followed by doc.render(x)
+        seen.add((variable, tuple(templates)))
+
+        keys = []
+        aliases = {}
+        spread = False
+        definition = _definition(tokens, variable, i)
+        if definition is not None and tokens[definition[0]].value == '{':
+            start = definition[0]
+            keys, aliases, spread = _object_keys(tokens, start, _matching(tokens, start))
+        # x.key = ... / x['key'] = ... between the definition and the call
+        for j in range(definition[0] if definition else 0, i - 3):
+            if tokens[j].kind != 'ident' or tokens[j].value != variable:
+                continue
+            if tokens[j + 1].value == '.' and tokens[j + 2].kind == 'ident' \
+                    and tokens[j + 3].value == '=':
+                keys.append(tokens[j + 2].value)
+            elif tokens[j + 1].value == '[' and tokens[j + 2].kind == 'str' \
+                    and j + 4 < len(tokens) and tokens[j + 3].value == ']' \
+                    and tokens[j + 4].value == '=':
+                keys.append(tokens[j + 2].value)
+
+        # Keys of the objects a plain-identifier value is built from (loop items)
+        nested = set()
+        for alias in set(aliases.values()):
+            alias_definition = _definition(tokens, alias, i) if alias != variable else None
+            if alias_definition is not None:
+                start, end = alias_definition
+                for j in range(start, end + 1):
+                    if tokens[j].value == '{' and tokens[j].kind == 'punct':
+                        found, _, _ = _object_keys(tokens, j, _matching(tokens, j))
+                        nested.update(found)
+
+        bindings.append(Binding(
+            Path(path).as_posix(), _line(source, token.pos), variable, templates,
+            list(dict.fromkeys(keys)), sorted(nested), spread,
+        ))
+    return bindings
+
+
+def find_routes(paths):
+    """Route files under the given files/directories, sorted"""
+    found = set()
+    for path in paths:
+        if os.path.isfile(path):
+            found.add(os.path.normpath(path))
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs[:] = [d for d in dirs if d != 'node_modules' and not d.startswith('.')]
+            found.update(os.path.join(root, f) for f in files if f in ROUTE_FILENAMES)
+    return sorted(found)
+
+
+def check_binding(binding, placeholders):
+    """Compare one binding with ``{template: [placeholder names]}``"""
+    expected = set()
+    sections = set()
+    for template in binding.templates:
+        for name in placeholders.get(template, ()):
+            if name[:1] in TAG_PREFIXES:
+                sections.add(name[1:])  # the extractor only sees {/name}
+            else:
+                expected.add(name)
+    provided = set(binding.keys) | set(binding.nested)
+
+    missing = sorted(expected - provided - sections)
+    extra = [key for key in binding.keys if key not in expected and key not in sections]
+    misspelled = []
+    for name in list(missing):
+        close = difflib.get_close_matches(name, extra, n=1, cutoff=MISSPELLING_CUTOFF)
+        if close:
+            misspelled.append((close[0], name))
+            missing.remove(name)
+            extra.remove(close[0])
+    return Report(binding, sorted(expected), missing, sorted(extra), misspelled)
@@ -0,0 +1,99 @@
+"""
+Single-pass multi-pattern tag scanner
+=====================================
+
+Finds several delimiter styles (``{{..}}``, ``{..}``, ``[..]``, ``<..>``,
+docxtemplater ``{#loop}`` / ``{/loop}`` / ``{@raw}``) in one left-to-right
+pass over bytes. Each match carries the kind of pattern that produced it and
+its offset, so adding a delimiter style never adds another pass.
+
+The scanner works on the run-merged text of a part as returned by
+``merged_text_bytes`` (``text_index.layout_text``, XML-escaped again): only
+the matched values are decoded to str, and ``<``/``>`` are matched in their
+escaped ``&lt;``/``&gt;`` form.
+"""
+
+import re
+from collections import namedtuple
+from html import escape, unescape
+
+from template_tools.text_index import layout_text
+
+# Longest tag value looked at; keeps the scan linear on unbalanced input
+MAX_TAG_LENGTH = 256
+
+# A tag value runs from ``open`` to the first ``close``; ``stop`` (default:
+# first byte of ``close``) must not occur inside it, like ``[^}]+``
+Pattern = namedtuple('Pattern', 'kind open close stop', defaults=(None,))
+
+Match = namedtuple('Match', 'kind start end value')
+
+BRACE_PATTERNS = (
+    Pattern('double_brace', b'{{', b'}}'),
+    Pattern('brace', b'{', b'}'),
+    Pattern('bracket', b'[', b']'),
+    # '<' and '>' are always escaped inside <w:t>
+    Pattern('angle', b'&lt;', b'&gt;', b'&gt;'),
+)
+
+DOCXTEMPLATER_PATTERNS = (
+    Pattern('loop_open', b'{#', b'}'),
+    Pattern('loop_close', b'{/', b'}'),
+    Pattern('inverted', b'{^', b'}'),
+    Pattern('raw', b'{@', b'}'),
+)
+
+
+class MultiPatternScanner:
+    """Scan bytes for any of a set of delimiter patterns in one pass.
+
+    When several openers match at the same offset the longest one wins
+    (``{{`` before ``{#`` before ``{``); if its closer is missing the next
+    shorter opener is tried before moving on.
+    """
+
+    def __init__(self, patterns=BRACE_PATTERNS, max_length=MAX_TAG_LENGTH):
+        self.patterns = tuple(patterns)
+        self.max_length = max_length
+        by_first = {}
+        for pattern in sorted(self.patterns, key=lambda p: -len(p.open)):
+            by_first.setdefault(pattern.open[:1], []).append(pattern)
+        self._by_first = by_first
+        self._starts = re.compile(b'[' + b''.join(re.escape(b) for b in by_first) + b']')
+
+    def with_patterns(self, *patterns):
+        """New scanner with extra patterns added to this one's set"""
+        return MultiPatternScanner(self.patterns + tuple(patterns), self.max_length)
+
+    def scan(self, data, start=0, end=None):
+        """Yield ``Match(kind, start, end, value)``; ``value`` is decoded text"""
+        n = len(data) if end is None else end
+        search = self._starts.search
+        found = search(data, start, n)
+        while found:
+            i = found.start()
+            resume = i + 1
+            for pattern in self._by_first[data[i:i + 1]]:
+                if not data.startswith(pattern.open, i):
+                    continue
+                j = i + len(pattern.open)
+                k = data.find(pattern.close, j, min(n, j + self.max_length + len(pattern.close)))
+                if k <= j:
+                    continue
+                value = data[j:k]
+                if (pattern.stop or pattern.close[:1]) in value:
+                    continue
+                resume = k + len(pattern.close)
+                yield Match(pattern.kind, i, resume, unescape(value.decode('utf-8', 'replace')))
+                break
+            found = search(data, resume, n)
+
+
+def merged_text_bytes(xml):
+    """Run-merged text of a part as XML-escaped UTF-8, one line per paragraph.
+
+    The text is ``layout_text`` (runs of a paragraph joined, so tags split
+    across ``<w:r>`` are whole), with ``&``, ``<`` and ``>`` escaped again
+    for the byte patterns.
+    """
+    return escape(layout_text(xml), quote=False).encode('utf-8')
@@ -0,0 +1,424 @@
+"""
+Nested template schema: fields, loops and conditions
+====================================================
+
+``PlaceholderExtractor`` answers "which names does this template use" with
+one flat set, which says nothing about ``{#list_ubah}`` .. ``{/list_ubah}``
+in F-106 repeating table rows, about which names belong to a loop item,
+or about a ``{/tag}`` that closes the wrong section.
+
+``parse_schema`` reads every part once, in document order, and builds a
+tree the way docxtemplater resolves scopes:
+
+* ``{name}`` / ``{@name}``  a field (text / raw XML) of the current scope
+* ``{#name}``               a section; with fields inside (or repeating
+  table rows) it is a *loop or condition*: a list of objects repeats it,
+  an object shows it once with its fields looked up in the object first,
+  any other truthy value shows it once with the fields of the enclosing
+  scope. Without fields it is a plain *condition* on a truthy value
+* ``{^name}``               an inverted condition; its fields stay in the
+  enclosing scope, as docxtemplater looks them up there
+
+Sections must balance within each part. Every problem is collected as a
+``SchemaError`` with its location instead of stopping at the first one.
+Each loop records where it starts and ends ("Table 1, Row 2" to "Table 3,
+Row 4") and whether it repeats table rows, paragraphs or inline text.
+
+``TemplateSchema.json_schema()`` gives a JSON Schema (draft 2020-12) for the
+API routes and other consumers; ``TemplateSchema.validate`` checks a record
+against the tree directly, touching each field once.
+"""
+
+import os
+import zipfile
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+
+from template_tools.locations import NO_CELLS, format_location
+from template_tools.parts import discover_parts, part_label
+from template_tools.text_index import TAG_PREFIXES, iter_placeholders
+
+W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+W_BODY = W + 'body'
+W_P = W + 'p'
+W_T = W + 't'
+W_TBL = W + 'tbl'
+W_TR = W + 'tr'
+W_TC = W + 'tc'
+W_TXBX_CONTENT = W + 'txbxContent'
+MC_FALLBACK = '{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback'
+
+JSON_SCHEMA_DRAFT = 'https://json-schema.org/draft/2020-12/schema'
+
+# Field kinds
+TEXT = 'text'
+RAW = 'raw'
+# Section kinds
+LOOP_OR_CONDITION = 'loop_or_condition'
+CONDITION = 'condition'
+INVERTED = 'inverted'
+# What a section repeats (docxtemplater with paragraphLoop)
+ROWS = 'rows'
+PARAGRAPHS = 'paragraphs'
+INLINE = 'inline'
+
+SchemaError = namedtuple('SchemaError', 'message location')
+
+
+class Field:
+    """A ``{name}`` or ``{@name}`` tag; ``locations`` are labels"""
+    __slots__ = ('name', 'kind', 'locations')
+
+    def __init__(self, name, kind):
+        self.name = name
+        self.kind = kind
+        self.locations = []
+
+    def to_dict(self):
+        return {'kind': self.kind, 'locations': self.locations}
+
+
+class Section:
+    """A ``{#name}``/``{^name}`` block and the fields of its scope.
+
+    Attributes:
+        fields: name -> Field or Section, in order of first use
+        extents: ``(start label, end label, unit)`` per occurrence; unit is
+            ``ROWS``, ``PARAGRAPHS`` or ``INLINE``
+    """
+    __slots__ = ('name', 'kind', 'fields', 'extents')
+
+    def __init__(self, name, kind):
+        self.name = name
+        self.kind = kind
+        self.fields = {}
+        self.extents = []
+
+    def to_dict(self):
+        return {
+            'kind': self.kind,
+            'extents': [{'start': a, 'end': b, 'repeats': unit} for a, b, unit in self.extents],
+            'fields': {name: node.to_dict() for name, node in self.fields.items()},
+        }
+
+
+class _Open:
+    """A section waiting for its ``{/name}``"""
+    __slots__ = ('section', 'scope', 'inverted', 'location', 'paragraph', 'cells')
+
+    def __init__(self, section, scope, inverted, location, paragraph, cells):
+        self.section = section
+        self.scope = scope          # where fields inside the section go
+        self.inverted = inverted
+        self.location = location
+        self.paragraph = paragraph  # ordinal, to tell one paragraph from two
+        self.cells = cells
+
+
+class _Builder:
+    """Consumes the tags of one part in document order"""
+
+    def __init__(self, root, errors):
+        self.root = root
+        self.errors = errors
+        self.stack = []
+
+    @property
+    def scope(self):
+        return self.stack[-1].scope if self.stack else self.root
+
+    def _node(self, scope, name, cls, kind, label):
+        node = scope.fields.get(name)
+        if node is None:
+            node = scope.fields[name] = cls(name, kind)
+        elif not isinstance(node, cls):
+            used = 'section' if isinstance(node, Section) else 'field'
+            self.errors.append(SchemaError(f"'{name}' is used both as a {used} and as a "
+                                           f"{'section' if cls is Section else 'field'}", label))
+        return node
+
+    def tag(self, tag, location, paragraph):
+        label = format_location(*location)
+        prefix = tag[:1] if tag[:1] in TAG_PREFIXES else ''
+        name = tag[len(prefix):]
+        cells = location[3]
+        if prefix in ('#', '^'):
+            inverted = prefix == '^'
+            section = self._node(self.scope, name, Section, INVERTED if inverted else CONDITION, label)
+            scope = self.scope if inverted or not isinstance(section, Section) else section
+            self.stack.append(_Open(section, scope, inverted, label, paragraph, cells))
+        elif prefix == '/':
+            self.close(name, label, paragraph, cells)
+        else:
+            field = self._node(self.scope, name, Field, RAW if prefix == '@' else TEXT, label)
+            if isinstance(field, Field):
+                field.locations.append(label)
+
+    def close(self, name, label, paragraph, cells):
+        if not self.stack:
+            self.errors.append(SchemaError(f"{{/{name}}} closes no open section", label))
+            return
+        opened = self.stack.pop()
+        section = opened.section
+        if name and name != section.name:
+            self.errors.append(SchemaError(
+                f"{{/{name}}} closes {{{'^' if opened.inverted else '#'}{section.name}}} "
+                f"opened at {opened.location}", label))
+        if not isinstance(section, Section):
+            return
+        if opened.cells != cells:
+            unit = ROWS
+        elif opened.paragraph != paragraph:
+            unit = PARAGRAPHS
+        else:
+            unit = INLINE
+        section.extents.append((opened.location, label, unit))
+        if not opened.inverted and (section.fields or unit == ROWS):
+            section.kind = LOOP_OR_CONDITION
+
+    def finish(self):
+        for opened in reversed(self.stack):
+            self.errors.append(SchemaError(
+                f"{{{'^' if opened.inverted else '#'}{opened.section.name}}} is never closed",
+                opened.location))
+        self.stack = []
+
+
+def _read_part(source, part, builder):
+    """One iterparse pass: paragraph texts with their locations, in order"""
+    label = part_label(part) if part else ''
+    elements = []
+    boxes = [0]             # text box numbers, innermost last (0: the part itself)
+    box_count = 0
+    paragraphs = {0: 0}     # box -> container-level paragraph count
+    tables = []             # [number, row, cell] of open tables, outermost first
+    table_counts = {0: 0}
+    pieces = None
+    depth = 0               # open w:p elements
+    ordinal = 0
+    fallback = 0
+
+    for event, elem in ET.iterparse(source, events=('start', 'end')):
+        tag = elem.tag
+        if event == 'start':
+            elements.append(elem)
+            if tag == MC_FALLBACK:
+                fallback += 1
+            elif fallback:
+                pass
+            elif tag == W_TXBX_CONTENT:
+                box_count += 1
+                boxes.append(box_count)
+                paragraphs[box_count] = 0
+                table_counts[box_count] = 0
+            elif tag == W_TBL:
+                if tables:
+                    # python-docx numbers nested tables like their parent
+                    tables.append([tables[-1][0], 0, 0])
+                else:
+                    table_counts[boxes[-1]] += 1
+                    tables.append([table_counts[boxes[-1]], 0, 0])
+            elif tag == W_TR and tables:
+                tables[-1][1] += 1
+                tables[-1][2] = 0
+            elif tag == W_TC and tables:
+                tables[-1][2] += 1
+            elif tag == W_P:
+                depth += 1
+                if depth == 1:
+                    ordinal += 1
+                    pieces = []
+                    if not tables:
+                        paragraphs[boxes[-1]] += 1
+            continue
+
+        elements.pop()
+        if tag == MC_FALLBACK:
+            fallback -= 1
+        elif fallback:
+            pass
+        elif tag == W_T and pieces is not None:
+            pieces.append(elem.text or '')
+        elif tag == W_P:
+            depth -= 1
+            if depth == 0 and pieces:
+                text = ''.join(pieces)
+                if '{' in text:
+                    cells = tuple(tuple(t) for t in tables) if tables else NO_CELLS
+                    box = boxes[-1]
+                    location = (label, box, 0 if cells else paragraphs[box], cells)
+                    for found in iter_placeholders(text, TAG_PREFIXES):
+                        builder.tag(found.name, location, ordinal)
+                pieces = None
+        elif tag == W_TBL and tables:
+            tables.pop()
+        elif tag == W_TXBX_CONTENT and len(boxes) > 1:
+            boxes.pop()
+
+        elem.clear()
+        if elements:
+            elements[-1].remove(elem)
+
+
+class TemplateSchema:
+    """Nested fields, loops and conditions of one template.
+
+    Attributes:
+        source: path of the template .docx
+        root: ``Section`` holding the top-level scope
+        errors: ``SchemaError`` list (unbalanced or misnamed sections, names
+            used both as field and section)
+    """
+
+    def __init__(self, source, root, errors):
+        self.source = source
+        self.root = root
+        self.errors = errors
+
+    @property
+    def fields(self):
+        return self.root.fields
+
+    def to_dict(self):
+        """Plain nested dict of the tree and its errors"""
+        return {
+            'template': os.path.basename(self.source),
+            'fields': {name: node.to_dict() for name, node in self.root.fields.items()},
+            'errors': [{'message': e.message, 'location': e.location} for e in self.errors],
+        }
+
+    # ------------------------------------------------------------ JSON Schema
+
+    def json_schema(self):
+        """JSON Schema (draft 2020-12) of a record for this template.
+
+        Text fields accept strings, numbers and null (docxtemplater prints
+        them, ``nullGetter`` turns null into ''). A loop or condition accepts
+        an array of objects, an object, or a plain value; when that value is
+        truthy the section's fields are required next to it. Sections are
+        not required (missing is falsy). Fields of an enclosing scope are
+        not required again inside a section, as docxtemplater finds them
+        there.
+        """
+        schema = {
+            '$schema': JSON_SCHEMA_DRAFT,
+            'title': os.path.basename(self.source),
+            'description': f"Record rendered by {os.path.basename(self.source)}",
+        }
+        schema.update(_object_schema(self.root))
+        return schema
+
+    # ------------------------------------------------------------ validation
+
+    def validate(self, record):
+        """Problems of ``record`` as ``"path: message"`` strings; empty if valid"""
+        problems = []
+        if not isinstance(record, dict):
+            return ["record: expected an object"]
+        _validate(self.root, record, '', problems)
+        return problems
+
+
+_VALUE_TYPES = ['string', 'number', 'null']
+_CONDITION_TYPES = ['boolean', 'string', 'number', 'null']
+# JSON values docxtemplater treats as falsy ([] is an array: no items)
+_FALSY = [False, None, '', 0]
+
+
+def _scope_fields(scope):
+    return {name for name, node in scope.fields.items() if isinstance(node, Field)}
+
+
+def _object_schema(scope, inherited=frozenset()):
+    """Object schema of a scope; ``inherited``: field names of the
+    enclosing scopes, found there when the record of this scope lacks them"""
+    properties = {}
+    required = []
+    conditions = []
+    for name, node in scope.fields.items():
+        if isinstance(node, Field):
+            prop = {'type': _VALUE_TYPES}
+            if node.kind == RAW:
+                prop['description'] = "raw WordprocessingML inserted as is"
+            if name not in inherited:
+                required.append(name)
+        elif node.kind == LOOP_OR_CONDITION:
+            inner = _object_schema(node, inherited | _scope_fields(scope))
+            prop = {
+                'description': "list of objects (repeated), object (shown once, its fields "
+                               "looked up first) or condition (fields next to it)",
+                'anyOf': [{'type': 'array', 'items': inner}, inner, {'type': _CONDITION_TYPES}],
+                'x-docx-repeats': [
+                    {'start': start, 'end': end, 'unit': unit} for start, end, unit in node.extents
+                ],
+            }
+            # A truthy plain value shows the section with this scope's fields
+            own = _object_schema(node, inherited)
+            own.pop('type')
+            conditions.append({
+                'if': {'properties': {name: {'type': _CONDITION_TYPES, 'not': {'enum': _FALSY}}},
+                       'required': [name]},
+                'then': own,
+            })
+        else:
+            prop = {'description': "shown when falsy" if node.kind == INVERTED
+                    else "shown when truthy"}
+        properties[name] = prop
+    schema = {'type': 'object', 'properties': properties, 'required': required}
+    if conditions:
+        schema['allOf'] = conditions
+    return schema
+
+
+def _is_value(value):
+    return value is None or (isinstance(value, (str, int, float)) and not isinstance(value, bool))
+
+
+def _validate(scope, record, path, problems, inherited=frozenset()):
+    """Check ``record`` against ``scope`` the way ``_object_schema`` does"""
+    for name, node in scope.fields.items():
+        where = f"{path}{name}"
+        if name not in record:
+            if isinstance(node, Field) and name not in inherited:
+                problems.append(f"{where}: missing")
+            continue
+        value = record[name]
+        if isinstance(node, Field):
+            if not _is_value(value):
+                problems.append(f"{where}: expected text, got {type(value).__name__}")
+        elif node.kind == LOOP_OR_CONDITION:
+            inner = inherited | _scope_fields(scope)
+            if isinstance(value, (list, tuple)):
+                for number, item in enumerate(value):
+                    if isinstance(item, dict):
+                        _validate(node, item, f"{where}[{number}].", problems, inner)
+                    else:
+                        problems.append(f"{where}[{number}]: expected an object, "
+                                        f"got {type(item).__name__}")
+            elif isinstance(value, dict):
+                _validate(node, value, f"{where}.", problems, inner)
+            elif isinstance(value, bool) or _is_value(value):
+                if value:
+                    _validate(node, record, path, problems, inherited)
+            else:
+                problems.append(f"{where}: expected a list, an object or a condition, "
+                                f"got {type(value).__name__}")
+
+
+def parse_schema(docx_path, all_parts=True):
+    """``TemplateSchema`` of a template, reading each part once.
+
+    Raises:
+        zipfile.BadZipFile / KeyError / ET.ParseError for unreadable files
+    """
+    root = Section(None, LOOP_OR_CONDITION)
+    errors = []
+    with zipfile.ZipFile(docx_path) as zf:
+        parts = discover_parts(zf) if all_parts else discover_parts(zf)[:1]
+        for index, part in enumerate(parts):
+            builder = _Builder(root, errors)
+            with zf.open(part.name) as xml_file:
+                # The main part is labelled like the extractor does: no prefix
+                _read_part(xml_file, part.name if index else '', builder)
+            builder.finish()
+    return TemplateSchema(docx_path, root, errors)
@@ -0,0 +1,224 @@
+"""
+Full-text search over generated letters
+=======================================
+
+Finding every letter issued to a name or NIK used to mean opening the
+archive's .docx files one by one. ``index_letters`` streams the text out of
+every letter under public/storage/surat (or a local copy of the Supabase
+bucket) over a process pool and loads it into a SQLite FTS5 table:
+
+    files    path, size, mtime_ns, error   one row per letter seen
+    letters  name, body                    FTS5, rowid = files.id
+
+``name`` is the file name (``F106_<nik>_<timestamp>``, so the NIK in the
+name is searchable too) and ``body`` the run-merged text of the document,
+headers, footers and notes (``text_index.layout_text``), one line per
+paragraph, with ``<w:tab/>`` as a tab so a label and its value stay
+separate words. Workers only extract
+text; the parent is the single SQLite writer. A letter whose size and
+mtime are unchanged is not opened again, and letters gone from the
+indexed directories are dropped from the index.
+
+``search`` answers with hits ranked by bm25 and a snippet around the
+match. Each word of a plain query must occur (``budi santoso``); ``nik*``
+matches a prefix; ``raw=True`` passes FTS5 query syntax through.
+"""
+
+import os
+import sqlite3
+import zipfile
+import zlib
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+
+from template_tools.parts import discover_parts
+from template_tools.recover import iter_letters
+from template_tools.text_index import LINE_BREAK, layout_text
+
+# PRAGMA user_version of the database; older layouts are rebuilt
+SCHEMA_VERSION = 1
+SNIPPET_TOKENS = 12
+SNIPPET_MARKS = ('[', ']')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    error TEXT
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS letters USING fts5(
+    name, body, tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+Extracted = namedtuple('Extracted', 'path size mtime_ns text error')
+Hit = namedtuple('Hit', 'path rank snippet')
+
+
+class IndexStats:
+    """Counters of an indexing run"""
+
+    def __init__(self):
+        self.indexed = 0
+        self.unchanged = 0
+        self.removed = 0
+        self.failed = 0
+
+
+def letter_text(path):
+    """Paragraph text of every scanned part of a letter, main part first"""
+    with zipfile.ZipFile(path) as zf:
+        texts = [layout_text(zf.read(part.name)) for part in discover_parts(zf)]
+    return '\n'.join(text.replace(LINE_BREAK, '\n') for text in texts if text)
+
+
+def _extract_chunk(chunk):
+    results = []
+    for path, size, mtime_ns in chunk:
+        try:
+            results.append(Extracted(path, size, mtime_ns, letter_text(path), None))
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile, zlib.error, ET.ParseError) as e:
+            results.append(Extracted(path, size, mtime_ns, None, str(e) or type(e).__name__))
+    return results
+
+
+def connect(db_path):
+    """Open (and create or migrate) the search database"""
+    if db_path != ':memory:':
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+    db = sqlite3.connect(db_path)
+    version = db.execute('PRAGMA user_version').fetchone()[0]
+    if version != SCHEMA_VERSION:
+        db.executescript('DROP TABLE IF EXISTS files; DROP TABLE IF EXISTS letters;')
+    try:
+        db.executescript(_SCHEMA)
+    except sqlite3.OperationalError as e:
+        db.close()
+        raise RuntimeError(f"SQLite without FTS5 support: {e}") from None
+    db.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+    db.commit()
+    return db
+
+
+def _chunks(paths, known, stats, chunk_size):
+    chunk = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        if known.get(path) == (stat.st_size, stat.st_mtime_ns):
+            stats.unchanged += 1
+            continue
+        chunk.append((path, stat.st_size, stat.st_mtime_ns))
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _store(db, result):
+    row = db.execute('SELECT id FROM files WHERE path = ?', (result.path,)).fetchone()
+    if row is not None:
+        db.execute('DELETE FROM letters WHERE rowid = ?', row)
+        db.execute('UPDATE files SET size = ?, mtime_ns = ?, error = ? WHERE id = ?',
+                   (result.size, result.mtime_ns, result.error, row[0]))
+        file_id = row[0]
+    else:
+        file_id = db.execute('INSERT INTO files (path, size, mtime_ns, error) VALUES (?, ?, ?, ?)',
+                             (result.path, result.size, result.mtime_ns, result.error)).lastrowid
+    if result.text is not None:
+        name = os.path.splitext(os.path.basename(result.path))[0]
+        db.execute('INSERT INTO letters (rowid, name, body) VALUES (?, ?, ?)',
+                   (file_id, name, result.text))
+
+
+def _forget_missing(db, roots, seen):
+    """Drop letters under the ``roots`` directories not found in this run"""
+    roots = tuple(os.path.join(root, '') for root in roots if os.path.isdir(root))
+    gone = [(file_id,) for file_id, path in db.execute('SELECT id, path FROM files')
+            if path.startswith(roots) and path not in seen]
+    db.executemany('DELETE FROM letters WHERE rowid = ?', gone)
+    db.executemany('DELETE FROM files WHERE id = ?', gone)
+    return len(gone)
+
+
+def index_letters(db, paths, workers=1, chunk_size=64, window=None, on_result=None):
+    """Index every new or changed letter under ``paths``.
+
+    Args:
+        db: connection from ``connect``; committed after every chunk, so an
+            interrupted run keeps what it indexed
+        paths: letter files or directories (walked lazily)
+        workers: processes extracting text (1 works in this process)
+        on_result: ``callback(Extracted)`` for each letter indexed now
+    Returns:
+        ``IndexStats``
+    """
+    stats = IndexStats()
+    known = {path: (size, mtime_ns) for path, size, mtime_ns
+             in db.execute('SELECT path, size, mtime_ns FROM files')}
+    seen = set()
+
+    def letters():
+        for path in iter_letters(paths):
+            seen.add(path)
+            yield path
+
+    chunks = _chunks(letters(), known, stats, chunk_size)
+    if workers <= 1:
+        batches = (_extract_chunk(chunk) for chunk in chunks)
+    else:
+        from template_tools.pool import bounded_map
+
+        batches = bounded_map(_extract_chunk, chunks, workers, window)
+    for results in batches:
+        with db:
+            for result in results:
+                _store(db, result)
+                stats.indexed += 1
+                stats.failed += result.error is not None
+                if on_result is not None:
+                    on_result(result)
+    with db:
+        stats.removed = _forget_missing(db, paths, seen)
+    return stats
+
+
+def fts_query(query):
+    """FTS5 query requiring every word of a plain query (``word*``: prefix)"""
+    terms = []
+    for word in query.split():
+        prefix = word.endswith('*')
+        word = word.rstrip('*')
+        if word:
+            terms.append('"' + word.replace('"', '""') + '"' + ('*' if prefix else ''))
+    return ' '.join(terms)
+
+
+def search(db, query, limit=20, raw=False):
+    """``Hit`` list, best first (raises ValueError on a bad FTS5 query)"""
+    match = query if raw else fts_query(query)
+    if not match:
+        return []
+    start, end = SNIPPET_MARKS
+    try:
+        rows = db.execute(
+            'SELECT files.path, bm25(letters), '
+            f'snippet(letters, 1, ?, ?, ?, {SNIPPET_TOKENS}) '
+            'FROM letters JOIN files ON files.id = letters.rowid '
+            'WHERE letters MATCH ? ORDER BY bm25(letters) LIMIT ?',
+            (start, end, '…', match, limit),
+        ).fetchall()
+    except sqlite3.OperationalError as e:
+        raise ValueError(f"bad search query {match!r}: {e}") from None
+    return [Hit(path, rank, ' '.join(snippet.split())) for path, rank, snippet in rows]
+
+
+def counts(db):
+    """``(letters indexed, letters that could not be read)``"""
+    total, failed = db.execute('SELECT COUNT(*), COUNT(error) FROM files').fetchone()
+    return total - failed, failed
@@ -0,0 +1,429 @@
+"""
+Template slimming
+=================
+
+The kelurahan letterhead templates (SKTM, SKU, UMUM, BELUMRUMAH,
+KETERANGAN*) are ~135 KB against 16-19 KB for F-106. Most of the gap is the
+letterhead PNG, which Word stored *uncompressed* in the zip. PizZip's
+``generate({compression: 'DEFLATE'})`` only reuses a member's compressed
+bytes when it is already deflated, so every render deflates the image
+again. ``slim_template`` rewrites the package:
+
+* parts that nothing references are dropped. References are the
+  relationships reachable from ``_rels/.rels``, and image relationships
+  whose ``r:embed``/``r:id`` no longer appears in their source part do not
+  count
+* identical media are kept once and their relationships retargeted
+* PNGs are re-encoded losslessly: ancillary text/time chunks dropped, each
+  scanline filter chosen again, IDAT deflated at level 9. The new file is
+  used only when it is smaller and decodes to the same pixels
+* every member is deflated at level 9, EMF/WMF and the images included
+
+``package_members`` lists the members with their sizes and whether
+anything references them. ``verify_slimmed`` checks that the extractor
+still finds the same placeholders at the same locations.
+"""
+
+import io
+import posixpath
+import re
+import struct
+import time
+import zipfile
+import zlib
+from collections import namedtuple
+
+from template_tools.parts import CONTENT_TYPES_PART, PACKAGE_RELS_PART, _rels_path
+from template_tools.zipwriter import ZipTemplate
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+# Chunks a viewer never needs to draw the image
+PNG_DROPPED_CHUNKS = {b'tEXt', b'zTXt', b'iTXt', b'tIME'}
+PNG_CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+MEDIA_PREFIX = 'word/media/'
+
+_RELATIONSHIP_RE = re.compile(rb'<Relationship\b[^>]*?/>')
+_ATTR_RE = re.compile(rb'([\w:]+)="([^"]*)"')
+_OVERRIDE_RE = re.compile(rb'<Override\b[^>]*?/>')
+
+Member = namedtuple('Member', 'name size compressed stored referenced')
+Relationship = namedtuple('Relationship', 'id type target external xml')
+
+
+# ---------------------------------------------------------------- references
+
+def _attrs(element):
+    return {name.decode(): value.decode() for name, value in _ATTR_RE.findall(element)}
+
+
+def _relationships(rels_xml, source):
+    """``Relationship`` list of a .rels file whose source part is ``source``"""
+    base = posixpath.dirname(source)
+    found = []
+    for element in _RELATIONSHIP_RE.findall(rels_xml):
+        attrs = _attrs(element)
+        target = attrs.get('Target', '')
+        external = attrs.get('TargetMode') == 'External'
+        if not external:
+            target = target[1:] if target.startswith('/') else posixpath.normpath(
+                posixpath.join(base, target))
+        found.append(Relationship(attrs.get('Id', ''), attrs.get('Type', '').rsplit('/', 1)[-1],
+                                  target, external, element))
+    return found
+
+
+def _rels_source(rels_name):
+    """Part a .rels file belongs to ('' for the package rels)"""
+    if rels_name == PACKAGE_RELS_PART:
+        return ''
+    folder, base = posixpath.split(rels_name)
+    return posixpath.join(posixpath.dirname(folder), base[:-len('.rels')])
+
+
+def _unused(relationship, source_xml):
+    """Image relationship whose id the source part no longer mentions"""
+    return (relationship.type == 'image' and source_xml is not None
+            and f'"{relationship.id}"'.encode() not in source_xml)
+
+
+def referenced_parts(contents):
+    """Names reachable from ``_rels/.rels``, with the .rels files of the
+    reached parts and ``[Content_Types].xml``.
+
+    Args:
+        contents: member name -> bytes
+    """
+    reached = {CONTENT_TYPES_PART, PACKAGE_RELS_PART}
+    pending = ['']
+    while pending:
+        source = pending.pop()
+        rels_name = _rels_path(source) if source else PACKAGE_RELS_PART
+        if rels_name not in contents:
+            continue
+        reached.add(rels_name)
+        for relationship in _relationships(contents[rels_name], source):
+            if relationship.external or relationship.target in reached \
+                    or relationship.target not in contents \
+                    or _unused(relationship, contents.get(source)):
+                continue
+            reached.add(relationship.target)
+            pending.append(relationship.target)
+    return reached
+
+
+def package_members(docx_path):
+    """``Member`` list of a package, in zip order"""
+    with zipfile.ZipFile(docx_path) as zf:
+        infos = zf.infolist()
+        contents = {info.filename: zf.read(info) for info in infos}
+    reached = referenced_parts(contents)
+    return [Member(info.filename, info.file_size, info.compress_size,
+                   info.compress_type == zipfile.ZIP_STORED, info.filename in reached)
+            for info in infos]
+
+
+# ---------------------------------------------------------------- PNG
+
+def _png_chunks(data):
+    pos = len(PNG_SIGNATURE)
+    while pos + 8 <= len(data):
+        length, kind = struct.unpack_from('>I4s', data, pos)
+        yield kind, data[pos + 8:pos + 8 + length]
+        pos += 12 + length
+
+
+def _png_chunk(kind, body):
+    return struct.pack('>I', len(body)) + kind + body + struct.pack('>I', zlib.crc32(kind + body))
+
+
+def _unfilter(raw, height, stride, bpp):
+    """Scanlines of a filtered, non-interlaced image"""
+    rows = []
+    prev = bytearray(stride)
+    for r in range(height):
+        start = r * (stride + 1)
+        kind = raw[start]
+        line = bytearray(raw[start + 1:start + 1 + stride])
+        if kind == 1:
+            for x in range(bpp, stride):
+                line[x] = (line[x] + line[x - bpp]) & 0xFF
+        elif kind == 2:
+            for x in range(stride):
+                line[x] = (line[x] + prev[x]) & 0xFF
+        elif kind == 3:
+            for x in range(stride):
+                left = line[x - bpp] if x >= bpp else 0
+                line[x] = (line[x] + ((left + prev[x]) >> 1)) & 0xFF
+        elif kind == 4:
+            for x in range(stride):
+                a = line[x - bpp] if x >= bpp else 0
+                b = prev[x]
+                c = prev[x - bpp] if x >= bpp else 0
+                p = a + b - c
+                pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+                line[x] = (line[x] + (a if pa <= pb and pa <= pc else b if pb <= pc else c)) & 0xFF
+        elif kind != 0:
+            raise ValueError(f"bad PNG filter type {kind}")
+        rows.append(bytes(line))
+        prev = line
+    return rows
+
+
+def _filtered(line, prev, bpp, kind):
+    if kind == 0:
+        return line
+    out = bytearray(len(line))
+    for x in range(len(line)):
+        a = line[x - bpp] if x >= bpp else 0
+        b = prev[x]
+        if kind == 1:
+            out[x] = (line[x] - a) & 0xFF
+        elif kind == 2:
+            out[x] = (line[x] - b) & 0xFF
+        elif kind == 3:
+            out[x] = (line[x] - ((a + b) >> 1)) & 0xFF
+        else:
+            c = prev[x - bpp] if x >= bpp else 0
+            p = a + b - c
+            pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+            out[x] = (line[x] - (a if pa <= pb and pa <= pc else b if pb <= pc else c)) & 0xFF
+    return bytes(out)
+
+
+def _refiltered(rows, stride, bpp, original):
+    """Candidate filtered streams: the original filters, each filter type on
+    every row, and per row the filter with the smallest sum of magnitudes"""
+    candidates = [original]
+    per_kind = [[] for _ in range(5)]
+    adaptive = []
+    prev = bytes(stride)
+    for line in rows:
+        options = [_filtered(line, prev, bpp, kind) for kind in range(5)]
+        for kind, filtered in enumerate(options):
+            per_kind[kind].append(bytes((kind,)) + filtered)
+        best = min(range(5), key=lambda k: sum(v if v < 128 else 256 - v for v in options[k]))
+        adaptive.append(per_kind[best][-1])
+        prev = line
+    candidates.extend(b''.join(rows) for rows in per_kind)
+    candidates.append(b''.join(adaptive))
+    return candidates
+
+
+def _deflate(raw):
+    best = None
+    for strategy in (zlib.Z_DEFAULT_STRATEGY, zlib.Z_FILTERED):
+        compressor = zlib.compressobj(9, zlib.DEFLATED, 15, 9, strategy)
+        data = compressor.compress(raw) + compressor.flush()
+        if best is None or len(data) < len(best):
+            best = data
+    return best
+
+
+def _png_pixels(data):
+    """``(header, scanlines, filtered stream)`` of a PNG, None for what is not handled
+    (interlaced images, unknown colour types)"""
+    chunks = list(_png_chunks(data))
+    if not chunks or chunks[0][0] != b'IHDR':
+        return None
+    header = chunks[0][1]
+    width, height, depth, colour, _, _, interlace = struct.unpack('>IIBBBBB', header)
+    if interlace or colour not in PNG_CHANNELS:
+        return None
+    bits = PNG_CHANNELS[colour] * depth
+    stride = (width * bits + 7) // 8
+    raw = zlib.decompress(b''.join(body for kind, body in chunks if kind == b'IDAT'))
+    return header, _unfilter(raw, height, stride, max(1, bits // 8)), raw
+
+
+def recompress_png(data):
+    """Smallest lossless re-encoding of a PNG, or ``data`` itself"""
+    if not data.startswith(PNG_SIGNATURE):
+        return data
+    try:
+        decoded = _png_pixels(data)
+    except (zlib.error, struct.error, ValueError):
+        return data
+    if decoded is None:
+        return data
+    header, rows, raw = decoded
+    width, _, depth, colour = struct.unpack('>IIBB', header[:10])
+    bits = PNG_CHANNELS[colour] * depth
+    stride = (width * bits + 7) // 8
+    idat = min((_deflate(candidate) for candidate in
+                _refiltered(rows, stride, max(1, bits // 8), raw)), key=len)
+
+    out = [PNG_SIGNATURE]
+    for kind, body in _png_chunks(data):
+        if kind in PNG_DROPPED_CHUNKS:
+            continue
+        if kind == b'IDAT':
+            if idat is not None:
+                out.append(_png_chunk(b'IDAT', idat))
+                idat = None
+            continue
+        out.append(_png_chunk(kind, body))
+    slimmed = b''.join(out)
+    if len(slimmed) >= len(data):
+        return data
+    check = _png_pixels(slimmed)
+    if check is None or check[1] != rows:
+        return data
+    return slimmed
+
+
+# ---------------------------------------------------------------- package
+
+SlimReport = namedtuple('SlimReport', 'dropped duplicates recompressed')
+
+
+def _relative_target(source, target):
+    return posixpath.relpath(target, posixpath.dirname(source) or '.')
+
+
+class SlimmedTemplate:
+    """Result of ``slim_template``.
+
+    Attributes:
+        source: path of the template .docx
+        contents: member name -> bytes of the members kept
+        report: ``SlimReport``: dropped parts (name -> reason), duplicates
+            (name -> the copy kept) and recompressed images
+            (name -> (bytes before, after))
+    """
+
+    def __init__(self, source, contents, report):
+        self.source = source
+        self.contents = contents
+        self.report = report
+
+    def write(self, output):
+        """Write the slimmed .docx: members in template order, all deflated"""
+        package = ZipTemplate(self.source)
+        package.drop(name for name in package.names if name not in self.contents)
+        return package.write(output, self.contents, compresslevel=9)
+
+    def to_bytes(self):
+        buffer = io.BytesIO()
+        self.write(buffer)
+        return buffer.getvalue()
+
+
+def slim_template(docx_path):
+    """Slim a template in memory (nothing is written)"""
+    with zipfile.ZipFile(docx_path) as zf:
+        contents = {info.filename: zf.read(info) for info in zf.infolist()}
+
+    # Identical media: the first copy (in zip order) stands for the others
+    kept_media = {}
+    duplicates = {}
+    for name, data in contents.items():
+        if name.startswith(MEDIA_PREFIX):
+            duplicates_of = kept_media.setdefault(data, name)
+            if duplicates_of != name:
+                duplicates[name] = duplicates_of
+    if duplicates:
+        for rels_name in [n for n in contents if n.endswith('.rels')]:
+            source = _rels_source(rels_name)
+            rels_xml = contents[rels_name]
+            for relationship in _relationships(rels_xml, source):
+                if not relationship.external and relationship.target in duplicates:
+                    retargeted = relationship.xml.replace(
+                        b'Target="' + _attrs(relationship.xml)['Target'].encode() + b'"',
+                        b'Target="' + _relative_target(
+                            source, duplicates[relationship.target]).encode() + b'"',
+                    )
+                    rels_xml = rels_xml.replace(relationship.xml, retargeted, 1)
+            contents[rels_name] = rels_xml
+
+    # Unused image relationships go, then whatever nothing reaches
+    for rels_name in [n for n in contents if n.endswith('.rels')]:
+        source = _rels_source(rels_name)
+        rels_xml = contents[rels_name]
+        for relationship in _relationships(rels_xml, source):
+            if _unused(relationship, contents.get(source)):
+                rels_xml = rels_xml.replace(relationship.xml, b'', 1)
+        contents[rels_name] = rels_xml
+    reached = referenced_parts(contents)
+    dropped = {name: "duplicate of " + duplicates[name] if name in duplicates else "unreferenced"
+               for name in contents if name not in reached}
+    for name in dropped:
+        del contents[name]
+    if dropped:
+        overrides = {f'/{name}'.encode() for name in dropped}
+        contents[CONTENT_TYPES_PART] = _OVERRIDE_RE.sub(
+            lambda m: b'' if _attrs(m.group()).get('PartName', '').encode() in overrides
+            else m.group(), contents[CONTENT_TYPES_PART],
+        )
+
+    recompressed = {}
+    for name, data in contents.items():
+        if name.lower().endswith('.png'):
+            slimmed = recompress_png(data)
+            if slimmed is not data:
+                recompressed[name] = (len(data), len(slimmed))
+                contents[name] = slimmed
+    return SlimmedTemplate(str(docx_path), contents,
+                           SlimReport(dropped, {n: duplicates[n] for n in dropped
+                                                if n in duplicates}, recompressed))
+
+
+# ---------------------------------------------------------------- checks
+
+def load_seconds(path, repeat=20):
+    """Best time to read a package and inflate every member, the work
+    ``readFileSync`` + PizZip + docxtemplater do before a render"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        with open(path, 'rb') as f:
+            data = f.read()
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            for info in zf.infolist():
+                zf.read(info)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def repack_seconds(path, repeat=20):
+    """Best time to deflate the members stored uncompressed, which PizZip's
+    ``generate({compression: 'DEFLATE'})`` does again for every letter"""
+    with zipfile.ZipFile(path) as zf:
+        stored = [zf.read(info) for info in zf.infolist()
+                  if info.compress_type == zipfile.ZIP_STORED and info.file_size]
+    if not stored:
+        return 0.0
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for data in stored:
+            compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+            compressor.compress(data)
+            compressor.flush()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def verify_slimmed(original, slimmed):
+    """Problems found comparing a template with its slimmed copy (empty: same)"""
+    from template_tools.extractor import ExtractionError, PlaceholderExtractor
+
+    problems = []
+    with zipfile.ZipFile(slimmed) as zf:
+        bad = zf.testzip()
+        if bad is not None:
+            problems.append(f"{bad}: bad CRC")
+    indexes = []
+    for path in (original, slimmed):
+        extractor = PlaceholderExtractor(path)
+        try:
+            extractor.extract()
+        except ExtractionError:
+            return problems + [f"extraction failed for {path}"]
+        indexes.append(extractor.index.labels())
+    before, after = indexes
+    for name in sorted(set(before) | set(after)):
+        if before.get(name) != after.get(name):
+            problems.append(f"{{{name}}}: {before.get(name, 'missing')} → {after.get(name, 'missing')}")
+    return problems
@@ -0,0 +1,110 @@
+"""
+Watch templates and re-extract the ones that change
+===================================================
+
+``TemplateWatcher`` polls the watched paths: one ``os.stat`` per template
+per interval, so an idle watcher costs next to no CPU. A template counts as
+changed when its ``(mtime, size)`` differs from the last one processed, and
+it is only handed out once that signature has held for ``debounce`` seconds
+and the file is a complete zip again. Word and LibreOffice save through a
+temporary file and a rename (and sometimes rewrite twice), which this
+collapses into one event.
+
+The standard library has no inotify binding and the tooling does not pull
+in extra dependencies, hence polling.
+"""
+
+import os
+import time
+import zipfile
+
+from template_tools.defaults import DEFAULT_WATCH_DEBOUNCE, DEFAULT_WATCH_INTERVAL
+from template_tools.paths import collect_templates
+
+
+def _signature(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class TemplateWatcher:
+    """Report templates whose contents settled after a change.
+
+    Args:
+        paths: files, directories or globs, as on the command line
+        debounce: seconds a new signature must hold before it is reported
+    """
+
+    def __init__(self, paths, debounce=DEFAULT_WATCH_DEBOUNCE):
+        self.paths = list(paths)
+        self.debounce = debounce
+        self.known = {}     # path -> signature last reported
+        self.pending = {}   # path -> (signature, first seen at)
+
+    def scan(self):
+        """Current ``{path: signature}`` of every watched template"""
+        current = {}
+        for path in collect_templates(self.paths):
+            signature = _signature(path)
+            if signature is not None:
+                current[path] = signature
+        return current
+
+    def prime(self):
+        """Take the current state as processed; returns the template list"""
+        self.known = self.scan()
+        self.pending.clear()
+        return sorted(self.known)
+
+    def poll(self, now=None):
+        """``(changed, removed)`` templates ready to be processed"""
+        now = time.monotonic() if now is None else now
+        current = self.scan()
+
+        removed = sorted(set(self.known) - set(current))
+        for path in removed:
+            del self.known[path]
+            self.pending.pop(path, None)
+
+        changed = []
+        for path, signature in current.items():
+            if self.known.get(path) == signature:
+                self.pending.pop(path, None)
+                continue
+            seen = self.pending.get(path)
+            if seen is None or seen[0] != signature:
+                # New or still being written: restart the quiet period
+                self.pending[path] = (signature, now)
+                continue
+            if now - seen[1] < self.debounce:
+                continue
+            if not zipfile.is_zipfile(path):
+                continue  # half-written; the next write bumps the signature
+            self.known[path] = signature
+            del self.pending[path]
+            changed.append(path)
+        return sorted(changed), removed
+
+
+def watch(paths, on_change, interval=DEFAULT_WATCH_INTERVAL, debounce=DEFAULT_WATCH_DEBOUNCE,
+          on_remove=None, sleep=time.sleep):
+    """Call ``on_change(paths)`` for settled changes until interrupted.
+
+    Templates present at start are taken as up to date; run the normal
+    extraction first. Returns on ``KeyboardInterrupt``.
+    """
+    watcher = TemplateWatcher(paths, debounce)
+    watcher.prime()
+    try:
+        while True:
+            sleep(interval)
+            changed, removed = watcher.poll()
+            if removed and on_remove is not None:
+                on_remove(removed)
+            if changed:
+                on_change(changed)
+    except KeyboardInterrupt:
+        return
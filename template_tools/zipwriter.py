@@ -0,0 +1,210 @@
+"""
+Pass-through ZIP writer for generated letters
+=============================================
+
+A letter differs from its template in one or two parts (``word/document.xml``
+and maybe a header); media, styles, theme and settings are the same bytes in
+every letter. ``ZipTemplate`` reads the template's central directory once and
+keeps each member's local header plus compressed data as a ready-made blob.
+Writing a letter then copies those blobs untouched (no inflate/deflate),
+deflates only the replaced parts, and writes a central directory with the
+new offsets.
+
+Member order, names, timestamps and attributes of the template are kept,
+and so is the archive comment.
+Zip64 templates are not supported (Word templates are far below 4 GB).
+"""
+
+import io
+import struct
+import zlib
+
+EOCD_SIGNATURE = b'PK\x05\x06'
+CENTRAL_SIGNATURE = b'PK\x01\x02'
+LOCAL_SIGNATURE = b'PK\x03\x04'
+DESCRIPTOR_SIGNATURE = b'PK\x07\x08'
+
+_EOCD = struct.Struct('<4s4H2LH')
+_CENTRAL = struct.Struct('<4s6H3L5H2L')
+_LOCAL = struct.Struct('<4s5H3L2H')
+
+# Byte position of the "local header offset" field in a central directory record
+_CENTRAL_OFFSET_FIELD = 42
+
+FLAG_DATA_DESCRIPTOR = 0x08
+FLAG_UTF8 = 0x800
+ZIP_DEFLATED = 8
+ZIP64_LIMIT = 0xFFFFFFFF
+# 1980-01-01 00:00, the earliest DOS timestamp, for members added to a package
+DEFAULT_DOS_TIME = (0, 0x21)
+
+
+def _find_eocd(data):
+    """Offset of the end of central directory record: the last one whose
+    comment ends the data (the comment may itself hold the signature)"""
+    start = max(0, len(data) - _EOCD.size - 0xFFFF)
+    found = -1
+    end = len(data)
+    while True:
+        eocd = data.rfind(EOCD_SIGNATURE, start, end)
+        if eocd == -1:
+            break
+        if eocd + _EOCD.size <= len(data):
+            if eocd + _EOCD.size + _EOCD.unpack_from(data, eocd)[-1] == len(data):
+                return eocd
+            if found == -1:
+                found = eocd  # trailing bytes after the comment: tolerated
+        end = eocd
+    if found == -1:
+        raise ValueError('Not a zip file (no end of central directory)')
+    return found
+
+
+class _Member:
+    """One template member: raw local record and its central directory record"""
+    __slots__ = ('name', 'local', 'central', 'dos_time', 'external_attr')
+
+    def __init__(self, name, local, central, dos_time, external_attr):
+        self.name = name
+        self.local = local
+        self.central = central
+        self.dos_time = dos_time
+        self.external_attr = external_attr
+
+
+class ZipTemplate:
+    """Template package whose unchanged members are copied byte for byte.
+
+    Args:
+        source: path of the template .docx, or its bytes
+    """
+
+    def __init__(self, source):
+        if isinstance(source, (bytes, bytearray)):
+            data = bytes(source)
+        else:
+            with open(source, 'rb') as f:
+                data = f.read()
+        self.members, self.comment = self._parse(data)
+        self.names = [m.name for m in self.members]
+
+    @staticmethod
+    def _parse(data):
+        """``(members, archive comment)`` of a zip's bytes"""
+        eocd = _find_eocd(data)
+        (_, disk, cd_disk, _, count, cd_size, cd_offset,
+         comment_len) = _EOCD.unpack_from(data, eocd)
+        comment = data[eocd + _EOCD.size:eocd + _EOCD.size + comment_len]
+        if disk or cd_disk or ZIP64_LIMIT in (cd_size, cd_offset) or count == 0xFFFF:
+            raise ValueError('Zip64 and multi-disk archives are not supported')
+
+        members = []
+        pos = cd_offset
+        for _ in range(count):
+            fields = _CENTRAL.unpack_from(data, pos)
+            if fields[0] != CENTRAL_SIGNATURE:
+                raise ValueError(f'Bad central directory record at offset {pos}')
+            (_, _, _, flags, _, mtime, mdate, _, csize, usize,
+             name_len, extra_len, comment_len, _, _, external_attr, local_offset) = fields
+            end = pos + _CENTRAL.size + name_len + extra_len + comment_len
+            raw_name = data[pos + _CENTRAL.size:pos + _CENTRAL.size + name_len]
+            central = bytearray(data[pos:end])
+            pos = end
+            if ZIP64_LIMIT in (csize, usize, local_offset):
+                raise ValueError('Zip64 members are not supported')
+
+            local = _LOCAL.unpack_from(data, local_offset)
+            if local[0] != LOCAL_SIGNATURE:
+                raise ValueError(f'Bad local header at offset {local_offset}')
+            data_end = local_offset + _LOCAL.size + local[9] + local[10] + csize
+            if flags & FLAG_DATA_DESCRIPTOR:
+                data_end += 16 if data.startswith(DESCRIPTOR_SIGNATURE, data_end) else 12
+
+            name = raw_name.decode('utf-8' if flags & FLAG_UTF8 else 'cp437')
+            members.append(_Member(name, data[local_offset:data_end], central,
+                                   (mtime, mdate), external_attr))
+        return members, comment
+
+    def drop(self, names):
+        """Leave the members ``names`` out of every package written from now on"""
+        names = set(names)
+        self.members = [m for m in self.members if m.name not in names]
+        self.names = [m.name for m in self.members]
+
+    def write(self, output, replaced=None, compresslevel=6):
+        """Write a package with ``replaced`` parts swapped in.
+
+        Args:
+            output: path or binary file object (e.g. ``io.BytesIO``)
+            replaced: part name -> new uncompressed bytes; names not in the
+                template are appended
+            compresslevel: zlib level for the replaced parts
+
+        Returns the number of bytes written.
+        """
+        replaced = dict(replaced or {})
+        if isinstance(output, (str, bytes)) or hasattr(output, '__fspath__'):
+            with open(output, 'wb') as f:
+                return self._write(f, replaced, compresslevel)
+        return self._write(output, replaced, compresslevel)
+
+    def to_bytes(self, replaced=None, compresslevel=6):
+        """The package as bytes, for streaming out of a web handler"""
+        buffer = io.BytesIO()
+        self._write(buffer, dict(replaced or {}), compresslevel)
+        return buffer.getvalue()
+
+    def _write(self, f, replaced, compresslevel):
+        offset = 0
+        central = []
+        for member in self.members:
+            data = replaced.pop(member.name, None)
+            if data is None:
+                record = bytearray(member.central)
+                struct.pack_into('<L', record, _CENTRAL_OFFSET_FIELD, offset)
+                f.write(member.local)
+                size = len(member.local)
+            else:
+                local, record = _deflated_records(member.name, data, compresslevel,
+                                                  member.dos_time, member.external_attr, offset)
+                f.write(local[0])
+                f.write(local[1])
+                size = len(local[0]) + len(local[1])
+            central.append(record)
+            offset += size
+
+        for name, data in replaced.items():
+            local, record = _deflated_records(name, data, compresslevel, DEFAULT_DOS_TIME,
+                                              0o644 << 16, offset)
+            f.write(local[0])
+            f.write(local[1])
+            central.append(record)
+            offset += len(local[0]) + len(local[1])
+
+        cd_size = sum(len(record) for record in central)
+        for record in central:
+            f.write(record)
+        f.write(_EOCD.pack(EOCD_SIGNATURE, 0, 0, len(central), len(central),
+                           cd_size, offset, len(self.comment)))
+        f.write(self.comment)
+        return offset + cd_size + _EOCD.size + len(self.comment)
+
+
+def _deflated_records(name, data, compresslevel, dos_time, external_attr, offset):
+    """``((local_header, compressed), central_record)`` for a new member"""
+    compressor = zlib.compressobj(compresslevel, zlib.DEFLATED, -15)
+    compressed = compressor.compress(data) + compressor.flush()
+    crc = zlib.crc32(data)
+    try:
+        raw_name = name.encode('ascii')
+        flags = 0
+    except UnicodeEncodeError:
+        raw_name = name.encode('utf-8')
+        flags = FLAG_UTF8
+    mtime, mdate = dos_time
+    local = _LOCAL.pack(LOCAL_SIGNATURE, 20, flags, ZIP_DEFLATED, mtime, mdate,
+                        crc, len(compressed), len(data), len(raw_name), 0) + raw_name
+    central = _CENTRAL.pack(CENTRAL_SIGNATURE, 20, 20, flags, ZIP_DEFLATED, mtime, mdate,
+                            crc, len(compressed), len(data), len(raw_name), 0, 0, 0, 0,
+                            external_attr, offset) + raw_name
+    return (local, compressed), central
@@ -0,0 +1,95 @@
+"""Shared fixtures: the repo's templates and letters, plus damaged copies"""
+
+import shutil
+import struct
+import zipfile
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+TEMPLATE_DIR = ROOT / 'public' / 'template'
+LETTER_DIR = ROOT / 'public' / 'storage' / 'surat'
+
+TEMPLATES = sorted(path for path in TEMPLATE_DIR.glob('*.docx'))
+LETTERS = sorted(LETTER_DIR.glob('*.docx'))
+
+
+def corrupt_member(src, dst, member='word/document.xml'):
+    """Copy ``src`` with the deflate stream of ``member`` scrambled; the
+    central directory stays intact, so the zip opens but the part does not
+    inflate (``zlib.error``)"""
+    data = bytearray(Path(src).read_bytes())
+    with zipfile.ZipFile(src) as zf:
+        info = zf.getinfo(member)
+    name_length, extra_length = struct.unpack('<HH', data[info.header_offset + 26:
+                                                          info.header_offset + 30])
+    start = info.header_offset + 30 + name_length + extra_length
+    for i in range(start + 16, start + info.compress_size - 16):
+        data[i] ^= 0x5A
+    Path(dst).write_bytes(bytes(data))
+    return dst
+
+
+def drop_member(src, dst, member='word/document.xml'):
+    """Copy ``src`` without ``member``"""
+    with zipfile.ZipFile(src) as zin, zipfile.ZipFile(dst, 'w') as zout:
+        for info in zin.infolist():
+            if info.filename != member:
+                zout.writestr(info, zin.read(info))
+    return dst
+
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" ContentType="application/'
+    'vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/></Types>'
+)
+_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/'
+    'relationships/officeDocument" Target="word/document.xml"/></Relationships>'
+)
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+
+
+def document_xml(body):
+    """word/document.xml around ``body`` (WordprocessingML, ``w:`` prefix)"""
+    return (f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            f'<w:document xmlns:w="{W_NS}"><w:body>{body}</w:body></w:document>').encode('utf-8')
+
+
+def paragraph(*runs):
+    """``<w:p>`` with one run per text"""
+    return '<w:p>' + ''.join(f'<w:r><w:t xml:space="preserve">{text}</w:t></w:r>'
+                             for text in runs) + '</w:p>'
+
+
+def make_docx(path, body, extra=None):
+    """Minimal .docx at ``path`` whose document body is ``body`` (XML
+    string); ``extra``: more part name -> bytes"""
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('[Content_Types].xml', _CONTENT_TYPES)
+        zf.writestr('_rels/.rels', _RELS)
+        zf.writestr('word/document.xml', document_xml(body))
+        for name, data in (extra or {}).items():
+            zf.writestr(name, data)
+    return path
+
+
+@pytest.fixture
+def archive(tmp_path):
+    """Directory with the repo's F106 letters plus two damaged ones:
+    ``F106_1_1.docx`` (corrupt deflate data) and ``F106_2_2.docx`` (no
+    word/document.xml)"""
+    directory = tmp_path / 'surat'
+    directory.mkdir()
+    for letter in LETTERS:
+        shutil.copy(letter, directory / letter.name)
+    corrupt_member(LETTERS[0], directory / 'F106_1_1.docx')
+    drop_member(LETTERS[0], directory / 'F106_2_2.docx')
+    return directory
@@ -0,0 +1,40 @@
+import pytest
+
+from template_tools.audit import AuditState, audit_letter, audit_letters
+from template_tools.compiler import compile_template
+from template_tools.recover import register_templates, skeleton_for
+
+from conftest import TEMPLATE_DIR
+
+
+def test_corrupt_deflate_is_malformed(archive):
+    issues = audit_letter(str(archive / 'F106_1_1.docx'))
+    assert [issue.kind for issue in issues] == ['malformed']
+
+
+def test_missing_document_part_is_malformed(archive):
+    issues = audit_letter(str(archive / 'F106_2_2.docx'))
+    assert [issue.kind for issue in issues] == ['malformed']
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_damaged_letters_do_not_stop_the_audit(archive, tmp_path, workers):
+    state = AuditState(str(tmp_path / 'state.json'))
+    stats = audit_letters([str(archive)], {}, state, workers=workers)
+    state.save()
+
+    assert stats.audited == len(list(archive.iterdir()))
+    assert stats.by_kind['malformed'] == 2
+    flagged = {path for path, (_, _, issues) in state.files.items() if issues}
+    assert flagged == {str(archive / 'F106_1_1.docx'), str(archive / 'F106_2_2.docx')}
+
+    reloaded = AuditState(str(tmp_path / 'state.json'))
+    stats = audit_letters([str(archive)], {}, reloaded, workers=workers)
+    assert stats.audited == 0
+    assert stats.unchanged == len(state.files)
+
+
+def test_audit_without_templates_drops_earlier_ones(archive):
+    register_templates({'F106': compile_template(str(TEMPLATE_DIR / 'F-106.docx'))})
+    audit_letters([str(archive)], {}, AuditState(None), workers=1)
+    assert skeleton_for('F106') is None
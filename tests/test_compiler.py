@@ -0,0 +1,66 @@
+import io
+import zipfile
+
+import pytest
+
+from template_tools.compiler import TemplateSyntaxError, compile_template
+from template_tools.text_index import layout_text
+
+from conftest import make_docx, paragraph
+
+DOCUMENT = 'word/document.xml'
+
+
+def rendered_text(tmp_path, body, record):
+    compiled = compile_template(str(make_docx(tmp_path / 'T.docx', body)))
+    return layout_text(compiled.render(record)[DOCUMENT])
+
+
+def test_slots_are_escaped_and_missing_values_are_empty(tmp_path):
+    text = rendered_text(tmp_path, paragraph('Nama: {nama}, NIK: {nik}, RT {rt}'),
+                         {'nama': 'Budi & <Sari>', 'nik': None, 'rt': 3.0})
+    assert text == 'Nama: Budi & <Sari>, NIK: , RT 3'
+
+
+def test_tag_split_over_runs(tmp_path):
+    text = rendered_text(tmp_path, paragraph('Nama: {na', 'ma_pe', 'mohon}.'),
+                         {'nama_pemohon': 'BUDI'})
+    assert text == 'Nama: BUDI.'
+
+
+def test_sections_loop_condition_and_inverted(tmp_path):
+    body = ''.join([
+        paragraph('{#anak}', '[{nama}]', '{/anak}'),
+        paragraph('{#ada_ayah}Ayah {nama_ayah}{/ada_ayah}'),
+        paragraph('{^ada_ayah}Tanpa ayah{/ada_ayah}'),
+    ])
+    record = {'nama': 'IBU', 'anak': [{'nama': 'A'}, {'nama': 'B'}, {}], 'ada_ayah': False}
+    assert rendered_text(tmp_path, body, record) == '[A][B][IBU]\n\nTanpa ayah'
+
+    record.update(ada_ayah={'nama_ayah': 'C'}, anak=[])
+    assert rendered_text(tmp_path, body, record) == '\nAyah C\n'
+
+
+def test_paragraph_loop_repeats_paragraphs(tmp_path):
+    body = paragraph('{#baris}') + paragraph('- {isi}') + paragraph('{/baris}')
+    text = rendered_text(tmp_path, body, {'baris': [{'isi': 1}, {'isi': 2}]})
+    assert text == '- 1\n- 2'
+
+
+def test_newlines_become_breaks(tmp_path):
+    compiled = compile_template(str(make_docx(tmp_path / 'T.docx', paragraph('{alamat}'))))
+    xml = compiled.render({'alamat': 'Jl. Merdeka\nBandung'})[DOCUMENT]
+    assert b'<w:br/>' in xml
+    assert layout_text(xml) == 'Jl. Merdeka\vBandung'
+
+
+def test_unclosed_section_is_refused(tmp_path):
+    with pytest.raises(TemplateSyntaxError):
+        compile_template(str(make_docx(tmp_path / 'T.docx', paragraph('{#anak}{nama}'))))
+
+
+def test_render_bytes_is_a_complete_docx(tmp_path):
+    compiled = compile_template(str(make_docx(tmp_path / 'T.docx', paragraph('{nama}'))))
+    with zipfile.ZipFile(io.BytesIO(compiled.render_bytes({'nama': 'BUDI'}))) as zf:
+        assert zf.testzip() is None
+        assert layout_text(zf.read(DOCUMENT)) == 'BUDI'
@@ -0,0 +1,158 @@
+import base64
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from template_tools.convert import (
+    ConversionServer,
+    ConversionTimeout,
+    FileStore,
+    _attachment,
+)
+
+
+class FakePool:
+    """Stands in for ConversionPool: no LibreOffice, the 'PDF' names its source"""
+
+    def __init__(self):
+        self.jobs = []
+
+    def convert(self, data, name='document.docx'):
+        self.jobs.append((name, data))
+        if name == 'slow.docx':
+            raise ConversionTimeout("job ran past 60 s")
+        return b'%PDF-' + data
+
+    def stats(self):
+        return {'mode': 'fake', 'done': len(self.jobs)}
+
+
+@pytest.fixture
+def server():
+    server = ConversionServer(('127.0.0.1', 0), FakePool(), FileStore(max_files=8))
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def request(server, path, data=None, headers=None, method=None):
+    """``(status, headers, body)``; JSON bodies are decoded"""
+    url = 'http://127.0.0.1:%d%s' % (server.server_address[1], path)
+    req = urllib.request.Request(url, data=data, headers=headers or {}, method=method)
+    try:
+        with urllib.request.urlopen(req) as response:
+            status, head, body = response.status, response.headers, response.read()
+    except urllib.error.HTTPError as e:
+        status, head, body = e.code, e.headers, e.read()
+    if head.get('Content-Type') == 'application/json':
+        body = json.loads(body)
+    return status, head, body
+
+
+def test_store_drops_the_oldest_files():
+    store = FileStore(max_files=2, max_bytes=10)
+    first = store.put('a.docx', b'1234')
+    second = store.put('b.docx', b'5678')
+    third = store.put('c.docx', b'9')
+    assert store.get(first) is None
+    assert store.get(second) == ('b.docx', b'5678')
+    assert store.size == 5
+
+    big = store.put('d.docx', b'0123456789')
+    assert list(store.files) == [big] and store.size == 10
+    assert store.delete(big) and not store.delete(third)
+    assert store.size == 0
+
+
+def test_attachment_names_cannot_break_the_header():
+    assert _attachment('surat.pdf') == \
+        "attachment; filename=\"surat.pdf\"; filename*=UTF-8''surat.pdf"
+    header = _attachment('a"b\r\nSet-Cookie: x.pdf')
+    assert '\r' not in header and '\n' not in header
+    assert header.startswith('attachment; filename="abSet-Cookie: x.pdf"')
+    assert _attachment('surat é.pdf').endswith("filename*=UTF-8''surat%20%C3%A9.pdf")
+    assert _attachment('"\r\n').startswith('attachment; filename="document"')
+
+
+def test_raw_body(server):
+    status, _, body = request(server, '/convert/docx/to/pdf', b'DOCX',
+                              {'Content-Type': 'application/octet-stream',
+                               'Content-Disposition': 'inline; filename="surat.docx"'})
+    assert status == 200
+    (info,) = body['Files']
+    assert info['FileName'] == 'surat.pdf'
+    assert base64.b64decode(info['FileData']) == b'%PDF-DOCX'
+
+
+def test_json_file_value(server):
+    payload = {'Parameters': [
+        {'Name': 'File', 'FileValue': {'Name': 'F106.docx', 'Data': base64.b64encode(b'X').decode()}},
+        {'Name': 'StoreFile', 'Value': True},
+    ]}
+    status, _, body = request(server, '/convert/docx/to/pdf', json.dumps(payload).encode(),
+                              {'Content-Type': 'application/json'})
+    assert status == 200
+    (info,) = body['Files']
+    assert info['Url'].endswith(f"/d/{info['FileId']}/F106.pdf")
+
+    status, head, pdf = request(server, f"/d/{info['FileId']}/F106.pdf")
+    assert (status, pdf) == (200, b'%PDF-X')
+    assert head['Content-Type'] == 'application/pdf'
+    assert 'filename="F106.pdf"' in head['Content-Disposition']
+
+
+def test_multipart_upload(server):
+    boundary = 'b0undary'
+    body = (f'--{boundary}\r\nContent-Disposition: form-data; name="File"; filename="SKU.docx"\r\n'
+            f'Content-Type: application/octet-stream\r\n\r\nDATA\r\n'
+            f'--{boundary}\r\nContent-Disposition: form-data; name="StoreFile"\r\n\r\nfalse\r\n'
+            f'--{boundary}--\r\n').encode()
+    status, _, response = request(server, '/convert/docx/to/pdf', body,
+                                  {'Content-Type': f'multipart/form-data; boundary={boundary}'})
+    assert status == 200
+    assert server.pool.jobs == [('SKU.docx', b'DATA')]
+    assert base64.b64decode(response['Files'][0]['FileData']) == b'%PDF-DATA'
+
+
+def test_upload_then_convert_by_id(server):
+    status, _, info = request(server, '/upload?filename=UMUM.docx', b'UPLOADED',
+                              {'Content-Type': 'application/octet-stream'})
+    assert status == 200 and info['FileName'] == 'UMUM.docx' and info['FileSize'] == 8
+
+    status, head, pdf = request(server, '/convert/docx/to/pdf', f"File={info['FileId']}".encode(),
+                                {'Content-Type': 'application/x-www-form-urlencoded',
+                                 'Accept': 'application/octet-stream'})
+    assert (status, pdf) == (200, b'%PDF-UPLOADED')
+    assert 'filename="UMUM.pdf"' in head['Content-Disposition']
+
+    assert request(server, f"/d/{info['FileId']}", method='DELETE')[0] == 200
+    assert request(server, f"/d/{info['FileId']}")[0] == 404
+
+
+@pytest.mark.parametrize('data, headers, status, message', [
+    (b'', {'Content-Type': 'application/octet-stream'}, 400, 'Missing File parameter'),
+    (b'{"Parameters": 1}', {'Content-Type': 'application/json'}, 400, 'Invalid JSON body'),
+    (b'{"Parameters": [{"Name": "File", "FileValue": "x"}]}',
+     {'Content-Type': 'application/json'}, 400, 'Invalid JSON body'),
+    (b'[]', {'Content-Type': 'application/json'}, 400, 'Invalid JSON body'),
+    (b'File=0123456789abcdef0123456789abcdef',
+     {'Content-Type': 'application/x-www-form-urlencoded'}, 400, 'Unknown file id'),
+    (b'File=http://elsewhere/x.docx',
+     {'Content-Type': 'application/x-www-form-urlencoded'}, 400, 'Only files uploaded'),
+    (b'DOCX', {'Content-Disposition': 'attachment; filename="slow.docx"'}, 504, 'past 60 s'),
+])
+def test_errors(server, data, headers, status, message):
+    got, _, body = request(server, '/convert/docx/to/pdf', data, headers)
+    assert got == status
+    assert body['Code'] == status and message in body['Message']
+
+
+def test_stats_and_unknown_endpoints(server):
+    assert request(server, '/stats')[2] == {'mode': 'fake', 'done': 0}
+    assert request(server, '/convert/docx/to/png', b'x')[0] == 404
+    assert request(server, '/d/nothing')[0] == 404
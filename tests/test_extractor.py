@@ -0,0 +1,95 @@
+import json
+import os
+
+import pytest
+
+from template_tools.extractor import ExtractionError, PlaceholderExtractor, extract_template
+from template_tools.locations import LocationIndex
+
+from conftest import TEMPLATE_DIR, TEMPLATES
+
+
+def extract(docx_path, **options):
+    extractor = PlaceholderExtractor(str(docx_path), **options)
+    extractor.extract()
+    return extractor
+
+
+@pytest.mark.parametrize('template', TEMPLATES, ids=lambda path: path.name)
+def test_stream_engine_matches_python_docx(template):
+    pytest.importorskip('docx')
+    stream = extract(template, engine='stream', all_parts=False)
+    docx = extract(template, engine='docx')
+    assert stream.placeholders == docx.placeholders
+    assert stream.get_sorted_placeholders() == docx.get_sorted_placeholders()
+
+
+@pytest.mark.parametrize('letter, stage', [('F106_1_1.docx', 'reading'),
+                                           ('F106_2_2.docx', 'loading')])
+def test_damaged_package_raises(archive, letter, stage, capsys):
+    with pytest.raises(ExtractionError, match=f'Error {stage} document'):
+        extract(archive / letter)
+    assert capsys.readouterr().out == ''
+
+
+def test_damaged_package_is_a_batch_error(archive, tmp_path):
+    result = extract_template(str(archive / 'F106_1_1.docx'), output_dir=str(tmp_path))
+    assert not result['ok']
+    assert result['error'].startswith('Error reading document')
+
+
+def test_extract_all_prints_the_outcome(archive, capsys):
+    assert not PlaceholderExtractor(str(archive / 'F106_2_2.docx')).extract_all()
+    assert capsys.readouterr().out.startswith('❌ Error loading document')
+
+
+@pytest.fixture
+def f103(monkeypatch):
+    extractor = extract(TEMPLATE_DIR / 'F-103.docx')
+    expected = extractor.index.labels()
+
+    def labels(self):
+        raise AssertionError("documentation must not build every label up front")
+
+    monkeypatch.setattr(LocationIndex, 'labels', labels)
+    return extractor, expected
+
+
+def test_markdown_is_streamed(f103):
+    extractor, expected = f103
+    chunks = extractor.iter_markdown_doc()
+    assert next(chunks) == "# F-103.docx - Template Placeholders\n\n"
+    markdown = next(chunks) + ''.join(chunks)
+    for name, locations in expected.items():
+        section = markdown.split(f"### `{{{name}}}`\n\n", 1)[1].split('\n\n#', 1)[0]
+        assert [line[2:] for line in section.splitlines() if line.startswith('- ')] == locations
+
+
+@pytest.mark.parametrize('doc_format', ['json', 'ndjson'])
+def test_json_documentation(f103, doc_format):
+    extractor, expected = f103
+    text = ''.join(extractor.iter_documentation(doc_format))
+    if doc_format == 'json':
+        document = json.loads(text)
+        records = document['placeholders']
+    else:
+        lines = [json.loads(line) for line in text.splitlines()]
+        document, records = lines[0], lines[1:]
+        assert document['type'] == 'template'
+    assert document['total'] == len(expected)
+    assert document['interface'] == 'F103FormData'
+    assert {record['name']: record['locations'] for record in records} == expected
+
+
+@pytest.mark.parametrize('doc_format', ['markdown', 'json', 'ndjson'])
+def test_unchanged_documentation_is_left_alone(tmp_path, doc_format):
+    extractor = extract(TEMPLATE_DIR / 'SKU.docx')
+    path = extractor.save_documentation(str(tmp_path), doc_format)
+    assert extractor.documentation_changed
+    first = open(path, encoding='utf-8').read()
+
+    extractor._get_timestamp = lambda: '2000-01-01 00:00:00'
+    assert extractor.save_documentation(str(tmp_path), doc_format) == path
+    assert not extractor.documentation_changed
+    assert open(path, encoding='utf-8').read() == first
+    assert sorted(os.listdir(tmp_path)) == [os.path.basename(path)]
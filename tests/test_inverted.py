@@ -0,0 +1,29 @@
+import os
+import shutil
+
+from template_tools.inverted import PlaceholderIndex
+
+from conftest import TEMPLATE_DIR
+
+
+def test_index_survives_another_working_directory(tmp_path, monkeypatch):
+    shutil.copy(TEMPLATE_DIR / 'F-106.docx', tmp_path / 'F-106.docx')
+    monkeypatch.chdir(tmp_path)
+    index = PlaceholderIndex(os.path.join('.cache', 'index.json'))
+    updated, _, failed = index.update(['F-106.docx'])
+    assert (updated, failed) == (['F-106.docx'], [])
+    assert index.forget_missing() == []  # before .cache exists
+    index.save()
+
+    elsewhere = tmp_path / 'elsewhere'
+    elsewhere.mkdir()
+    monkeypatch.chdir(elsewhere)
+    index = PlaceholderIndex(os.path.join('..', '.cache', 'index.json'))
+    assert index.forget_missing() == []
+    assert index.placeholders(os.path.join('..', 'F-106.docx'))
+    hits = index.lookup('nik_pemohon')
+    assert hits and all(hit.template == os.path.join('..', 'F-106.docx') for hit in hits)
+
+    os.remove(tmp_path / 'F-106.docx')
+    assert index.forget_missing() == [os.path.join('..', 'F-106.docx')]
+    assert len(index) == 0 and index.names == {}
@@ -0,0 +1,78 @@
+import struct
+
+import pytest
+
+from template_tools.extractor import PlaceholderExtractor
+from template_tools.locations import MAGIC, NO_CELLS, LocationIndex
+
+from conftest import TEMPLATES
+
+
+@pytest.fixture
+def index():
+    index = LocationIndex()
+    index.add('nama', (0, 1, NO_CELLS), 6)
+    index.add('nik', (0, 0, ((2, 3, 1),)), 0)
+    index.add('nama', (0, 0, ((2, 4, 2), (1, 1, 1))), 70000)   # 4-byte offsets
+    index.add('kop', (0, 1, NO_CELLS), 0, part='header1.xml')
+    index.add('catatan', (1, 2, NO_CELLS), 3)
+    return index
+
+
+def test_round_trip(index):
+    data = index.to_bytes()
+    restored = LocationIndex.from_bytes(data)
+    assert restored.labels() == index.labels() == {
+        'nama': ['Paragraph 1', 'Table 2, Row 4, Cell 2 > Table 1, Row 1, Cell 1'],
+        'nik': ['Table 2, Row 3, Cell 1'],
+        'kop': ['header1.xml > Paragraph 1'],
+        'catatan': ['Text Box 1 > Paragraph 2'],
+    }
+    assert [restored.occurrence(i) for i in range(len(restored))] == \
+        [index.occurrence(i) for i in range(len(index))]
+    assert restored.to_bytes() == data
+
+
+@pytest.mark.parametrize('template', TEMPLATES, ids=lambda path: path.name)
+def test_templates_round_trip(template):
+    extracted = PlaceholderExtractor(str(template)).extract()
+    assert LocationIndex.from_bytes(extracted.to_bytes()).labels() == extracted.labels()
+
+
+def test_find(index):
+    assert [o.offset for o in index.find(name='nama')] == [6, 70000]
+    assert [o.name for o in index.find(table=2)] == ['nik', 'nama']
+    assert [o.name for o in index.find(table=2, row=4)] == ['nama']
+    assert [o.name for o in index.find(part='header1.xml')] == ['kop']
+    assert [o.name for o in index.find(part='')] == ['nama', 'nik', 'nama', 'catatan']
+    assert [o.name for o in index.find(box=1)] == ['catatan']
+    assert list(index.find(name='missing')) == []
+    assert list(index.find(part='footer1.xml')) == []
+    assert next(index.find(name='nama', table=2)).table == 2
+
+
+def test_empty_index():
+    empty = LocationIndex()
+    restored = LocationIndex.from_bytes(empty.to_bytes())
+    assert len(restored) == 0
+    assert restored.names == [] and restored.parts == ['']
+    assert restored.labels() == {}
+    assert list(restored.find()) == []
+
+
+def test_other_version_is_refused(index):
+    data = bytearray(index.to_bytes())
+    struct.pack_into('<H', data, len(MAGIC), 99)
+    with pytest.raises(ValueError, match='older format'):
+        LocationIndex.from_bytes(bytes(data))
+
+
+@pytest.mark.parametrize('data', [b'', b'TPLX', b'JUNKJUNKJUNKJUNKJUNKJUNKJUNK'])
+def test_foreign_data_is_refused(data):
+    with pytest.raises(ValueError):
+        LocationIndex.from_bytes(data)
+
+
+def test_truncated_data_is_refused(index):
+    with pytest.raises(ValueError, match='truncated'):
+        LocationIndex.from_bytes(index.to_bytes()[:-1])
@@ -0,0 +1,85 @@
+import json
+import zipfile
+
+import pytest
+
+from template_tools.compiler import compile_template
+from template_tools.merge import default_prefix, letter_name, merge, read_records
+from template_tools.text_index import layout_text
+
+from conftest import make_docx, paragraph
+
+RECORDS = [
+    {'nik': '3671010101010001', 'nama': 'BUDI'},
+    {'nik': '3671010101010002', 'nama': 'SARI'},
+    {'nik_pemohon': '36/71 03', 'nama': 'ANI'},
+]
+
+
+@pytest.fixture
+def compiled(tmp_path):
+    return compile_template(str(make_docx(tmp_path / 'F-106.docx', paragraph('Nama: {nama}'))))
+
+
+@pytest.fixture
+def records_path(tmp_path):
+    path = tmp_path / 'records.jsonl'
+    lines = [json.dumps(record) for record in RECORDS[:2]]
+    lines += ['{not json', '', '[1, 2]', json.dumps({'nik': '9'}), json.dumps(RECORDS[2])]
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    return path
+
+
+def test_read_records(records_path, tmp_path):
+    records = list(read_records(str(records_path)))
+    assert [record.number for record in records] == [1, 2, 3, 5, 6, 7]
+    assert [record.error is None for record in records] == [True, True, False, False, True, True]
+
+    csv_path = tmp_path / 'records.csv'
+    csv_path.write_text('\ufeffnik,nama\n1,BUDI\n2,SARI\n', encoding='utf-8')
+    assert [record.data for record in read_records(str(csv_path))] == \
+        [{'nik': '1', 'nama': 'BUDI'}, {'nik': '2', 'nama': 'SARI'}]
+
+
+def test_letter_names():
+    assert default_prefix('public/template/F-106.docx') == 'F106'
+    assert letter_name('F106', RECORDS[0], 1, 1700000000000) == 'F106_3671010101010001_1700000000000.docx'
+    assert letter_name('F106', RECORDS[2], 3, 5) == 'F106_367103_5.docx'
+    assert letter_name('F106', {}, 4, 5) == 'F106_record4_5.docx'
+    assert letter_name('F106', RECORDS[0], 1, 5, id_field='nama') == 'F106_BUDI_5.docx'
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_merge_into_a_zip(compiled, records_path, tmp_path, workers):
+    invalid = []
+    zip_path = tmp_path / 'letters.zip'
+    stats = merge(compiled, read_records(str(records_path)), zip_path=str(zip_path),
+                  workers=workers, on_invalid=lambda number, message: invalid.append(number))
+
+    assert (stats.written, stats.skipped) == (3, 3)
+    assert invalid == [3, 5, 6]   # bad JSON, not an object, no 'nama'
+    with zipfile.ZipFile(zip_path) as archive:
+        names = archive.namelist()
+        assert [name.split('_')[1] for name in names] == \
+            ['3671010101010001', '3671010101010002', '367103']
+        assert len(set(names)) == 3
+        texts = []
+        for name in names:
+            with zipfile.ZipFile(archive.open(name)) as letter:
+                texts.append(layout_text(letter.read('word/document.xml')))
+    assert texts == ['Nama: BUDI', 'Nama: SARI', 'Nama: ANI']
+
+
+def test_merge_into_a_directory(compiled, records_path, tmp_path):
+    out_dir = tmp_path / 'surat'
+    stats = merge(compiled, read_records(str(records_path)), out_dir=str(out_dir),
+                  allow_missing=True, prefix='SKU')
+    assert (stats.written, stats.skipped) == (4, 2)
+    letters = sorted(out_dir.iterdir())
+    assert all(path.name.startswith('SKU_') for path in letters)
+    assert stats.bytes == sum(path.stat().st_size for path in letters)
+
+
+def test_merge_needs_one_destination(compiled, tmp_path):
+    with pytest.raises(ValueError):
+        merge(compiled, [], out_dir=str(tmp_path), zip_path=str(tmp_path / 'x.zip'))
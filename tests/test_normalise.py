@@ -0,0 +1,50 @@
+from template_tools.normalise import normalise_part, normalise_template, verify_normalised
+from template_tools.text_index import layout_text
+
+from conftest import TEMPLATE_DIR, document_xml, make_docx, paragraph
+
+SPLIT_TAG = (
+    '<w:p w:rsidR="00A1B2C3" w:rsidRDefault="00A1B2C3">'
+    '<w:r w:rsidRPr="00D4E5F6"><w:rPr><w:b/></w:rPr><w:t xml:space="preserve">Nama: {nama_</w:t></w:r>'
+    '<w:proofErr w:type="spellStart"/>'
+    '<w:r w:rsidR="00112233"><w:t>pemohon</w:t></w:r>'
+    '<w:proofErr w:type="spellEnd"/>'
+    '<w:r><w:t>}</w:t></w:r>'
+    '</w:p>'
+)
+
+
+def test_split_tag_is_joined_into_its_first_run():
+    xml = document_xml(SPLIT_TAG)
+    normalised, joined = normalise_part(xml, 'word/document.xml')
+
+    assert joined == 1
+    assert b'<w:t xml:space="preserve">Nama: {nama_pemohon}</w:t>' in normalised
+    assert normalised.count(b'<w:r>') == 1
+    assert layout_text(normalised) == layout_text(xml)
+
+
+def test_rsids_and_proofing_marks_are_stripped():
+    normalised, _ = normalise_part(document_xml(SPLIT_TAG), 'word/document.xml')
+    assert b'w:rsid' not in normalised
+    assert b'proofErr' not in normalised
+
+
+def test_normalised_part_is_stable():
+    once, _ = normalise_part(document_xml(SPLIT_TAG), 'word/document.xml')
+    assert normalise_part(once, 'word/document.xml') == (once, 0)
+
+
+def test_normalised_template_verifies(tmp_path):
+    original = str(TEMPLATE_DIR / 'F-106.docx')
+    output = str(tmp_path / 'F-106.docx')
+    normalise_template(original).write(output)
+    assert verify_normalised(original, output) == []
+
+
+def test_verify_catches_a_broken_tag(tmp_path):
+    original = make_docx(tmp_path / 'T.docx', paragraph('Nama: {nama}', ' NIK: {nik}'))
+    broken = make_docx(tmp_path / 'broken.docx', paragraph('Nama: {nama', ' NIK: {nik}'))
+    problems = verify_normalised(str(original), str(broken))
+    assert len(problems) == 1
+    assert problems[0].startswith('{nama}:') and problems[0].endswith('→ missing')
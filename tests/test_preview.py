@@ -0,0 +1,80 @@
+import os
+
+import pytest
+
+from template_tools import preview as preview_module
+from template_tools.compiler import compile_template
+from template_tools.preview import HtmlPreview, compile_preview, load_preview, preview_path
+
+from conftest import TEMPLATES, make_docx, paragraph
+
+BODY = ''.join([
+    '<w:p><w:pPr><w:jc w:val="center"/></w:pPr>'
+    '<w:r><w:rPr><w:b/></w:rPr><w:t>SURAT {jenis}</w:t></w:r></w:p>',
+    '<w:p><w:r><w:t>Nama</w:t><w:tab/><w:t xml:space="preserve">: {nama}</w:t></w:r></w:p>',
+    paragraph('{#anak}', '- {nama_anak}', '{/anak}'),
+    paragraph('{^anak}Tidak ada anak{/anak}'),
+    '<w:tbl><w:tr><w:tc>' + paragraph('NIK') + '</w:tc><w:tc>' + paragraph('{nik}')
+    + '</w:tc></w:tr></w:tbl>',
+])
+
+
+@pytest.fixture
+def template(tmp_path):
+    return str(make_docx(tmp_path / 'T.docx', BODY))
+
+
+def test_preview_html(template):
+    html = compile_preview(template).render({
+        'jenis': 'KETERANGAN', 'nama': 'Budi <& Sari>\nBandung', 'nik': '3671',
+        'anak': [{'nama_anak': 'A'}, {'nama_anak': 'B'}],
+    })
+    assert html.startswith('<div class="docx-preview">') and html.endswith('</div>')
+    assert '<p style="text-align:center"><strong>SURAT KETERANGAN</strong></p>' in html
+    assert 'Nama<span class="tab"></span>: Budi &lt;&amp; Sari&gt;<br>Bandung' in html
+    assert '<p>- A- B</p>' in html and 'Tidak ada anak' not in html
+    assert '<td><p>NIK</p></td><td><p>3671</p></td>' in html
+
+
+def test_sections_and_missing_values(template):
+    html = compile_preview(template).render({'anak': []})
+    assert 'Tidak ada anak' in html
+    assert '<strong>SURAT </strong>' in html
+
+
+def test_skeleton_survives_json(template):
+    skeleton = compile_preview(template)
+    restored = HtmlPreview.from_json(skeleton.to_json())
+    record = {'jenis': 'X', 'nama': 'Y', 'anak': [{'nama_anak': 'Z'}]}
+    assert restored.render(record) == skeleton.render(record)
+    assert restored.slot_names() == ['anak', 'jenis', 'nama', 'nama_anak', 'nik']
+
+
+def test_cached_skeleton_is_reused_until_the_template_changes(template, tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / 'previews')
+    first = load_preview(template, cache_dir)
+    assert os.path.exists(preview_path(template, cache_dir))
+
+    def fail(*args, **kwargs):
+        raise AssertionError("recompiled a fresh skeleton")
+
+    monkeypatch.setattr(preview_module, 'compile_preview', fail)
+    assert load_preview(template, cache_dir).ops == first.ops
+
+    stamp = os.path.getmtime(preview_path(template, cache_dir)) + 10
+    os.utime(template, (stamp, stamp))
+    with pytest.raises(AssertionError):
+        load_preview(template, cache_dir)
+
+
+@pytest.mark.parametrize('path', TEMPLATES, ids=lambda path: path.name)
+def test_repo_templates_preview_every_slot(path):
+    compiled = compile_template(str(path))
+    skeleton = compile_preview(str(path), compiled)
+    assert set(skeleton.slot_names()) <= set(compiled.placeholder_names())
+    record = {name: f'NILAI_{number}' for number, name in enumerate(compiled.slot_names())}
+    html = skeleton.render(record)
+    assert html.count('<p') == html.count('</p>')
+    for name in compiled.top_level_names():
+        if name in record:
+            assert record[name] in html, name
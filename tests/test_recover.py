@@ -0,0 +1,72 @@
+import io
+
+import pytest
+
+from template_tools.compiler import CompiledTemplate, compile_template
+from template_tools.recover import (
+    TemplateSkeleton,
+    iter_letters,
+    recover_letters,
+    register_templates,
+    skeleton_for,
+)
+
+from conftest import LETTERS, TEMPLATE_DIR, TEMPLATES
+
+
+@pytest.mark.parametrize('template', TEMPLATES, ids=lambda path: path.name)
+def test_recover_reads_back_what_render_wrote(template):
+    compiled = compile_template(str(template))
+    skeleton = TemplateSkeleton(compiled)
+    record = {name: f'NILAI {number} {name.upper()}'
+              for number, name in enumerate(skeleton.slot_names)}
+
+    values, conflicts = skeleton.recover(io.BytesIO(compiled.render_bytes(record)))
+
+    # Slots with only blanks before the next one may split a value wrongly
+    for name in skeleton.slot_names:
+        if name not in skeleton.ambiguous:
+            assert values.get(name) == record[name], name
+    assert set(conflicts) <= set(skeleton.ambiguous)
+
+
+@pytest.mark.parametrize('template', TEMPLATES, ids=lambda path: path.name)
+def test_compiled_artifact_survives_json(template):
+    compiled = compile_template(str(template))
+    record = {name: f'v-{name}' for name in compiled.placeholder_names()}
+    restored = CompiledTemplate.from_json(compiled.to_json())
+    assert restored.render(record) == compiled.render(record)
+
+
+def test_letters_in_the_archive_follow_their_template():
+    templates = {'F106': compile_template(str(TEMPLATE_DIR / 'F-106.docx'))}
+    results = list(recover_letters(templates, iter_letters([str(path) for path in LETTERS])))
+    assert len(results) == len(LETTERS)
+    for result in results:
+        assert result.error is None, result.path
+        assert result.values
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_damaged_letters_are_per_letter_errors(archive, workers):
+    templates = {'F106': compile_template(str(TEMPLATE_DIR / 'F-106.docx'))}
+    results = {result.path: result
+               for result in recover_letters(templates, iter_letters([str(archive)]), workers)}
+    failed = {path for path, result in results.items() if result.error}
+    assert failed == {str(archive / 'F106_1_1.docx'), str(archive / 'F106_2_2.docx')}
+    assert len(results) == len(LETTERS) + 2
+
+
+def test_registering_replaces_the_previous_templates():
+    first = compile_template(str(TEMPLATE_DIR / 'F-106.docx'))
+    second = compile_template(str(TEMPLATE_DIR / 'F-106_repaired.docx'))
+
+    register_templates({None: first, 'F106': first})
+    assert skeleton_for('SKU').source == first.source
+
+    register_templates({None: second})
+    assert skeleton_for('SKU').source == second.source
+    assert skeleton_for('F106').source == second.source
+
+    register_templates({})
+    assert skeleton_for('F106') is None
@@ -0,0 +1,64 @@
+from template_tools.routes import check_binding, find_routes, scan_route, tokenize
+
+from conftest import ROOT, TEMPLATE_DIR
+
+ROUTE = """
+import Docxtemplater from 'docxtemplater';
+
+// doc.render(commented) and 'NOT_A_TEMPLATE.docx' are ignored
+const pattern = /\\.render\\(x\\)/g;
+export async function POST(request: Request) {
+  const templatePath = join(process.cwd(), 'public', 'template', 'SKU.docx');
+  const list_ubah = rows.map((row: Row) => ({ no: row.no, uraian: `${row.a}/${row.b}` }));
+  const templateData: Record<string, unknown> = {
+    nomor_surat: formData.nomor_surat || '',
+    'nama_pemohon': formData.nama,
+    list_ubah: list_ubah,
+    nik_pemohn: formData.nik,
+  };
+  templateData.alamat = formData.alamat;
+  doc.setData(templateData);
+  doc.render(templateData);
+}
+"""
+
+
+def test_tokenizer_skips_comments_strings_and_regex():
+    tokens = list(tokenize(ROUTE))
+    idents = {token.value for token in tokens if token.kind == 'ident'}
+    assert 'commented' not in idents
+    assert [token.value for token in tokens if token.kind == 'regex'] == ['/\\.render\\(x\\)/g']
+    assert '${row.a}/${row.b}' in [token.value for token in tokens if token.kind == 'str']
+
+
+def test_scan_route_finds_the_data_object():
+    bindings = scan_route('route.ts', str(TEMPLATE_DIR), source=ROUTE)
+    assert len(bindings) == 1  # setData + render of the same object
+    binding = bindings[0]
+    assert binding.templates == ['SKU.docx']
+    assert binding.variable == 'templateData'
+    assert binding.line == ROUTE.count('\n', 0, ROUTE.index('doc.setData')) + 1
+    assert binding.keys == ['nomor_surat', 'nama_pemohon', 'list_ubah', 'nik_pemohn', 'alamat']
+    assert binding.nested == ['no', 'uraian']
+    assert not binding.spread
+
+
+def test_check_binding_reports_missing_extra_and_typos():
+    binding = scan_route('route.ts', str(TEMPLATE_DIR), source=ROUTE)[0]
+    placeholders = {'SKU.docx': ['nomor_surat', 'nama_pemohon', 'nik_pemohon', 'tanggal',
+                                 '#list_ubah', '/list_ubah', 'no', 'uraian']}
+    report = check_binding(binding, placeholders)
+    assert report.missing == ['tanggal']
+    assert report.extra == ['alamat']
+    assert report.misspelled == [('nik_pemohn', 'nik_pemohon')]
+
+
+def test_repo_routes_bind_existing_templates():
+    routes = find_routes([str(ROOT / 'src' / 'app' / 'api')])
+    assert routes
+    bindings = [binding for route in routes for binding in scan_route(route, str(TEMPLATE_DIR))]
+    assert bindings
+    assert all((TEMPLATE_DIR / name).is_file() for b in bindings for name in b.templates)
+    sku = [b for b in bindings if b.route.endswith('process-sku/route.ts')]
+    assert [b.templates for b in sku] == [['SKU.docx']]
+    assert 'nomor_surat' in sku[0].keys
@@ -0,0 +1,63 @@
+import pytest
+
+from template_tools.schema import CONDITION, LOOP_OR_CONDITION, ROWS, parse_schema
+
+from conftest import TEMPLATE_DIR, make_docx, paragraph
+
+VALID = [
+    {'nama': 'A', 'ada_ayah': True, 'nama_ayah': 'B', 'anak': [{'nama_anak': 'C'}]},
+    {'nama': 'A', 'ada_ayah': {'nama_ayah': 'B'}, 'anak': []},
+    {'nama': 'A', 'ada_ayah': False},
+    {'nama': None, 'ada_ayah': 'ya', 'nama_ayah': 3, 'anak': [{'nama_anak': 'C', 'nama': 'D'}]},
+    {'nama': 'A', 'ttd': True},
+]
+INVALID = [
+    ({'nama': 'A', 'ada_ayah': True}, 'nama_ayah: missing'),
+    ({'nama': 'A', 'ada_ayah': {}}, 'ada_ayah.nama_ayah: missing'),
+    ({'nama': True}, 'nama: expected text, got bool'),
+    ({'nama': 'A', 'anak': ['C']}, 'anak[0]: expected an object, got str'),
+    ({'nama': 'A', 'anak': [{}]}, 'anak[0].nama_anak: missing'),
+    ({}, 'nama: missing'),
+]
+
+
+@pytest.fixture
+def schema(tmp_path):
+    body = ''.join([
+        paragraph('{nama}'),
+        paragraph('{#ada_ayah}Ayah: {nama_ayah} ({nama}){/ada_ayah}'),
+        paragraph('{#anak}', '{nama_anak}{/anak}'),
+        paragraph('{#ttd}TTD{/ttd}'),
+    ])
+    return parse_schema(str(make_docx(tmp_path / 'T.docx', body)))
+
+
+def test_sections_with_fields_are_loops_or_conditions(schema):
+    assert schema.errors == []
+    assert schema.fields['ada_ayah'].kind == LOOP_OR_CONDITION
+    assert schema.fields['anak'].kind == LOOP_OR_CONDITION
+    assert schema.fields['ttd'].kind == CONDITION
+
+
+def test_f106_list_repeats_table_rows():
+    schema = parse_schema(str(TEMPLATE_DIR / 'F-106.docx'))
+    section = schema.fields['list_ubah']
+    assert section.kind == LOOP_OR_CONDITION
+    assert {unit for _, _, unit in section.extents} == {ROWS}
+
+
+@pytest.mark.parametrize('record', VALID)
+def test_valid_records(schema, record):
+    assert schema.validate(record) == []
+
+
+@pytest.mark.parametrize('record, problem', INVALID)
+def test_invalid_records(schema, record, problem):
+    assert problem in schema.validate(record)
+
+
+@pytest.mark.parametrize('record', VALID + [record for record, _ in INVALID])
+def test_json_schema_agrees_with_validate(schema, record):
+    jsonschema = pytest.importorskip('jsonschema')
+    validator = jsonschema.Draft202012Validator(schema.json_schema())
+    assert validator.is_valid(record) == (schema.validate(record) == [])
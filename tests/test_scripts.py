@@ -0,0 +1,40 @@
+import importlib.util
+import sys
+
+from conftest import ROOT, TEMPLATE_DIR
+
+sys.path.insert(0, str(ROOT))
+
+import read_template  # noqa: E402
+import read_template_simple  # noqa: E402
+
+
+def load_script(path):
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_read_docx_text_is_one_line_of_document_text():
+    text = read_template_simple.read_docx_text(str(TEMPLATE_DIR / 'PENGANTARKTP.docx'))
+    assert isinstance(text, str)
+    assert '\n' not in text and '  ' not in text
+    assert 'PERMENDAGRI' in text
+
+
+def test_read_template_reports_pattern_and_placeholder():
+    placeholders, all_text = read_template.extract_placeholders(str(TEMPLATE_DIR / 'F-106.docx'))
+    assert (r'\{([^}]+)\}', 'nama_pemohon') in placeholders
+    assert (r'\{([^}]+)\}', '#list_ubah') in placeholders
+    assert (r'\{([^}]+)\}', '/list_ubah') in placeholders
+    assert placeholders == sorted(placeholders)
+    assert '{nama_pemohon}' in all_text
+
+
+def test_n1_script_keeps_its_functions(capsys):
+    script = load_script(ROOT / 'scripts' / 'extract_placeholders_n1.py')
+    names = script.extract_placeholders_from_docx(TEMPLATE_DIR / 'N1.docx')
+    assert 'agama_pemohon' in names
+    script.main()
+    assert 'agama_pemohon: string;' in capsys.readouterr().out
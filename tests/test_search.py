@@ -0,0 +1,24 @@
+import pytest
+
+from template_tools.search import connect, counts, index_letters, letter_text, search
+
+
+def test_letter_text_keeps_label_and_value_apart(archive):
+    text = letter_text(str(next(archive.glob('F106_3671*.docx'))))
+    assert 'Nama lengkap\t:\tBUDI SANTOSO' in text
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_damaged_letters_are_recorded_unreadable(archive, tmp_path, workers):
+    db = connect(str(tmp_path / 'letters.sqlite'))
+    stats = index_letters(db, [str(archive)], workers=workers)
+    assert stats.failed == 2
+    assert counts(db) == (stats.indexed - 2, 2)
+
+    hits = search(db, 'budi santoso')
+    assert hits and all('F106_3671' in hit.path for hit in hits)
+    assert search(db, '3671012345678901')
+
+    again = index_letters(db, [str(archive)], workers=workers)
+    assert (again.indexed, again.unchanged) == (0, stats.indexed)
+    db.close()
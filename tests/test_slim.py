@@ -0,0 +1,82 @@
+import struct
+import zipfile
+import zlib
+
+from template_tools.slim import _png_pixels, recompress_png, slim_template, verify_slimmed
+
+from conftest import make_docx, paragraph
+
+RELATIONSHIPS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+IMAGE = RELATIONSHIPS + '/image'
+DOCUMENT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    f'<Relationship Id="rId5" Type="{IMAGE}" Target="media/image1.png"/>'
+    f'<Relationship Id="rId6" Type="{IMAGE}" Target="media/image2.png"/>'
+    f'<Relationship Id="rId7" Type="{IMAGE}" Target="media/image3.png"/>'
+    '</Relationships>'
+)
+
+
+def chunk(kind, body):
+    return (struct.pack('>I', len(body)) + kind + body
+            + struct.pack('>I', zlib.crc32(kind + body) & 0xffffffff))
+
+
+def make_png(width=32, height=16):
+    """RGB gradient stored without compression, with a text chunk"""
+    rows = b''.join(b'\0' + bytes(value for x in range(width)
+                                   for value in (x * 8 % 256, y * 16 % 256, (x + y) % 256))
+                    for y in range(height))
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+            + chunk(b'tEXt', b'Software\0Microsoft Office')
+            + chunk(b'IDAT', zlib.compress(rows, 0))
+            + chunk(b'IEND', b''))
+
+
+def test_recompressed_png_has_the_same_pixels():
+    png = make_png()
+    slimmed = recompress_png(png)
+    assert len(slimmed) < len(png)
+    assert b'tEXt' not in slimmed
+    assert _png_pixels(slimmed)[1] == _png_pixels(png)[1]
+
+
+def test_recompress_leaves_what_it_cannot_read():
+    assert recompress_png(b'GIF89a...') == b'GIF89a...'
+    truncated = make_png()[:60]
+    assert recompress_png(truncated) is truncated
+
+
+def test_slim_keeps_referenced_parts(tmp_path):
+    png = make_png()
+    body = paragraph('{nama}') + (f'<w:p><w:r><w:drawing xmlns:r="{RELATIONSHIPS}" '
+                                  'r:embed="rId5" r:link="rId6"/></w:r></w:p>')
+    source = make_docx(tmp_path / 'T.docx', body, {
+        'word/_rels/document.xml.rels': DOCUMENT_RELS,
+        'word/media/image1.png': png,
+        'word/media/image2.png': png,
+        'word/media/image3.png': png[:-1] + b'\1',
+        'word/media/orphan.emf': b'EMF',
+    })
+    slimmed = slim_template(str(source))
+
+    assert set(slimmed.contents) == {
+        '[Content_Types].xml', '_rels/.rels', 'word/document.xml',
+        'word/_rels/document.xml.rels', 'word/media/image1.png',
+    }
+    assert slimmed.report.dropped == {
+        'word/media/image2.png': 'duplicate of word/media/image1.png',
+        'word/media/image3.png': 'unreferenced',
+        'word/media/orphan.emf': 'unreferenced',
+    }
+    rels = slimmed.contents['word/_rels/document.xml.rels']
+    assert b'rId6' in rels and b'image2.png' not in rels and b'rId7' not in rels
+    assert 'word/media/image1.png' in slimmed.report.recompressed
+
+    output = tmp_path / 'slim.docx'
+    slimmed.write(str(output))
+    with zipfile.ZipFile(output) as zf:
+        assert zf.testzip() is None
+    assert verify_slimmed(str(source), str(output)) == []
@@ -0,0 +1,46 @@
+import zipfile
+from io import BytesIO
+
+import pytest
+
+from template_tools.parts import discover_parts
+from template_tools.scanner import BRACE_PATTERNS, MultiPatternScanner, merged_text_bytes
+from template_tools.text_index import TextIndex, find_placeholders, layout_text
+
+from conftest import LETTERS, TEMPLATES, document_xml, paragraph
+
+
+def parts(docx_path):
+    with zipfile.ZipFile(docx_path) as zf:
+        return [(part.name, zf.read(part.name)) for part in discover_parts(zf)]
+
+
+@pytest.mark.parametrize('docx', TEMPLATES + LETTERS, ids=lambda path: path.name)
+def test_layout_text_matches_text_index(docx):
+    for name, xml in parts(docx):
+        assert layout_text(xml) == TextIndex.from_xml(BytesIO(xml), layout=True).text, name
+
+
+def test_tabs_and_breaks():
+    xml = document_xml(
+        '<w:p><w:pPr><w:tabs><w:tab w:val="left" w:pos="2160"/></w:tabs></w:pPr>'
+        '<w:r><w:t>Nama</w:t><w:tab/><w:t>:</w:t><w:tab/><w:t>{na</w:t></w:r>'
+        '<w:r><w:t>ma}</w:t><w:cr/><w:t>A &amp; B</w:t><w:br/></w:r></w:p>'
+        + paragraph('&lt;x&gt;')
+    )
+    expected = 'Nama\t:\t{nama}\vA & B\v\n<x>'
+    assert layout_text(xml) == expected
+    assert TextIndex.from_xml(BytesIO(xml), layout=True).text == expected
+    # Without layout only <w:t> text counts, as docxtemplater reads tags
+    assert TextIndex.from_xml(BytesIO(xml)).text == 'Nama:{nama}A & B\n<x>\n'
+
+    merged = merged_text_bytes(xml)
+    assert merged == 'Nama\t:\t{nama}\vA &amp; B\v\n&lt;x&gt;'.encode('utf-8')
+    found = [(m.kind, m.value) for m in MultiPatternScanner(BRACE_PATTERNS).scan(merged)]
+    assert found == [('brace', 'nama'), ('angle', 'x')]
+
+
+def test_find_placeholders_joins_split_runs():
+    xml = document_xml(paragraph('{nama_', 'pemohon} dan {#list}', '{/list}'))
+    text = TextIndex.from_xml(BytesIO(xml)).text
+    assert find_placeholders(text, '#/^@') == ['nama_pemohon', '#list', '/list']
@@ -0,0 +1,60 @@
+import os
+import shutil
+
+from template_tools.watch import TemplateWatcher, watch
+
+from conftest import TEMPLATE_DIR
+
+
+def save(path, data, mtime_ns):
+    path.write_bytes(data)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_change_is_reported_once_it_settles(tmp_path):
+    template = tmp_path / 'SKU.docx'
+    shutil.copy(TEMPLATE_DIR / 'SKU.docx', template)
+    watcher = TemplateWatcher([str(tmp_path)], debounce=1.0)
+    assert watcher.prime() == [str(template)]
+    assert watcher.poll(now=0) == ([], [])
+
+    # Word writes a partial file first: never reported while not a zip
+    save(template, b'PK\3\4 half written', 1_000)
+    assert watcher.poll(now=10) == ([], [])
+    assert watcher.poll(now=20) == ([], [])
+
+    save(template, (TEMPLATE_DIR / 'UMUM.docx').read_bytes(), 2_000)
+    assert watcher.poll(now=30) == ([], [])       # quiet period starts
+    assert watcher.poll(now=30.5) == ([], [])
+    assert watcher.poll(now=31) == ([str(template)], [])
+    assert watcher.poll(now=40) == ([], [])       # reported once
+
+    template.unlink()
+    assert watcher.poll(now=50) == ([], [str(template)])
+
+
+def test_new_template_and_lock_files(tmp_path):
+    watcher = TemplateWatcher([str(tmp_path)], debounce=0)
+    assert watcher.prime() == []
+    shutil.copy(TEMPLATE_DIR / 'SKU.docx', tmp_path / '~$SKU.docx')
+    shutil.copy(TEMPLATE_DIR / 'SKU.docx', tmp_path / 'SKU.docx')
+    assert watcher.poll(now=0) == ([], [])
+    assert watcher.poll(now=0) == ([str(tmp_path / 'SKU.docx')], [])
+
+
+def test_watch_calls_back_until_interrupted(tmp_path):
+    template = tmp_path / 'SKU.docx'
+    shutil.copy(TEMPLATE_DIR / 'SKU.docx', template)
+    changes = []
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        if len(sleeps) == 1:
+            save(template, (TEMPLATE_DIR / 'UMUM.docx').read_bytes(), 5_000)
+        if len(sleeps) == 4:
+            raise KeyboardInterrupt
+
+    watch([str(tmp_path)], changes.append, interval=0.25, debounce=0, sleep=sleep)
+    assert changes == [[str(template)]]
+    assert sleeps == [0.25] * 4
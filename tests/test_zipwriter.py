@@ -0,0 +1,74 @@
+import io
+import zipfile
+
+import pytest
+
+from template_tools.zipwriter import ZipTemplate
+
+from conftest import TEMPLATES
+
+
+@pytest.mark.parametrize('template', TEMPLATES, ids=lambda path: path.name)
+def test_unchanged_package_round_trips_byte_for_byte(template):
+    assert ZipTemplate(str(template)).to_bytes() == template.read_bytes()
+
+
+@pytest.mark.parametrize('template', TEMPLATES, ids=lambda path: path.name)
+def test_replaced_part_only_changes_that_member(template):
+    source = template.read_bytes()
+    replacement = b'<?xml version="1.0"?><replaced/>'
+    written = ZipTemplate(source).to_bytes({'word/document.xml': replacement,
+                                            'customXml/new.xml': b'<new/>'})
+
+    with zipfile.ZipFile(io.BytesIO(source)) as original, \
+            zipfile.ZipFile(io.BytesIO(written)) as package:
+        assert package.testzip() is None
+        names = original.namelist()
+        assert package.namelist() == names + ['customXml/new.xml']
+        assert package.read('word/document.xml') == replacement
+        assert package.read('customXml/new.xml') == b'<new/>'
+        for name in names:
+            if name == 'word/document.xml':
+                continue
+            before, after = original.getinfo(name), package.getinfo(name)
+            assert (after.CRC, after.compress_size, after.date_time) == \
+                (before.CRC, before.compress_size, before.date_time)
+            assert package.read(name) == original.read(name)
+
+
+def test_dropped_members_are_left_out():
+    template = ZipTemplate(str(TEMPLATES[0]))
+    template.drop(['docProps/app.xml'])
+    with zipfile.ZipFile(io.BytesIO(template.to_bytes())) as package:
+        assert package.testzip() is None
+        assert 'docProps/app.xml' not in package.namelist()
+
+
+def with_comment(path, comment):
+    with zipfile.ZipFile(TEMPLATES[0]) as source, zipfile.ZipFile(path, 'w') as target:
+        for info in source.infolist():
+            target.writestr(info, source.read(info))
+        target.comment = comment
+    return path
+
+
+def test_archive_comment_is_kept(tmp_path):
+    path = with_comment(tmp_path / 'commented.docx', b'Generated by SIKEPEL')
+    template = ZipTemplate(str(path))
+    assert template.comment == b'Generated by SIKEPEL'
+    assert template.to_bytes() == path.read_bytes()
+    with zipfile.ZipFile(io.BytesIO(template.to_bytes({'word/document.xml': b'<x/>'}))) as package:
+        assert package.testzip() is None
+        assert package.comment == b'Generated by SIKEPEL'
+
+
+def test_comment_holding_the_end_record_signature(tmp_path):
+    path = with_comment(tmp_path / 'commented.docx', b'PK\x05\x06 is the end record')
+    template = ZipTemplate(str(path))
+    assert template.comment == b'PK\x05\x06 is the end record'
+    assert template.to_bytes() == path.read_bytes()
+
+
+def test_not_a_zip():
+    with pytest.raises(ValueError):
+        ZipTemplate(b'not a zip')